@@ -0,0 +1,5 @@
+'''
+Micro-benchmarks for the robot's hot paths. Run from the project root, for example:
+
+    python -m benchmarks.curves
+'''
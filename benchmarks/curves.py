@@ -0,0 +1,50 @@
+'''
+Compares the per-sample cost of the reference oi shaping functions against the precomputed curve tables
+'''
+
+import timeit
+
+import oi
+import robotmap
+from curvetable import CurveTable
+
+
+SAMPLES = [(i / 500.0) - 1.0 for i in range(1001)]
+REPEAT = 5
+NUMBER = 200
+
+
+def perSampleNs(func):
+    best = min(timeit.repeat(lambda: [func(v) for v in SAMPLES], repeat=REPEAT, number=NUMBER))
+    return best * 1e9 / (NUMBER * len(SAMPLES))
+
+
+def run():
+    deadZone = robotmap.oi.leftDriverStickNullZone
+    power = robotmap.oi.throttleFilterPower
+    config = robotmap.oi
+
+    cases = [
+        ("filterInputToPower",
+         lambda v: oi.filterInputToPower(v, config.leftDriverStickNullZone, config.throttleFilterPower),
+         CurveTable(oi.filterInputToPower, deadZone, (power,)).lookup),
+        ("filterInput",
+         lambda v: oi.filterInput(v, deadZone, 0.2, 1.5),
+         CurveTable(oi.filterInput, deadZone, (0.2, 1.5)).lookup),
+        ("applyDeadZone",
+         lambda v: oi.applyDeadZone(v, deadZone),
+         CurveTable(oi.applyDeadZone, deadZone).lookup),
+    ]
+
+    print("{:<22}{:>14}{:>14}{:>10}".format("curve", "reference ns", "table ns", "speedup"))
+    for name, reference, table in cases:
+        refNs = perSampleNs(reference)
+        tableNs = perSampleNs(table)
+        print("{:<22}{:>14.1f}{:>14.1f}{:>9.2f}x".format(name, refNs, tableNs, refNs / tableNs))
+
+    error = max(abs(cases[0][1](v) - cases[0][2](v)) for v in SAMPLES)
+    print("max filterInputToPower table error: {:.2e}".format(error))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,48 @@
+'''
+Per tick cost of each drive mode: the bare mixer, and the full drive command replayed with the mode active
+
+The mixer is resolved once when a mode is selected, so the command's cost should only differ between modes by
+the difference in their mixers
+'''
+
+import math
+import time
+
+import drivemodes
+import replay
+
+
+TICKS = 20000
+
+
+def inputs():
+    throttle = [math.sin(i * 0.01) for i in range(TICKS)]
+    turn = [math.cos(i * 0.017) for i in range(TICKS)]
+    rightThrottle = [math.sin(i * 0.013) for i in range(TICKS)]
+    slow = [i % 400 < 100 for i in range(TICKS)]
+    return throttle, turn, rightThrottle, slow
+
+
+def run():
+    throttle, turn, rightThrottle, slow = inputs()
+    log = {'rawThrottle': throttle, 'rawTurn': turn, 'driveSlow': slow}
+    savedMode = drivemodes.mode
+
+    print("{:<12}{:>16}{:>16}".format("mode", "mixer ns", "command ns"))
+    try:
+        for name in sorted(drivemodes.modes):
+            drivemodes.setMode(name)
+            mix = drivemodes.mixer
+            start = time.perf_counter()
+            for t, r, rt, s in zip(throttle, turn, rightThrottle, slow):
+                mix(t, r, rt, s)
+            mixerTime = time.perf_counter() - start
+
+            trace = replay.replayLog(log, mode=name)
+            print("{:<12}{:>16.0f}{:>16.0f}".format(name, mixerTime / TICKS * 1e9, trace['elapsed'] / TICKS * 1e9))
+    finally:
+        drivemodes.setMode(savedMode)
+
+
+if __name__ == '__main__':
+    run()
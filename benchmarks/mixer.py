@@ -0,0 +1,47 @@
+'''
+Maps the full NFS mixer response surface with the scalar kernel and the NumPy batch version
+'''
+
+import time
+
+import numpy as np
+
+import robotmap
+from nfsmixer import nfsMix, nfsMixBatch
+
+
+GRID_SIZE = 401
+
+
+def run():
+    lowTurnScale = robotmap.nfs.lowTurnScale
+    highTurnScale = robotmap.nfs.highTurnScale
+
+    axis = np.linspace(-1.0, 1.0, GRID_SIZE)
+    throttle, turn = np.meshgrid(axis, axis, indexing='ij')
+    throttle = np.concatenate([throttle.ravel(), throttle.ravel()])
+    turn = np.concatenate([turn.ravel(), turn.ravel()])
+    slow = np.repeat([False, True], GRID_SIZE * GRID_SIZE)
+
+    start = time.perf_counter()
+    scalarLeft = np.empty_like(throttle)
+    scalarRight = np.empty_like(throttle)
+    for i, (t, r, s) in enumerate(zip(throttle.tolist(), turn.tolist(), slow.tolist())):
+        scalarLeft[i], scalarRight[i] = nfsMix(t, r, highTurnScale if s else lowTurnScale)
+    scalarTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batchLeft, batchRight = nfsMixBatch(throttle, turn, slow, lowTurnScale, highTurnScale)
+    batchTime = time.perf_counter() - start
+
+    identical = np.array_equal(scalarLeft.view(np.int64), batchLeft.view(np.int64)) and \
+        np.array_equal(scalarRight.view(np.int64), batchRight.view(np.int64))
+
+    print("{} samples ({}x{} grid, normal and slow)".format(throttle.size, GRID_SIZE, GRID_SIZE))
+    print("scalar nfsMix:   {:8.1f} ms".format(scalarTime * 1000))
+    print("nfsMixBatch:     {:8.1f} ms".format(batchTime * 1000))
+    print("bit-identical:   {}".format(identical))
+
+
+if __name__ == '__main__':
+    run()
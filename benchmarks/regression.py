@@ -0,0 +1,292 @@
+'''
+Regression gate for the robot's hot paths and startup, against baselines stored in benchmarks/baselines.json
+
+    python -m benchmarks.regression             # compare, exits 1 if any case regressed past its tolerance
+    python -m benchmarks.regression --update    # store the current numbers as the baselines
+
+Laptops, CI machines and the roboRIO run at very different speeds, so every case is stored relative to a fixed
+pure Python calibration loop timed in the same run. A baseline taken on one machine then carries over to another
+as long as the mix of work stays the same, and a case only fails if it got slower compared to the calibration
+loop by more than its tolerance. A case over its tolerance is measured again (up to RETRIES times) before it
+fails. Update the baselines in the same commit as a change that is meant to be slower
+'''
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import robotmap
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_TOLERANCE = 0.25
+REPEAT = 25
+ROUNDS = 5
+RETRIES = 2
+UPDATE_ROUNDS = 3
+SAMPLES = [(i / 50.0) - 1.0 for i in range(101)]
+STARTUP_REPEAT = 3
+STARTUP_SCRIPT = ("import time\n"
+                  "start = time.perf_counter()\n"
+                  "import robot\n"
+                  "imported = time.perf_counter()\n"
+                  "robot.MyRobot().robotInit()\n"
+                  "print(imported - start, time.perf_counter() - imported)\n")
+
+
+def bestNs(func, number):
+    """
+    :return: the fastest of REPEAT timings of func, in ns per call
+    """
+    return min(timeit.repeat(func, repeat=REPEAT, number=number)) * 1e9 / number
+
+
+class _CalibrationState:
+    __slots__ = ('value', 'limit')
+
+    def __init__(self):
+        self.value = 0.0
+        self.limit = 0.5
+
+
+def _calibrationStep(state, target):
+    diff = target - state.value
+    if math.fabs(diff) > state.limit:
+        diff = state.limit if diff > 0.0 else -state.limit
+    state.value += diff
+
+
+def calibrate():
+    """
+    Time a small rate limiter loop - function calls, attribute access and float math, the same mix of work as
+    the drive code, so the cases and the calibration speed up and slow down together
+    """
+    state = _CalibrationState()
+
+    def work():
+        for i in range(500):
+            _calibrationStep(state, (i % 7) * 0.3 - 1.0)
+    return bestNs(work, 50)
+
+
+def benchOiShaping():
+    import oi
+    config = robotmap.oi
+    deadZone = config.leftDriverStickNullZone
+    power = config.throttleFilterPower
+    filterInputToPower = oi.filterInputToPower
+
+    def run():
+        for v in SAMPLES:
+            filterInputToPower(v, deadZone, power)
+    return bestNs(run, 50) / len(SAMPLES)
+
+
+def benchCurveLookup():
+    import oi
+    oi.updateCurves()
+    lookup = oi.throttleCurve.lookup
+
+    def run():
+        for v in SAMPLES:
+            lookup(v)
+    return bestNs(run, 50) / len(SAMPLES)
+
+
+def benchMixer():
+    import drivemodes
+    mixer = drivemodes.mixer
+
+    def run():
+        for v in SAMPLES:
+            mixer(v, -v, v, False)
+    return bestNs(run, 50) / len(SAMPLES)
+
+
+def benchExecute():
+    import replay
+    from commands.tankdriveteleopdefaultnfs import TankDriveTeleopDefaultNFS
+
+    with replay.standIn('nfs') as (driveline, frame):
+        command = TankDriveTeleopDefaultNFS()
+        command.initialize()
+        execute = command.execute
+
+        def run():
+            for v in SAMPLES:
+                frame.timestamp += 0.02
+                frame.throttle = v
+                frame.turn = -v
+                execute()
+        ns = bestNs(run, 10) / len(SAMPLES)
+        command.end()
+        return ns
+
+
+def benchDriveRaw():
+    import subsystems
+
+    # the simulated HAL stands in for the speed controllers. Its ports can only be opened once per process
+    if subsystems.driveline is None:
+        subsystems.init()
+        subsystems.driveline.sensors.stop()
+    driveRaw = subsystems.driveline.driveRaw
+
+    def run():
+        for v in SAMPLES:
+            driveRaw(v, -v)
+    return bestNs(run, 5) / len(SAMPLES)
+
+
+def benchStartup():
+    """
+    :return: (ns to import robot and everything it imports, ns for robotInit), each the best of fresh interpreters
+             with bytecode already compiled, as on the robot after the first start
+    """
+    with tempfile.TemporaryDirectory() as bytecodeDir:
+        env = dict(os.environ)
+        env['PYTHONPYCACHEPREFIX'] = bytecodeDir
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        env.pop('ROBOT_PROFILER', None)
+        results = []
+        for _ in range(STARTUP_REPEAT + 1):
+            output = subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT], cwd=robotmap.projectDir,
+                                             env=env, stderr=subprocess.DEVNULL)
+            results.append(tuple(float(value) for value in output.decode().strip().splitlines()[-1].split()))
+    # the first run compiles the bytecode, leave it out
+    return min(r[0] for r in results[1:]) * 1e9, min(r[1] for r in results[1:]) * 1e9
+
+
+# name and benchmark function. startup reports startup.import and startup.robotInit
+CASES = (
+    ('oi.filterInputToPower', benchOiShaping),
+    ('oi.throttleCurve.lookup', benchCurveLookup),
+    ('drivemodes.mixer', benchMixer),
+    ('TankDriveTeleopDefaultNFS.execute', benchExecute),
+    ('TankDrive.driveRaw', benchDriveRaw),
+    ('startup', benchStartup),
+)
+# startup is timed over whole processes, and the cases of a microsecond or less are mostly call overhead that moves
+# with the interpreter's memory layout, so these are noisier. The full command tick goes through the oi frame,
+# mixer, rate limit and stand in driveline, and moves by up to about 20% against the calibration loop between runs
+TOLERANCES = {'startup.import': 0.5, 'startup.robotInit': 0.5, 'oi.filterInputToPower': 0.5,
+              'oi.throttleCurve.lookup': 0.5, 'drivemodes.mixer': 0.5, 'TankDriveTeleopDefaultNFS.execute': 0.4}
+
+
+def caseOf(resultName):
+    return 'startup' if resultName.startswith('startup.') else resultName
+
+
+def measure(names=None):
+    """
+    Time each case between runs of the calibration loop, so a machine that speeds up or slows down part way
+    through (a laptop on battery, a busy CI runner) moves both together. Each case takes the best of ROUNDS runs
+    interleaved with the calibration, so a burst of load on the machine doesn't land on just one side
+
+    :param names: case names to run, or None for all of them
+    :return: dict of result name to (ns per call, relative to the calibration loop)
+    """
+    results = {}
+    for name, func in CASES:
+        if names is not None and name not in names:
+            continue
+        calibration = calibrate()
+        value = func()
+        for _ in range(ROUNDS - 1):
+            calibration = min(calibration, calibrate())
+            value = min(value, func()) if name != 'startup' else tuple(map(min, value, func()))
+        calibration = min(calibration, calibrate())
+        if name == 'startup':
+            results['startup.import'] = (value[0], value[0] / calibration)
+            results['startup.robotInit'] = (value[1], value[1] / calibration)
+        else:
+            results[name] = (value, value / calibration)
+    return results
+
+
+def loadBaselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {'cases': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def saveBaselines(results, path=BASELINE_PATH):
+    """
+    Store the results, keeping the baselines of any cases that weren't run
+    """
+    cases = loadBaselines(path)['cases']
+    for name, (ns, relative) in results.items():
+        cases[name] = {'ns': round(ns, 1), 'relative': relative,
+                       'tolerance': TOLERANCES.get(name, DEFAULT_TOLERANCE)}
+    with open(path, 'w') as f:
+        json.dump({'cases': cases}, f, indent=4, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baselines, tolerance=None):
+    """
+    :param tolerance: allowed slowdown (0.25 is 25%) for every case, or None for each baseline's own tolerance
+    :return: list of (name, ns, baseline ns scaled to this machine or None, change or None, passed)
+    """
+    rows = []
+    for name, (ns, relative) in results.items():
+        baseline = baselines['cases'].get(name)
+        if baseline is None:
+            rows.append((name, ns, None, None, True))
+            continue
+        change = relative / baseline['relative'] - 1.0
+        allowed = tolerance if tolerance is not None else baseline.get('tolerance', DEFAULT_TOLERANCE)
+        rows.append((name, ns, ns / (1.0 + change), change, change <= allowed))
+    return rows
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--update', action='store_true', help='store the results as the new baselines')
+    parser.add_argument('--tolerance', type=float, help='allowed slowdown for every case, 0.25 is 25%%')
+    parser.add_argument('cases', nargs='*', help='only run these cases, by name from CASES')
+    args = parser.parse_args(argv)
+
+    results = measure(args.cases or None)
+    baselines = loadBaselines()
+
+    if args.update:
+        # baselines are the best of a few rounds, the same way a check keeps a case's best run
+        for _ in range(UPDATE_ROUNDS - 1):
+            for name, (ns, relative) in measure(args.cases or None).items():
+                if relative < results[name][1]:
+                    results[name] = (ns, relative)
+        saveBaselines(results)
+        baselines = loadBaselines()
+        print("Baselines written to {}".format(BASELINE_PATH))
+
+    # a case over its tolerance is measured again before it fails, and keeps its best run, so one noisy
+    # sample can't fail the gate
+    for _ in range(RETRIES):
+        slow = [row[0] for row in compare(results, baselines, args.tolerance) if not row[4]]
+        if not slow:
+            break
+        for name, (ns, relative) in measure({caseOf(name) for name in slow}).items():
+            if name in slow and relative < results[name][1]:
+                results[name] = (ns, relative)
+
+    print("{:<46}{:>14}{:>14}{:>10}".format("case", "ns", "baseline ns", "change"))
+    failed = 0
+    for name, ns, expected, change, passed in compare(results, baselines, args.tolerance):
+        if expected is None:
+            print("{:<46}{:>14.1f}{:>14}{:>10}".format(name, ns, "-", "new"))
+        else:
+            print("{:<46}{:>14.1f}{:>14.1f}{:>+9.1f}%{}".format(name, ns, expected, change * 100,
+                                                              "" if passed else "  REGRESSED"))
+        failed += not passed
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
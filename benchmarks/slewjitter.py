@@ -0,0 +1,66 @@
+'''
+Checks the drive command's rate limiter under injected loop jitter
+
+A full throttle step is replayed with steady, jittery and stalling loop timestamps. With the measured period
+the time to reach full speed should be the same for each (minTimeFullThrottleChange / 2 for 0 -> 1), while a
+fixed per-tick limit would stretch it by however late the loops run
+'''
+
+import random
+
+import robotmap
+import replay
+
+
+TICKS = 200
+
+
+def steadyTimestamps():
+    return [i * 0.02 for i in range(TICKS)]
+
+
+def jitterTimestamps(seed=279):
+    rng = random.Random(seed)
+    timestamps = [0.0]
+    for _ in range(TICKS - 1):
+        timestamps.append(timestamps[-1] + rng.uniform(0.015, 0.035))
+    return timestamps
+
+
+def stallTimestamps():
+    timestamps = [0.0]
+    for i in range(1, TICKS):
+        timestamps.append(timestamps[-1] + (0.08 if i % 10 == 0 else 0.02))
+    return timestamps
+
+
+def timeToFull(timestamps, speeds):
+    for timestamp, speed in zip(timestamps, speeds):
+        if speed >= 1.0:
+            return timestamp - timestamps[0]
+    return float('nan')
+
+
+def fixedTickTimeToFull(timestamps):
+    speed = 0.0
+    for timestamp in timestamps:
+        speed = min(1.0, speed + robotmap.nfs.maxSpeedChange)
+        if speed >= 1.0:
+            return timestamp - timestamps[0]
+    return float('nan')
+
+
+def run():
+    print("expected time to full speed: {:.3f} sec".format(robotmap.nfs.minTimeFullThrottleChange / 2))
+    print("{:<10}{:>16}{:>16}{:>16}".format("loop", "measured dt", "fixed 0.02", "ns per tick"))
+    for name, timestamps in (("steady", steadyTimestamps()), ("jitter", jitterTimestamps()),
+                             ("stalls", stallTimestamps())):
+        log = {'timestamp': timestamps, 'rawThrottle': [1.0] * TICKS, 'rawTurn': [0.0] * TICKS}
+        trace = replay.replayLog(log)
+        print("{:<10}{:>16.3f}{:>16.3f}{:>16.0f}".format(name, timeToFull(timestamps, trace['adjustedLeft']),
+                                                         fixedTickTimeToFull(timestamps),
+                                                         trace['elapsed'] * 1e9 / TICKS))
+
+
+if __name__ == '__main__':
+    run()
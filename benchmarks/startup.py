@@ -0,0 +1,67 @@
+'''
+Time to import robotmap, for the defaults and for a robot profile, with the validated values taken from the cache
+or validated from scratch. Sections from the cache are only built when first used, so the cached cases are also
+timed with every section used straight after the import
+
+Each sample is a fresh interpreter. wpilib is imported before the clock starts, so only the config work is timed.
+Bytecode and the profile caches are written to temporary directories (ROBOT_CONFIG_CACHE), so the caches in the
+working tree are left alone, and the robot runs from compiled bytecode after the first start
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import robotmap
+
+
+REPEAT = 15
+SCRIPT = ("import time, wpilib\n"
+          "start = time.perf_counter()\n"
+          "import robotmap\n"
+          "print(time.perf_counter() - start)\n")
+SECTIONS = ('driveLine', 'oi', 'sensors', 'drivePID', 'motionProfile', 'trajectories', 'nfs', 'telemetry',
+            'recorder', 'stream', 'rates', 'budget', 'gc', 'timing', 'latency', 'profiler', 'physics')
+SCRIPT_ALL_SECTIONS = ("import time, wpilib\n"
+                       "start = time.perf_counter()\n"
+                       "import robotmap\n"
+                       "for name in {!r}:\n"
+                       "    getattr(robotmap, name)\n"
+                       "print(time.perf_counter() - start)\n").format(SECTIONS)
+
+
+def importTime(profile, cached, bytecodeDir, cacheDir, script=SCRIPT):
+    env = dict(os.environ)
+    env['ROBOT_PROFILE'] = profile
+    env['ROBOT_CONFIG_CACHE'] = cacheDir
+    env['PYTHONPYCACHEPREFIX'] = bytecodeDir
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    subprocess.check_output([sys.executable, '-c', script], cwd=robotmap.projectDir, env=env)
+
+    cachePath = os.path.join(cacheDir, '.' + profile + '.json.cache')
+    best = None
+    for _ in range(REPEAT):
+        if not cached and os.path.exists(cachePath):
+            os.remove(cachePath)
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=robotmap.projectDir, env=env)
+        elapsed = float(output.decode().strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run():
+    print("{:<40}{:>12}".format("robotmap import", "ms"))
+    with tempfile.TemporaryDirectory() as bytecodeDir, tempfile.TemporaryDirectory() as cacheDir:
+        for label, profile, cached, script in (
+                ("defaults, validated", 'competition', False, SCRIPT),
+                ("defaults, from cache", 'competition', True, SCRIPT),
+                ("defaults, from cache, every section", 'competition', True, SCRIPT_ALL_SECTIONS),
+                ("practice, validated", 'practice', False, SCRIPT),
+                ("practice, from cache", 'practice', True, SCRIPT),
+                ("practice, from cache, every section", 'practice', True, SCRIPT_ALL_SECTIONS)):
+            print("{:<40}{:>12.3f}".format(label, importTime(profile, cached, bytecodeDir, cacheDir, script) * 1000))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,90 @@
+'''
+Compares the time to load the store and fetch one path from the memory mapped binary store, JSON and CSV
+'''
+
+import csv
+import json
+import os
+import tempfile
+import time
+
+import motionprofile
+import trajectorystore
+
+
+PATH_COUNT = 40
+REPEAT = 20
+
+
+def buildPaths():
+    paths = {}
+    for i in range(PATH_COUNT):
+        profile = motionprofile.generateProfile(24.0 + i * 6.0, 96.0, 120.0, 600.0, 0.01)
+        paths["path{}".format(i)] = trajectorystore.straightPath(profile)
+    return paths
+
+
+def writeJson(filename, paths):
+    with open(filename, 'w') as f:
+        json.dump({name: {'period': period, 'channels': [list(c) for c in channels]}
+                   for name, (period, channels) in paths.items()}, f)
+
+
+def writeCsv(filename, paths):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for name, (period, channels) in paths.items():
+            for row in zip(*channels):
+                writer.writerow([name, period] + list(row))
+
+
+def loadJson(filename, name):
+    with open(filename) as f:
+        return json.load(f)[name]['channels'][0][-1]
+
+
+def loadCsv(filename, name):
+    last = None
+    with open(filename, newline='') as f:
+        for row in csv.reader(f):
+            if row[0] == name:
+                last = float(row[2])
+    return last
+
+
+def loadStore(filename, name):
+    return trajectorystore.TrajectoryStore(filename).getPath(name).leftPosition[-1]
+
+
+def timeLoad(func, filename, name):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(filename, name)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run():
+    paths = buildPaths()
+    name = "path{}".format(PATH_COUNT - 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {
+            'binary': os.path.join(tmp, 'paths.bin'),
+            'json': os.path.join(tmp, 'paths.json'),
+            'csv': os.path.join(tmp, 'paths.csv'),
+        }
+        trajectorystore.writeStore(files['binary'], paths)
+        writeJson(files['json'], paths)
+        writeCsv(files['csv'], paths)
+
+        print("{} paths, loading {}".format(PATH_COUNT, name))
+        print("{:<8}{:>12}{:>12}".format("format", "bytes", "load ms"))
+        for label, func in (('binary', loadStore), ('json', loadJson), ('csv', loadCsv)):
+            print("{:<8}{:>12}{:>12.3f}".format(label, os.path.getsize(files[label]),
+                                                timeLoad(func, files[label], name) * 1000))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,54 @@
+from wpilib.command import Command
+
+import subsystems
+import robotmap
+import motionprofile
+from subsystems.drivepid import DrivePIDEngine
+
+
+class DriveProfiled(Command):
+    """
+    Drive straight for a distance by following a precomputed motion profile
+
+    The profile is taken from the motionprofile cache when the command is constructed, so nothing is planned
+    once it is running. Each execute looks up the setpoint for the time since the command started and hands it
+    to the driveline's PID engine, which closes the loop at its own higher rate
+    """
+
+    def __init__(self, distanceInches, maxVelocity=None, maxAcceleration=None, maxJerk=None, timeout=None):
+        super().__init__('DriveProfiled')
+        self.requires(subsystems.driveline)
+        self.setInterruptible(True)
+
+        cfg = robotmap.motionProfile
+        self.profile = motionprofile.generateProfile(
+            distanceInches,
+            cfg.maxVelocity if maxVelocity is None else maxVelocity,
+            cfg.maxAcceleration if maxAcceleration is None else maxAcceleration,
+            cfg.maxJerk if maxJerk is None else maxJerk,
+            cfg.period)
+
+        if timeout is None:
+            timeout = self.profile.duration + cfg.settleTime
+        self.setTimeout(timeout)
+
+    def initialize(self):
+        subsystems.driveline.resetEncoders()
+        subsystems.driveline.drivePID.setSetpoint(DrivePIDEngine.DISTANCE, 0.0)
+        subsystems.driveline.drivePID.enable()
+
+    def execute(self):
+        position, velocity, acceleration = self.profile.sample(self.timeSinceInitialized())
+        subsystems.driveline.drivePID.setSetpoint(DrivePIDEngine.DISTANCE,
+                                                  position / robotmap.driveLine.inchesPerTick)
+
+    def isFinished(self):
+        if self.isTimedOut():
+            return True
+        return self.timeSinceInitialized() >= self.profile.duration and subsystems.driveline.drivePID.onTarget()
+
+    def end(self):
+        subsystems.driveline.drivePID.disable()
+
+    def interrupted(self):
+        self.end()
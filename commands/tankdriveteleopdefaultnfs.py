@@ -1,10 +1,15 @@
-import math
-
-from wpilib import SmartDashboard
 from wpilib.command import Command
 import subsystems
 import oi
 import robotmap
+import looptiming
+import telemetry
+import matchrecorder
+import telemetrystream
+import loopbudget
+import drivemodes
+import latencytrace
+from latencytrace import FILTER, MIX, SLEW
 
 
 class TankDriveTeleopDefaultNFS(Command):
@@ -14,7 +19,16 @@ class TankDriveTeleopDefaultNFS(Command):
 
     Speed of turning will be adjusted based on throttle, and spinning one way then reversing will not happen instantly
     Also, spinning one direction and then taking throttle to full reverse will reverse the direction of turn
+
+    The stick mixing comes from the active drive mode (drivemodes.py, NFS by default), so the same command also
+    drives arcade, curvature and tank. The mode can change while the command runs, it's used from the next tick
+
+    The robotmap tunables and curve lookups are bound to the command in initialize(), once per enable, so a tick
+    reads its own slots rather than walking module attributes, and steady state ticks keep no new objects alive
     """
+    __slots__ = ('targetLeftSpeed', 'targetRightSpeed', 'adjustedLeftSpeed', 'adjustedRightSpeed', 'lastTimestamp',
+                 'throttleLookup', 'turnLookup', 'debugTurning', 'slowDriveSpeedFactor', 'loopPeriod',
+                 'minLoopPeriod', 'maxLoopPeriod', 'speedChangePerSecond', 'tracer')
 
     def __init__(self):
         super().__init__('TankDriveTeleopDefaultNFS')
@@ -23,53 +37,117 @@ class TankDriveTeleopDefaultNFS(Command):
         self.setRunWhenDisabled(False)
         self.targetLeftSpeed = 0.0
         self.targetRightSpeed = 0.0
+        self.adjustedLeftSpeed = 0.0
+        self.adjustedRightSpeed = 0.0
+        self.lastTimestamp = None
+        self.bindConfig()
 
+    def bindConfig(self):
+        """
+        Take the current tunables from robotmap and the oi curves
+        """
+        oi.updateCurves()
+        drivemodes.refresh()
+        self.throttleLookup = oi.throttleCurve.lookup
+        self.turnLookup = oi.turnCurve.lookup
+
+        nfs = robotmap.nfs
+        self.debugTurning = nfs.debugTurning
+        self.slowDriveSpeedFactor = nfs.slowDriveSpeedFactor
+        self.loopPeriod = nfs.loopPeriod
+        self.minLoopPeriod = nfs.minLoopPeriod
+        self.maxLoopPeriod = nfs.maxLoopPeriod
+        self.speedChangePerSecond = nfs.speedChangePerSecond
+        self.tracer = latencytrace.tracer
+
+    def initialize(self):
+        self.bindConfig()
+        self.lastTimestamp = None
+
+    @looptiming.timed('TankDriveTeleopDefaultNFS.execute')
     def execute(self):
-        throttle = oi.filterInputToPower(oi.getRawThrottle(),
-                                         oi.config.leftDriverStickNullZone, oi.config.throttleFilterPower)
-
-        turn = oi.filterInputToPower(oi.getRawTurn(), oi.config.rightDriverStickNullZone, oi.config.turnFilterPower)
-
-        if robotmap.nfs.debugTurning:
-            SmartDashboard.putNumber("Throttle", throttle)
-            SmartDashboard.putNumber("Turn", turn)
-
-        if oi.btnDriveSlow.get():
-            throttle *= robotmap.nfs.slowDriveSpeedFactor
-            turn *= robotmap.nfs.slowDriveSpeedFactor
-
-        lastLeftSpeed = self.targetLeftSpeed
-        lastRightSpeed = self.targetRightSpeed
-
-        self.nfsCalcTrackSpeeds(throttle, turn)
-        if robotmap.nfs.debugTurning:
-            SmartDashboard.putNumber("targetLeftSpeed", self.targetLeftSpeed)
-            SmartDashboard.putNumber("targetRightSpeed", self.targetRightSpeed)
-
+        frame = oi.frame
+        throttle = self.throttleLookup(frame.throttle)
+        turn = self.turnLookup(frame.turn)
+        tracer = self.tracer
+
+        # debug writes and logging are the first work dropped when the loop runs long
+        debug = self.debugTurning and loopbudget.budget.allows('debug')
+        if debug:
+            telemetry.put("NFS/Throttle", throttle)
+            telemetry.put("NFS/Turn", turn)
+
+        if frame.driveSlow:
+            slowDriveSpeedFactor = self.slowDriveSpeedFactor
+            throttle *= slowDriveSpeedFactor
+            turn *= slowDriveSpeedFactor
+        if tracer is not None:
+            tracer.mark(FILTER)
+
+        targetLeft, targetRight = drivemodes.mixer(throttle, turn, frame.rightThrottle, frame.driveSlow)
+        self.targetLeftSpeed = targetLeft
+        self.targetRightSpeed = targetRight
+        if tracer is not None:
+            tracer.mark(MIX)
+        if debug:
+            telemetry.put("NFS/targetLeftSpeed", targetLeft)
+            telemetry.put("NFS/targetRightSpeed", targetRight)
+
+        # Limit how quickly the output can change, using the measured time since the last tick so that loop
+        # jitter doesn't change how the robot accelerates. A stalled loop is capped at maxLoopPeriod worth of change
+        timestamp = frame.timestamp
+        lastTimestamp = self.lastTimestamp
+        if lastTimestamp is None:
+            period = self.loopPeriod
+        else:
+            period = timestamp - lastTimestamp
+            if period < self.minLoopPeriod:
+                period = self.minLoopPeriod
+            elif period > self.maxLoopPeriod:
+                period = self.maxLoopPeriod
+        self.lastTimestamp = timestamp
+        maxSpeedChange = period * self.speedChangePerSecond
+
+        adjustedLeft = self.adjustedLeftSpeed
+        if targetLeft - adjustedLeft > maxSpeedChange:
+            adjustedLeft += maxSpeedChange
+        elif adjustedLeft - targetLeft > maxSpeedChange:
+            adjustedLeft -= maxSpeedChange
+        else:
+            adjustedLeft = targetLeft
 
-        leftSpeedDiff = lastLeftSpeed - self.targetLeftSpeed
-        rightSpeedDiff = lastRightSpeed - self.targetRightSpeed
+        adjustedRight = self.adjustedRightSpeed
+        if targetRight - adjustedRight > maxSpeedChange:
+            adjustedRight += maxSpeedChange
+        elif adjustedRight - targetRight > maxSpeedChange:
+            adjustedRight -= maxSpeedChange
+        else:
+            adjustedRight = targetRight
 
-        if math.fabs(leftSpeedDiff) > robotmap.nfs.maxSpeedChange:
-            if leftSpeedDiff > 0.0:
-                leftSpeedDiff = robotmap.nfs.maxSpeedChange
-            if leftSpeedDiff < 0.0:
-                leftSpeedDiff = robotmap.nfs.maxSpeedChange * -1.0
+        self.adjustedLeftSpeed = adjustedLeft
+        self.adjustedRightSpeed = adjustedRight
+        if tracer is not None:
+            tracer.mark(SLEW)
 
-        if math.fabs(rightSpeedDiff) > robotmap.nfs.maxSpeedChange:
-            if rightSpeedDiff > 0.0:
-                rightSpeedDiff = robotmap.nfs.maxSpeedChange
-            if rightSpeedDiff < 0.0:
-                rightSpeedDiff = robotmap.nfs.maxSpeedChange * -1.0
+        if debug:
+            telemetry.put("NFS/AdjustedLeft", adjustedLeft)
+            telemetry.put("NFS/AdjustedRight", adjustedRight)
 
-        adjustedLeft = lastLeftSpeed - leftSpeedDiff
-        adjustedRight = lastRightSpeed - rightSpeedDiff
+        subsystems.driveline.driveRaw(adjustedLeft, adjustedRight)
+        if tracer is not None:
+            tracer.markOutput()
 
-        if robotmap.nfs.debugTurning:
-            SmartDashboard.putNumber("AdjustedLeft", adjustedLeft)
-            SmartDashboard.putNumber("AdjustedRight", adjustedRight)
+        recorder = matchrecorder.recorder
+        if recorder is not None and loopbudget.budget.allows('logging'):
+            recorder.record(frame.timestamp, frame.throttle, frame.turn, frame.driveSlow, throttle, turn,
+                            targetLeft, targetRight, adjustedLeft, adjustedRight,
+                            subsystems.driveline.leftEncoder.get(), subsystems.driveline.rightEncoder.get(),
+                            frame.rightThrottle)
 
-        subsystems.driveline.driveRaw(adjustedLeft, adjustedRight)
+        streamer = telemetrystream.streamer
+        if streamer is not None and loopbudget.budget.allows('logging'):
+            streamer.send(frame.timestamp, frame.driveSlow, frame.throttle, frame.turn, throttle, turn,
+                          targetLeft, targetRight, adjustedLeft, adjustedRight, subsystems.sensors.latest())
 
     def isFinished(self):
         return False
@@ -78,107 +156,12 @@ class TankDriveTeleopDefaultNFS(Command):
         subsystems.driveline.driveRaw(0.0, 0.0)
         self.targetLeftSpeed = 0.0
         self.targetRightSpeed = 0.0
+        self.adjustedLeftSpeed = 0.0
+        self.adjustedRightSpeed = 0.0
     
     def interrupted(self):
         subsystems.driveline.driveRaw(0.0, 0.0)
         self.targetLeftSpeed = 0.0
         self.targetRightSpeed = 0.0
-
-    def nfsCalcTrackSpeeds(self, rawThrottleSpeed, rawTurnSpeed):
-        """
-        Throttle will set the base forward or backward speed
-        turn will reduce the speed of the slower side
-
-        The amount reduced will be itself reduced based on the throttle
-        Example: for full throttle (1.0), and full turn (1.0)
-        a reasonably tight arc is found if the fast side is at +1 and the slow side is at +0.3
-        The ammount to reduce the turn by, is found by:
-            reduction range = 1 - (turnScale * throttle)
-
-        And the actual slow side speed found by
-            slowSide = throttle - (turn * range)
-
-        In the above example, if the scale is 0.3, the reduction range = 0.7  from    1 - (0.3 * 1.0)
-
-
-        Are there any situations in which the fast side would need to be increased?
-        Yes - if the throttle is lower than the turn, the turn reduction to the slow side will be out of kilter with the fast side
-        This will cause the robot to actually drive a bit in the opposite direction
-
-
-
-        :param rawThrottleSpeed: Throttle value after filtering joystick input -1.0 to +1.0
-        :param rawTurnSpeed: Turn value after filtering -1.0 to +1.0
-        """
-
-        leftSpeed = 0.0
-        rightSpeed = 0.0
-
-        throttle = math.fabs(rawThrottleSpeed)
-        throttleSign = 0.0
-        if rawThrottleSpeed > 0.0:
-            throttleSign = 1.0
-        if rawThrottleSpeed < 0.0:
-            throttleSign = -1.0
-        if rawThrottleSpeed == 0.0:
-            throttleSign = 1.0
-
-        turn = math.fabs(rawTurnSpeed)
-        turnSign = 0.0
-        if rawTurnSpeed > 0.0:
-            turnSign = 1.0
-        if rawTurnSpeed < 0.0:
-            turnSign = -1.0
-        if rawTurnSpeed == 0.0:
-            turnSign = 1.0
-
-        # forward + right = clockwise (+1.0)
-        # forward + left = counter clockwise (-1.0)
-        # back + right = counter clockwise (-1.0)
-        # back + left = clockwise (+1.0)
-        spinSign = throttleSign * turnSign
-
-        if turn != 0.0:
-            fastSide = rawThrottleSpeed
-            if oi.btnDriveSlow.get():
-                # heavy scaling when driving slow
-                turnScale = robotmap.nfs.highTurnScale
-            else:
-                # light scaling when driving fast
-                turnScale = robotmap.nfs.lowTurnScale
-
-            range = 1 - (turnScale * throttle)
-            slowSide = throttle - (turn * range)
-            slowSide *= throttleSign
-
-            if throttle == 0.0:
-                # if there's zero throttle, a turn should just spin
-                if math.fabs(fastSide) < math.fabs(slowSide):
-                    fastSide = slowSide * -1.0
-            else:
-                # Stop driving the opposite direction if a tiny bit of throttle is given, and more turn is
-                # overpowering it
-                # TODO - This section is experimental
-                # It appears to do what we want, but needs more testing.  It makes the robot more inclined to spin
-                # at slow throttle speeds, but does seem to stop it driving in the reverse direction due to how turn
-                # is accomplished
-                if math.fabs(fastSide) < math.fabs(slowSide):
-                    if fastSide > 0.0:
-                        fastSide = math.fabs(slowSide)
-                    else:
-                        fastSide = math.fabs(slowSide) * -1.0
-
-            if spinSign == 1.0:
-                leftSpeed = fastSide
-                rightSpeed = slowSide
-
-            if spinSign == -1.0:
-                leftSpeed = slowSide
-                rightSpeed = fastSide
-        else:
-            #straight ahead
-            leftSpeed = rawThrottleSpeed
-            rightSpeed = rawThrottleSpeed
-
-        self.targetLeftSpeed = leftSpeed
-        self.targetRightSpeed = rightSpeed
\ No newline at end of file
+        self.adjustedLeftSpeed = 0.0
+        self.adjustedRightSpeed = 0.0
@@ -0,0 +1,103 @@
+from array import array
+
+
+class CurveTable:
+    """
+    Dense lookup table for a symmetric joystick shaping curve
+
+    The curve is sampled once over the live part of the stick travel (deadZone to 1.0) and evaluated afterwards
+    with a linear interpolation between the two nearest samples. Anything inside the dead zone returns 0.0,
+    and magnitudes above 1.0 are held at the value for 1.0
+
+    The sampling function must be odd (f(-x) == -f(x)) and return 0.0 at the edge of the dead zone, which is true
+    for all of the filter functions in oi.py
+
+    Powers below 1.0 have an infinite slope at the edge of the dead zone, so the first interval carries the largest
+    error (about 0.006 for the default 0.05 / 0.4 throttle config with 512 intervals, under 0.001 everywhere else)
+    """
+
+    def __init__(self, func, deadZone, params=(), size=512):
+        """
+        :param func: reference shaping function, called as func(val, deadZone, *params)
+        :param deadZone: dead zone applied by the function
+        :param params: any additional parameters passed through to func
+        :param size: number of intervals in the table
+        """
+        self.deadZone = abs(deadZone)
+        self.params = tuple(params)
+        self.size = size
+
+        span = 1.0 - self.deadZone
+        self.scale = size / span
+        self.table = array('d', (func(self.deadZone + (span * i / size), deadZone, *self.params)
+                                 for i in range(size + 1)))
+        self.lookup = self._buildLookup()
+
+    def _buildLookup(self):
+        """
+        Build the lookup function as a closure over plain lists
+        Everything the lookup needs is a local, and each interval is stored as intercept + slope * pos so an
+        evaluation is a single multiply-add. Lists hand back existing float objects, arrays would box a new one
+        """
+        size = self.size
+        deadZone = self.deadZone
+        scale = self.scale
+        top = self.table[size]
+        slopes = [self.table[i + 1] - self.table[i] for i in range(size)]
+        slopes.append(0.0)
+        intercepts = [self.table[i] - (slopes[i] * i) for i in range(size + 1)]
+
+        def lookup(val):
+            if val < 0.0:
+                if val <= -1.0:
+                    return -top
+                pos = (-val - deadZone) * scale
+                if pos <= 0.0:
+                    return 0.0
+                i = int(pos)
+                return -(intercepts[i] + slopes[i] * pos)
+
+            if val >= 1.0:
+                return top
+            pos = (val - deadZone) * scale
+            if pos <= 0.0:
+                return 0.0
+            i = int(pos)
+            return intercepts[i] + slopes[i] * pos
+
+        return lookup
+
+
+class CachedCurve:
+    """
+    Holds the CurveTable for one input axis and only rebuilds it when the dead zone or curve parameters change
+
+    Call update() whenever the config may have changed (robotInit, a command's initialize), and lookup() every tick
+
+    Example:
+        throttleCurve = CachedCurve(filterInputToPower)
+        throttleCurve.update(robotmap.oi.leftDriverStickNullZone, robotmap.oi.throttleFilterPower)
+        throttle = throttleCurve.lookup(rawThrottle)
+    """
+
+    def __init__(self, func, size=512):
+        self.func = func
+        self.size = size
+        self.key = None
+        self.table = None
+        self.lookup = None
+        self.builds = 0
+
+    def update(self, deadZone, *params):
+        """
+        :return: True if the table was rebuilt
+        """
+        key = (deadZone, params)
+        if key == self.key:
+            return False
+
+        self.table = CurveTable(self.func, deadZone, params, self.size)
+        self.lookup = self.table.lookup
+        self.key = key
+        self.builds += 1
+        return True
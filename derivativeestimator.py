@@ -0,0 +1,175 @@
+'''
+Velocity and acceleration estimates from timestamped position samples
+
+Each estimate is a least squares fit of a quadratic to the last window samples, evaluated at the newest one.
+For evenly spaced samples this is the Savitzky-Golay derivative filter, but the sample times are used as
+measured, so notifier jitter doesn't turn into noise the way a finite difference between two counts does
+
+DerivativeEstimator updates in constant time per sample: it keeps running sums of the fit terms, adding the new
+sample and removing the one that leaves the window. The sums are taken relative to a recent reference sample,
+and rebuilt against a new reference once every window samples, so they never grow large enough to lose
+precision. estimateBatch does the same fit over a whole log with numpy
+'''
+
+from array import array
+
+
+def _solve(n, s1, s2, s3, s4, r0, r1, r2, xn):
+    """
+    Fit y = a + b*x + c*x^2 from the sums of x^k (s) and x^k*y (r) over n samples
+    :return: (slope at xn, second derivative)
+    """
+    if n >= 3:
+        # Cramer's rule on the normal equations
+        m00 = s2 * s4 - s3 * s3
+        m01 = s1 * s4 - s3 * s2
+        m02 = s1 * s3 - s2 * s2
+        det = n * m00 - s1 * m01 + s2 * m02
+        if abs(det) > 1e-9 * n * s2 * s4:
+            b = (n * (r1 * s4 - s3 * r2) - r0 * (s1 * s4 - s3 * s2) + s2 * (s1 * r2 - r1 * s2)) / det
+            c = (n * (s2 * r2 - r1 * s3) - s1 * (s1 * r2 - r1 * s2) + r0 * (s1 * s3 - s2 * s2)) / det
+            return b + 2.0 * c * xn, 2.0 * c
+
+    if n >= 2:
+        denominator = n * s2 - s1 * s1
+        if denominator > 0.0:
+            return (n * r1 - s1 * r0) / denominator, 0.0
+
+    return 0.0, 0.0
+
+
+class DerivativeEstimator:
+    """
+    Sliding window velocity and acceleration of one position signal, read from .velocity and .acceleration
+    """
+    __slots__ = ('window', 'scale', 'times', 'values', 'index', 'count', 'sinceRebase', 't0', 'y0',
+                 's1', 's2', 's3', 's4', 'r0', 'r1', 'r2', 'velocity', 'acceleration')
+
+    def __init__(self, window=15, scale=1.0):
+        """
+        :param window: samples in each fit, at least 3
+        :param scale: multiplies the estimates, for example inches per encoder tick to get inches / sec
+        """
+        if window < 3:
+            raise ValueError('The estimator window needs at least 3 samples')
+        self.window = window
+        self.scale = scale
+        self.times = array('d', bytes(8 * window))
+        self.values = array('d', bytes(8 * window))
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+        self.sinceRebase = 0
+        self.t0 = 0.0
+        self.y0 = 0.0
+        self.s1 = self.s2 = self.s3 = self.s4 = 0.0
+        self.r0 = self.r1 = self.r2 = 0.0
+        self.velocity = 0.0
+        self.acceleration = 0.0
+
+    def _accumulate(self, t, y, sign):
+        x = t - self.t0
+        d = y - self.y0
+        x2 = x * x
+        self.s1 += sign * x
+        self.s2 += sign * x2
+        self.s3 += sign * x2 * x
+        self.s4 += sign * x2 * x2
+        self.r0 += sign * d
+        self.r1 += sign * x * d
+        self.r2 += sign * x2 * d
+
+    def _rebase(self, t, y):
+        self.t0 = t
+        self.y0 = y
+        self.s1 = self.s2 = self.s3 = self.s4 = 0.0
+        self.r0 = self.r1 = self.r2 = 0.0
+        for k in range(self.count):
+            self._accumulate(self.times[k], self.values[k], 1.0)
+        self.sinceRebase = 0
+
+    def add(self, t, y):
+        """
+        Add the newest sample and update the estimates
+        """
+        index = self.index
+        if self.count == self.window:
+            self._accumulate(self.times[index], self.values[index], -1.0)
+        else:
+            if self.count == 0:
+                self.t0 = t
+                self.y0 = y
+            self.count += 1
+
+        self.times[index] = t
+        self.values[index] = y
+        self._accumulate(t, y, 1.0)
+        self.index = index + 1 if index + 1 < self.window else 0
+
+        self.sinceRebase += 1
+        if self.sinceRebase >= self.window:
+            self._rebase(t, y)
+
+        slope, curve = _solve(self.count, self.s1, self.s2, self.s3, self.s4, self.r0, self.r1, self.r2,
+                              t - self.t0)
+        self.velocity = slope * self.scale
+        self.acceleration = curve * self.scale
+
+
+def estimateBatch(times, values, window=15, scale=1.0):
+    """
+    Velocity and acceleration at every sample of a log, the same fit as DerivativeEstimator
+
+    :param times: sample times, seconds
+    :param values: positions
+    :return: (velocity, acceleration) numpy arrays
+    """
+    import numpy as np
+
+    t = np.asarray(times, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    count = len(t)
+    velocity = np.zeros(count)
+    acceleration = np.zeros(count)
+
+    # the first samples don't fill a window yet, run them through the incremental estimator
+    estimator = DerivativeEstimator(window, scale)
+    for k in range(min(window - 1, count)):
+        estimator.add(t[k], y[k])
+        velocity[k] = estimator.velocity
+        acceleration[k] = estimator.acceleration
+    if count < window:
+        return velocity, acceleration
+
+    newest = np.arange(window - 1, count)
+    columns = newest[:, None] - np.arange(window)[None, :]
+    x = t[columns] - t[newest][:, None]
+    d = y[columns] - y[newest][:, None]
+    x2 = x * x
+
+    n = float(window)
+    s1 = x.sum(axis=1)
+    s2 = x2.sum(axis=1)
+    s3 = (x2 * x).sum(axis=1)
+    s4 = (x2 * x2).sum(axis=1)
+    r0 = d.sum(axis=1)
+    r1 = (x * d).sum(axis=1)
+    r2 = (x2 * d).sum(axis=1)
+
+    m00 = s2 * s4 - s3 * s3
+    m01 = s1 * s4 - s3 * s2
+    m02 = s1 * s3 - s2 * s2
+    det = n * m00 - s1 * m01 + s2 * m02
+    quadratic = np.abs(det) > 1e-9 * n * s2 * s4
+    safeDet = np.where(quadratic, det, 1.0)
+    b = (n * (r1 * s4 - s3 * r2) - r0 * (s1 * s4 - s3 * s2) + s2 * (s1 * r2 - r1 * s2)) / safeDet
+    c = (n * (s2 * r2 - r1 * s3) - s1 * (s1 * r2 - r1 * s2) + r0 * (s1 * s3 - s2 * s2)) / safeDet
+
+    # x is 0 at the newest sample, so the slope there is just b
+    denominator = n * s2 - s1 * s1
+    linear = np.where(denominator > 0.0, (n * r1 - s1 * r0) / np.where(denominator > 0.0, denominator, 1.0), 0.0)
+    velocity[window - 1:] = np.where(quadratic, b, linear) * scale
+    acceleration[window - 1:] = np.where(quadratic, 2.0 * c, 0.0) * scale
+    return velocity, acceleration
@@ -0,0 +1,124 @@
+'''
+Drive mode registry for the teleop drive command
+
+Each mode is a factory, registered by name, that reads its tunables from robotmap and returns a mixer:
+    mix(throttle, turn, rightThrottle, slow) -> (leftSpeed, rightSpeed)
+taking the shaped and slow scaled throttle and turn (-1.0 to +1.0), the raw right stick and the slow button.
+Only tank mode uses the right stick, so it shapes it itself and the other modes don't pay for the lookup.
+The active mode is resolved into the module's mixer once, when it is selected, so the command just calls
+drivemodes.mixer every tick with no mode checks. setMode() swaps the mixer at runtime and the running command
+picks it up on its next tick
+
+Like nfsmixer, the mixers don't touch wpilib, so modes can be benchmarked and swept offline. The modes are the
+allowed values of robotmap.driveLine.controlStyle, an unknown style fails when this module loads
+'''
+
+import math
+
+import robotmap
+from nfsmixer import nfsMix
+
+
+modes = {}
+
+
+def register(name):
+    """
+    Decorator that adds a mixer factory to the registry under the given name
+    """
+    def decorator(factory):
+        modes[name] = factory
+        return factory
+    return decorator
+
+
+def _normalize(left, right):
+    biggest = max(math.fabs(left), math.fabs(right))
+    if biggest > 1.0:
+        return left / biggest, right / biggest
+    return left, right
+
+
+@register('nfs')
+def nfsMode():
+    """
+    Need for Speed driving, see nfsmixer.nfsMix. The slow button switches to the heavier turn scaling
+    """
+    lowTurnScale = robotmap.nfs.lowTurnScale
+    highTurnScale = robotmap.nfs.highTurnScale
+
+    def mix(throttle, turn, rightThrottle, slow):
+        return nfsMix(throttle, turn, highTurnScale if slow else lowTurnScale)
+    return mix
+
+
+@register('arcade')
+def arcadeMode():
+    """
+    Throttle plus and minus turn, scaled back together if either side goes past full speed
+    """
+    def mix(throttle, turn, rightThrottle, slow):
+        return _normalize(throttle + turn, throttle - turn)
+    return mix
+
+
+@register('curvature')
+def curvatureMode():
+    """
+    Turn sets the curvature of the path rather than the turn rate, so the robot turns less the slower it goes.
+    Below driveLine.quickTurnThreshold throttle the turn stick spins the robot in place instead
+    """
+    quickTurnThreshold = robotmap.driveLine.quickTurnThreshold
+
+    def mix(throttle, turn, rightThrottle, slow):
+        if math.fabs(throttle) < quickTurnThreshold:
+            angular = turn
+        else:
+            angular = math.fabs(throttle) * turn
+        return _normalize(throttle + angular, throttle - angular)
+    return mix
+
+
+@register('tank')
+def tankMode():
+    """
+    Classic tank, each stick drives its own side. The right stick gets the same shaping and slow scaling as the
+    throttle
+    """
+    import oi
+    oi.updateCurves()
+    lookup = oi.throttleCurve.lookup
+    slowDriveSpeedFactor = robotmap.nfs.slowDriveSpeedFactor
+
+    def mix(throttle, turn, rightThrottle, slow):
+        if slow:
+            return throttle, lookup(rightThrottle) * slowDriveSpeedFactor
+        return throttle, lookup(rightThrottle)
+    return mix
+
+
+mode = None
+mixer = None
+
+
+def setMode(name):
+    """
+    Make the named mode active, binding its tunables from robotmap as they are now
+    """
+    global mode
+    global mixer
+    factory = modes.get(name)
+    if factory is None:
+        raise ValueError("Drive mode {} is not one of {}".format(name, ', '.join(sorted(modes))))
+    mixer = factory()
+    mode = name
+
+
+def refresh():
+    """
+    Rebind the active mode, picking up any robotmap changes since it was selected
+    """
+    setMode(mode)
+
+
+setMode(robotmap.driveLine.controlStyle)
@@ -0,0 +1,154 @@
+'''
+Garbage collection control for match time
+
+A generational collection can pause the interpreter for several milliseconds, which shows up as a stutter in the
+drive output. In the 'managed' mode:
+    after robotInit - everything alive is collected once and frozen (gc.freeze, Python 3.7+), so the long lived
+                      robot objects are never scanned again
+    auto / teleop   - automatic collection is turned off. Young objects are collected (bounded to
+                      robotmap.gc.matchGeneration) at the end of a loop that left enough spare time
+    disabled        - automatic collection is turned back on, and one full collection is run
+
+Every collection, automatic or not, is timed into the 'GC.pause' looptiming buffer, where a pause longer than
+spareTime counts as an overrun. The interpreter's allocated block count is sampled against the count after
+robotInit, to check the heap stays bounded over an event
+'''
+
+import gc
+import sys
+from time import perf_counter_ns
+
+import robotmap
+import looptiming
+import telemetry
+
+
+class GCManager:
+
+    def __init__(self, mode='managed', spareTime=0.005, youngThreshold=700, matchGeneration=1):
+        """
+        :param mode: 'managed' to control collection during matches, 'auto' to leave Python's collector alone
+        :param spareTime: seconds left in the loop needed before collecting during a match
+        :param youngThreshold: allocations pending in generation 0 before a match time collection is worth it
+        :param matchGeneration: oldest generation collected during a match
+        """
+        self.managed = mode == 'managed'
+        self.spareNs = int(spareTime * 1e9)
+        self.youngThreshold = youngThreshold
+        self.matchGeneration = matchGeneration
+
+        self.pauses = looptiming.TimingBuffer('GC.pause', robotmap.timing.bufferSize, self.spareNs)
+        self.collections = [0, 0, 0]
+        self.inMatch = False
+        self.fullCollectPending = False
+        self.startNs = 0
+
+        self.baseBlocks = sys.getallocatedblocks()
+        self.lastBlocks = self.baseBlocks
+        self.peakBlocks = self.baseBlocks
+
+    def install(self):
+        gc.callbacks.append(self.onCollect)
+
+    def uninstall(self):
+        if self.onCollect in gc.callbacks:
+            gc.callbacks.remove(self.onCollect)
+        gc.enable()
+
+    def onCollect(self, phase, info):
+        if phase == 'start':
+            self.startNs = perf_counter_ns()
+        elif self.startNs:
+            self.pauses.record(perf_counter_ns() - self.startNs)
+            self.collections[info['generation']] += 1
+            self.startNs = 0
+
+    def freeze(self):
+        """
+        Collect and freeze everything alive now, called once robotInit has built the robot
+        """
+        if not self.managed:
+            return
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        self.baseBlocks = sys.getallocatedblocks()
+        self.peakBlocks = self.baseBlocks
+
+    def enterMatch(self):
+        if self.managed:
+            gc.disable()
+            self.inMatch = True
+
+    def exitMatch(self):
+        if self.inMatch:
+            gc.enable()
+            self.inMatch = False
+            self.fullCollectPending = True
+
+    def collectSpare(self, loopNs, periodNs):
+        """
+        Called at the end of a match loop. Runs a young generation collection if enough objects are waiting and
+        the loop left at least spareTime before the next one
+        :return: True if a collection ran
+        """
+        if not self.inMatch or periodNs - loopNs < self.spareNs:
+            return False
+        if gc.get_count()[0] < self.youngThreshold:
+            return False
+        gc.collect(self.matchGeneration)
+        return True
+
+    def disabledPeriodic(self):
+        """
+        Run the full collection put off during the match
+        """
+        if self.fullCollectPending:
+            self.fullCollectPending = False
+            gc.collect()
+
+    def sampleHeap(self):
+        """
+        :return: allocated blocks now, less the count after robotInit
+        """
+        self.lastBlocks = sys.getallocatedblocks()
+        if self.lastBlocks > self.peakBlocks:
+            self.peakBlocks = self.lastBlocks
+        return self.lastBlocks - self.baseBlocks
+
+    def getStats(self):
+        """
+        :return: dict of collections per generation, pause p99 and max (ms), and heap growth in blocks
+        """
+        return {
+            'collections': list(self.collections),
+            'pauseP99': self.pauses.percentile(99) / 1e6,
+            'pauseMax': self.pauses.maxNs / 1e6,
+            'heapGrowth': self.lastBlocks - self.baseBlocks,
+            'heapPeakGrowth': self.peakBlocks - self.baseBlocks,
+        }
+
+    def publish(self):
+        self.sampleHeap()
+        stats = self.getStats()
+        for generation, count in enumerate(stats['collections']):
+            telemetry.put("GC/gen{}".format(generation), count)
+        telemetry.put("GC/pauseMax", stats['pauseMax'])
+        telemetry.put("GC/heapGrowth", stats['heapGrowth'])
+        telemetry.put("GC/heapPeakGrowth", stats['heapPeakGrowth'])
+
+
+manager = None
+
+
+def init():
+    """
+    Start timing collections. Replaces the manager from an earlier init, the simulator builds a robot per test
+    """
+    global manager
+    if manager is not None:
+        manager.uninstall()
+    manager = GCManager(robotmap.gc.mode, robotmap.gc.spareTime, robotmap.gc.youngThreshold,
+                        robotmap.gc.matchGeneration)
+    manager.install()
+    looptiming.timers[manager.pauses.name] = manager.pauses
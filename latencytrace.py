@@ -0,0 +1,133 @@
+'''
+Input to motor latency tracing for the teleop drive path
+
+When robotmap.latency.enabled is set, each driver station packet is timestamped as the DriverStation thread
+copies it in, and the drive path marks the time as the packet's values move through it:
+    read    - oi.frame.update() has read the sticks (getRawThrottle / getRawTurn)
+    filter  - the drive command has shaped them with the oi curves
+    mix     - the drive mode mixer has worked out the target speeds
+    slew    - the rate limiter has worked out the outputs
+    output  - TankDrive.driveRaw has set the speed controllers
+
+At output the time spent in each stage (since the stage before it, the first stage counting from the packet) and
+the packet to output total are recorded into looptiming TimingBuffers named Latency.<stage>, so they are
+published and dumped with the other timers and their stats give the distribution of each stage
+
+When tracing is off, latencytrace.tracer is None, the DriverStation is left alone (or put back, when tracing is
+switched off between enables) and each trace point is a single None check
+'''
+
+from array import array
+from time import perf_counter_ns
+
+import wpilib
+
+import robotmap
+import looptiming
+
+
+PACKET = 0
+READ = 1
+FILTER = 2
+MIX = 3
+SLEW = 4
+OUTPUT = 5
+STAGES = ('packet', 'read', 'filter', 'mix', 'slew', 'output')
+
+
+class LatencyTracer:
+    """
+    Stage timestamps for the tick in flight, and a TimingBuffer per stage plus one for the total
+    """
+
+    def __init__(self, size):
+        self.marks = array('q', bytes(8 * len(STAGES)))
+        self.packetNs = 0
+        self.buffers = [looptiming.TimingBuffer('Latency.' + name, size) for name in STAGES[1:]]
+        self.total = looptiming.TimingBuffer('Latency.total', size)
+        self.ticks = 0
+        self.driverStation = None
+        self.getData = None
+
+    def install(self, driverStation):
+        """
+        Timestamp each packet as the DriverStation thread copies it in. There's no public hook that runs as a
+        packet arrives, so the DriverStation instance's _getData is shadowed until uninstall
+        """
+        getData = driverStation._getData
+
+        def timedGetData():
+            # stamped as the packet is picked up, so the copy counts towards its latency
+            self.packetNs = perf_counter_ns()
+            getData()
+
+        self.driverStation = driverStation
+        self.getData = timedGetData
+        driverStation._getData = timedGetData
+
+    def uninstall(self):
+        """
+        Put the DriverStation back to its own _getData, if nothing else has replaced ours since
+        """
+        driverStation = self.driverStation
+        if driverStation is not None:
+            if vars(driverStation).get('_getData') is self.getData:
+                del driverStation._getData
+            self.driverStation = None
+            self.getData = None
+
+    def markRead(self):
+        """
+        The sticks have been read. Takes the time of the packet they came from, so a packet arriving later in the
+        tick isn't mixed in
+        """
+        marks = self.marks
+        marks[PACKET] = self.packetNs
+        marks[READ] = perf_counter_ns()
+
+    def mark(self, stage):
+        self.marks[stage] = perf_counter_ns()
+
+    def markOutput(self):
+        """
+        The outputs are set, record the tick's stage times
+        """
+        marks = self.marks
+        marks[OUTPUT] = perf_counter_ns()
+        buffers = self.buffers
+        first = READ if marks[PACKET] == 0 else PACKET
+        for stage in range(first + 1, OUTPUT + 1):
+            buffers[stage - 1].record(marks[stage] - marks[stage - 1])
+        if first == PACKET:
+            self.total.record(marks[OUTPUT] - marks[PACKET])
+        self.ticks += 1
+
+    def getStats(self):
+        """
+        :return: dict of stage name (and 'total') to the TimingBuffer stats, in milliseconds
+        """
+        stats = {buffer.name[len('Latency.'):]: buffer.getStats() for buffer in self.buffers}
+        stats['total'] = self.total.getStats()
+        return stats
+
+
+tracer = None
+
+
+def init():
+    """
+    Start tracing if robotmap.latency asks for it, or stop it and restore the DriverStation if it no longer does.
+    Called on each enable, a running tracer is kept so its stats cover every enable
+    """
+    global tracer
+    if robotmap.latency.enabled:
+        if tracer is None:
+            tracer = LatencyTracer(robotmap.latency.bufferSize)
+            tracer.install(wpilib.DriverStation.getInstance())
+            for buffer in tracer.buffers + [tracer.total]:
+                looptiming.timers[buffer.name] = buffer
+    elif tracer is not None:
+        tracer.uninstall()
+        for buffer in tracer.buffers + [tracer.total]:
+            looptiming.timers.pop(buffer.name, None)
+        tracer = None
@@ -0,0 +1,109 @@
+'''
+Loop budget manager - sheds deferrable work when the robot loop runs long
+
+Motor output latency comes first. MyRobot hands the budget every loop's duration, and each loop over the shed
+threshold sheds one more category of deferrable work, in robotmap.budget.shedOrder (debug dashboard writes
+first, then diagnostics, then match logging). Once the loop has stayed under the recover threshold for
+recoverLoops loops in a row, the most recently shed category is brought back, one at a time
+
+Code doing deferrable work asks first:
+    if loopbudget.budget.allows('debug'):
+        ...
+A category the profile's shedOrder leaves out is never shed, so its work always runs
+
+Every shed and restore is counted and kept (with its FPGA timestamp) in a short event log
+'''
+
+from collections import deque
+
+from wpilib import Timer
+
+import robotmap
+import telemetry
+
+
+class LoopBudget:
+
+    def __init__(self, shedOrder, shedThreshold, recoverThreshold, recoverLoops, enabled=True, eventLogSize=64):
+        """
+        :param shedOrder: deferrable categories, shed first to last
+        :param shedThreshold: seconds, a loop longer than this sheds the next category
+        :param recoverThreshold: seconds, loops shorter than this count towards recovery
+        :param recoverLoops: recovering loops in a row needed to bring one category back
+        """
+        self.shedOrder = tuple(shedOrder)
+        self.shedNs = int(shedThreshold * 1e9)
+        self.recoverNs = int(recoverThreshold * 1e9)
+        self.recoverLoops = recoverLoops
+        self.enabled = enabled
+
+        self.allowed = {category: True for category in self.shedOrder}
+        self.shedCounts = {category: 0 for category in self.shedOrder}
+        self.skipped = {category: 0 for category in self.shedOrder}
+        self.events = deque(maxlen=eventLogSize)
+        self.level = 0
+        self.goodLoops = 0
+
+    def allows(self, category):
+        """
+        :return: True if the category's work should run this loop, always True for a category not in shedOrder.
+                 Work that is refused is counted as skipped
+        """
+        if self.allowed.get(category, True):
+            return True
+        self.skipped[category] += 1
+        return False
+
+    def update(self, durationNs):
+        """
+        Called once per loop with how long the loop took
+        """
+        if not self.enabled:
+            return
+
+        if durationNs > self.shedNs:
+            self.goodLoops = 0
+            if self.level < len(self.shedOrder):
+                category = self.shedOrder[self.level]
+                self.level += 1
+                self.allowed[category] = False
+                self.shedCounts[category] += 1
+                self.events.append((Timer.getFPGATimestamp(), category, 'shed', durationNs / 1e6))
+        elif durationNs < self.recoverNs:
+            if self.level:
+                self.goodLoops += 1
+                if self.goodLoops >= self.recoverLoops:
+                    self.goodLoops = 0
+                    self.level -= 1
+                    category = self.shedOrder[self.level]
+                    self.allowed[category] = True
+                    self.events.append((Timer.getFPGATimestamp(), category, 'restored', durationNs / 1e6))
+        else:
+            self.goodLoops = 0
+
+    def reset(self):
+        """
+        Bring every category back, the counters and event log are kept
+        """
+        for category in self.shedOrder:
+            self.allowed[category] = True
+        self.level = 0
+        self.goodLoops = 0
+
+    def getStats(self):
+        """
+        :return: dict of category to times shed, work skipped and whether it is shed now
+        """
+        return {category: {'shed': self.shedCounts[category], 'skipped': self.skipped[category],
+                            'shedNow': not self.allowed[category]}
+                for category in self.shedOrder}
+
+    def publish(self):
+        telemetry.put("Budget/level", self.level)
+        for category, stats in self.getStats().items():
+            telemetry.put("Budget/{}/shed".format(category), stats['shed'])
+            telemetry.put("Budget/{}/skipped".format(category), stats['skipped'])
+
+
+budget = LoopBudget(robotmap.budget.shedOrder, robotmap.budget.shedThreshold, robotmap.budget.recoverThreshold,
+                    robotmap.budget.recoverLoops, robotmap.budget.enabled)
@@ -0,0 +1,198 @@
+'''
+Low overhead loop and command timing
+
+Durations are measured with perf_counter_ns and stored in fixed size ring buffers, so recording a sample is a
+couple of integer operations and never allocates. Percentiles are only worked out when the stats are read
+(telemetry publish, or a dump after the match)
+
+Usage:
+    looptiming.loop.start() / looptiming.loop.stop() around each robot loop
+    @looptiming.timed('MyCommand.execute') on a command's execute method
+'''
+
+import functools
+from array import array
+from time import perf_counter_ns
+
+import robotmap
+import telemetry
+
+
+class TimingBuffer:
+    """
+    Fixed size ring buffer of durations in nanoseconds, with running max and overrun counts
+    """
+    __slots__ = ('name', 'size', 'samples', 'index', 'count', 'maxNs', 'overrunNs', 'overruns')
+
+    def __init__(self, name, size, overrunNs=None):
+        self.name = name
+        self.size = size
+        self.samples = array('q', bytes(8 * size))
+        self.overrunNs = overrunNs
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.count = 0
+        self.maxNs = 0
+        self.overruns = 0
+
+    def record(self, ns):
+        self.samples[self.index] = ns
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        self.count += 1
+        if ns > self.maxNs:
+            self.maxNs = ns
+        if self.overrunNs is not None and ns > self.overrunNs:
+            self.overruns += 1
+
+    def getSamples(self):
+        """
+        :return: the buffered samples, oldest first
+        """
+        if self.count < self.size:
+            return self.samples[:self.count].tolist()
+        return self.samples[self.index:].tolist() + self.samples[:self.index].tolist()
+
+    def percentile(self, pct, ordered=None):
+        """
+        Nearest rank percentile of the buffered samples in nanoseconds, 0 if there are none
+        """
+        if ordered is None:
+            ordered = sorted(self.getSamples())
+        if not ordered:
+            return 0
+        rank = int(round((pct / 100.0) * (len(ordered) - 1)))
+        return ordered[rank]
+
+    def getStats(self):
+        """
+        :return: dict of count, p50, p99 and max (all time) in milliseconds, and the overrun count
+        """
+        ordered = sorted(self.getSamples())
+        return {
+            'count': self.count,
+            'p50': self.percentile(50, ordered) / 1e6,
+            'p99': self.percentile(99, ordered) / 1e6,
+            'max': self.maxNs / 1e6,
+            'overruns': self.overruns,
+        }
+
+
+class LoopTimer:
+    """
+    Times each robot loop, and the period between the start of consecutive loops
+    A period further than the jitter tolerance from the expected loop period is counted as jitter
+    """
+
+    def __init__(self, size, period, overrunThreshold, jitterTolerance):
+        self.periodNs = int(period * 1e9)
+        self.jitterNs = int(jitterTolerance * 1e9)
+        self.durations = TimingBuffer('loop', size, int(overrunThreshold * 1e9))
+        self.periods = TimingBuffer('period', size)
+        self.jitter = 0
+        self.lastStart = 0
+
+    def reset(self):
+        self.durations.reset()
+        self.periods.reset()
+        self.jitter = 0
+        self.lastStart = 0
+
+    def restart(self):
+        """
+        Forget the last loop start, so a gap between modes isn't counted as a long period
+        """
+        self.lastStart = 0
+
+    def start(self):
+        now = perf_counter_ns()
+        if self.lastStart:
+            period = now - self.lastStart
+            self.periods.record(period)
+            if abs(period - self.periodNs) > self.jitterNs:
+                self.jitter += 1
+        self.lastStart = now
+
+    def stop(self):
+        """
+        :return: the loop duration in nanoseconds
+        """
+        duration = perf_counter_ns() - self.lastStart
+        self.durations.record(duration)
+        return duration
+
+
+loop = LoopTimer(robotmap.timing.bufferSize, robotmap.rates.basePeriod,
+                 robotmap.timing.overrunThreshold, robotmap.timing.jitterTolerance)
+timers = {}
+
+
+def getTimer(name):
+    timer = timers.get(name)
+    if timer is None:
+        timer = TimingBuffer(name, robotmap.timing.bufferSize, int(robotmap.timing.overrunThreshold * 1e9))
+        timers[name] = timer
+    return timer
+
+
+def timed(name):
+    """
+    Decorator that records the duration of every call into the named timer
+    When timing is disabled in robotmap the function is returned untouched, so it costs nothing
+    """
+    def decorator(func):
+        if not robotmap.timing.enabled:
+            return func
+
+        record = getTimer(name).record
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def getAllStats():
+    """
+    :return: dict of timer name to stats, including the loop duration and period
+    """
+    stats = {'loop': loop.durations.getStats(), 'period': loop.periods.getStats()}
+    stats['period']['jitter'] = loop.jitter
+    for name, timer in timers.items():
+        stats[name] = timer.getStats()
+    return stats
+
+
+def publish():
+    """
+    Hand the current stats to the telemetry publisher under Timing/
+    """
+    for name, stats in getAllStats().items():
+        for key, value in stats.items():
+            telemetry.put("Timing/{}/{}".format(name, key), value)
+
+
+def dump(path):
+    """
+    Write the stats and every buffered sample (in ms) to a CSV file
+    """
+    buffers = [loop.durations, loop.periods] + list(timers.values())
+    with open(path, 'w') as f:
+        f.write("timer,count,p50,p99,max,overruns\n")
+        for name, stats in getAllStats().items():
+            f.write("{},{count},{p50:.4f},{p99:.4f},{max:.4f},{overruns}\n".format(name, **stats))
+        f.write("jitter,{}\n".format(loop.jitter))
+
+        f.write("\ntimer,samples\n")
+        for buffer in buffers:
+            f.write("{},{}\n".format(buffer.name, ",".join("{:.4f}".format(ns / 1e6) for ns in buffer.getSamples())))
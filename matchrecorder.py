@@ -0,0 +1,159 @@
+'''
+Compact binary recorder for driver inputs and drivetrain outputs
+
+Each tick of the NFS drive command is written as one fixed size record into a memory mapped ring file that is
+created (and pre-faulted) when the recorder is opened. Recording a tick is a single struct.pack_into into the map
+plus an update of the record count in the header - no allocation of buffers, no text formatting, no file system
+calls, so it never blocks the control loop. The OS writes the pages back to disk in the background
+
+File layout (little endian):
+    header  - magic, version, record size, capacity, total records written, padded to HEADER_SIZE bytes
+    records - capacity fixed size records, written as a ring once the file is full
+
+Opening a recorder never overwrites an earlier log: the previous file is kept as <path>.1 (and older ones shifted
+up to <path>.<keep>), so a brownout or code restart mid-event doesn't wipe the match that just happened
+
+Use loadArrays() off the robot to get the log back as NumPy arrays. It also reads version 1 logs, from before the
+right stick (rawRightThrottle) was recorded
+'''
+
+import mmap
+import os
+import struct
+
+import robotmap
+
+
+MAGIC = b'NFSL'
+VERSION = 2
+HEADER = struct.Struct('<4sHHIQ')
+HEADER_SIZE = 32
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 12
+
+# timestamp, rawThrottle, rawTurn, rawRightThrottle, throttle, turn, targetLeft, targetRight, adjustedLeft,
+# adjustedRight, leftEncoder, rightEncoder, driveSlow
+RECORD = struct.Struct('<d9fii?3x')
+FIELDS = (
+    ('timestamp', '<f8'),
+    ('rawThrottle', '<f4'),
+    ('rawTurn', '<f4'),
+    ('rawRightThrottle', '<f4'),    # right stick, only used by tank drive
+    ('throttle', '<f4'),            # filtered, and slow scaled, values fed to the mixer
+    ('turn', '<f4'),
+    ('targetLeft', '<f4'),
+    ('targetRight', '<f4'),
+    ('adjustedLeft', '<f4'),        # after the rate limiter, as sent to driveRaw
+    ('adjustedRight', '<f4'),
+    ('leftEncoder', '<i4'),
+    ('rightEncoder', '<i4'),
+    ('driveSlow', '?'),
+)
+# fields of each version loadArrays() reads
+VERSION_FIELDS = {
+    1: tuple(field for field in FIELDS if field[0] != 'rawRightThrottle'),
+    2: FIELDS,
+}
+
+PAGE_SIZE = mmap.PAGESIZE
+
+
+def rotate(path, keep):
+    """
+    Move an existing log out of the way: path -> path.1, path.1 -> path.2, ... dropping anything past path.<keep>
+    """
+    if not os.path.exists(path):
+        return
+    if keep < 1:
+        os.remove(path)
+        return
+    for n in range(keep - 1, 0, -1):
+        older = "{}.{}".format(path, n)
+        if os.path.exists(older):
+            os.replace(older, "{}.{}".format(path, n + 1))
+    os.replace(path, path + '.1')
+
+
+class MatchRecorder:
+
+    def __init__(self, path, capacity, keep=5):
+        """
+        :param keep: earlier logs kept, see rotate()
+        """
+        self.path = path
+        self.capacity = capacity
+        self.count = 0
+
+        rotate(path, keep)
+
+        size = HEADER_SIZE + capacity * RECORD.size
+        with open(path, 'wb') as f:
+            f.write(bytes(size))
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+        # touch every page now, so the first write to each page during a match doesn't fault
+        for offset in range(0, size, PAGE_SIZE):
+            self.map[offset] = 0
+
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, RECORD.size, capacity, 0)
+
+    def record(self, timestamp, rawThrottle, rawTurn, driveSlow, throttle, turn, targetLeft, targetRight,
+               adjustedLeft, adjustedRight, leftEncoder, rightEncoder, rawRightThrottle=0.0):
+        RECORD.pack_into(self.map, HEADER_SIZE + (self.count % self.capacity) * RECORD.size,
+                         timestamp, rawThrottle, rawTurn, rawRightThrottle, throttle, turn, targetLeft, targetRight,
+                         adjustedLeft, adjustedRight, leftEncoder, rightEncoder, driveSlow)
+        self.count += 1
+        COUNT.pack_into(self.map, COUNT_OFFSET, self.count)
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+
+recorder = None
+
+
+def init():
+    """
+    Open the match log from robotmap.recorder. A failure to open it is reported and recording is skipped,
+    it should never stop the robot from running
+    """
+    global recorder
+
+    if not robotmap.recorder.enabled or recorder is not None:
+        return
+
+    try:
+        recorder = MatchRecorder(robotmap.recorder.path, robotmap.recorder.capacity, robotmap.recorder.keep)
+    except Exception as e:
+        print("MatchRecorder: unable to open {}. {}".format(robotmap.recorder.path, e))
+
+
+def loadArrays(path):
+    """
+    Read a match log into NumPy arrays, oldest record first
+
+    :return: dict of field name to array, see FIELDS. A version 1 log has no rawRightThrottle
+    """
+    import numpy as np
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, recordSize, capacity, count = HEADER.unpack_from(data, 0)
+    fields = VERSION_FIELDS.get(version) if magic == MAGIC else None
+    dtype = np.dtype(list(fields) + [('pad', 'V3')]) if fields is not None else None
+    if dtype is None or recordSize != dtype.itemsize:
+        raise ValueError("{} is not a version {} match log".format(path, ' or '.join(map(str, VERSION_FIELDS))))
+
+    records = np.frombuffer(data, dtype=dtype, count=min(count, capacity), offset=HEADER_SIZE)
+    if count > capacity:
+        start = count % capacity
+        records = np.concatenate([records[start:], records[:start]])
+
+    return {name: records[name].copy() for name, _ in fields}
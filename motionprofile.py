@@ -0,0 +1,141 @@
+'''
+Trapezoidal and S-curve motion profiles for drive distance moves
+
+Profiles are precomputed into position / velocity / acceleration arrays at a fixed sample period, and cached by
+their parameters so an autonomous routine that drives the same move more than once (or builds its commands in
+robotInit) never plans it again inside the loop
+
+Units are whatever the caller uses consistently, the drive commands use inches and seconds
+'''
+
+import functools
+import math
+from array import array
+
+
+class MotionProfile:
+    """
+    Precomputed setpoints for one move. Profiles come from the cache and are shared, so treat them as read only
+    """
+
+    def __init__(self, distance, period, position, velocity, acceleration):
+        self.distance = distance
+        self.period = period
+        self.position = position
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.duration = (len(position) - 1) * period
+
+    def __len__(self):
+        return len(self.position)
+
+    def sample(self, t):
+        """
+        :return: (position, velocity, acceleration) at time t, linearly interpolated between samples.
+                 Times past the end of the profile return the final setpoint
+        """
+        if t <= 0.0:
+            return self.position[0], self.velocity[0], self.acceleration[0]
+
+        pos = t / self.period
+        i = int(pos)
+        if i >= len(self.position) - 1:
+            return self.position[-1], 0.0, 0.0
+
+        frac = pos - i
+        return (self.position[i] + (self.position[i + 1] - self.position[i]) * frac,
+                self.velocity[i] + (self.velocity[i + 1] - self.velocity[i]) * frac,
+                self.acceleration[i])
+
+
+def _trapezoidVelocity(distance, maxVelocity, maxAcceleration, period):
+    accelTime = maxVelocity / maxAcceleration
+    accelDistance = 0.5 * maxAcceleration * accelTime * accelTime
+    if 2 * accelDistance > distance:
+        # never reaches max velocity, triangle profile
+        accelTime = math.sqrt(distance / maxAcceleration)
+        peakVelocity = maxAcceleration * accelTime
+        cruiseTime = 0.0
+    else:
+        peakVelocity = maxVelocity
+        cruiseTime = (distance - 2 * accelDistance) / maxVelocity
+
+    totalTime = 2 * accelTime + cruiseTime
+    samples = int(math.ceil(totalTime / period)) + 1
+
+    velocity = []
+    for k in range(samples):
+        t = k * period
+        if t < accelTime:
+            velocity.append(maxAcceleration * t)
+        elif t < accelTime + cruiseTime:
+            velocity.append(peakVelocity)
+        elif t < totalTime:
+            velocity.append(maxAcceleration * (totalTime - t))
+        else:
+            velocity.append(0.0)
+    return velocity
+
+
+@functools.lru_cache(maxsize=32)
+def generateProfile(distance, maxVelocity, maxAcceleration, maxJerk=None, period=0.01):
+    """
+    Plan a move of the given distance from rest to rest
+
+    Without maxJerk the profile is trapezoidal. With maxJerk the trapezoid's velocity is smoothed with a moving
+    average at least as long as the time to reach maxAcceleration (maxAcceleration / maxJerk), which gives an
+    S-curve with the jerk limited and the distance unchanged
+
+    :param distance: signed distance to move
+    :param maxVelocity: cruise velocity limit (> 0)
+    :param maxAcceleration: acceleration limit (> 0)
+    :param maxJerk: jerk limit (> 0) or None for a trapezoid
+    :param period: time between setpoints
+    :return: MotionProfile, shared through the cache
+    """
+    if maxVelocity <= 0.0 or maxAcceleration <= 0.0 or (maxJerk is not None and maxJerk <= 0.0):
+        raise ValueError('Profile limits must be greater than zero')
+
+    sign = -1.0 if distance < 0.0 else 1.0
+    magnitude = abs(distance)
+    if magnitude == 0.0:
+        return MotionProfile(distance, period, array('d', [0.0]), array('d', [0.0]), array('d', [0.0]))
+
+    velocity = _trapezoidVelocity(magnitude, maxVelocity, maxAcceleration, period)
+
+    if maxJerk is not None:
+        # the window has to cover the biggest change in acceleration, which is 2 * maxAcceleration when there is
+        # little or no cruise between speeding up and slowing down
+        accel = [0.0] + [(velocity[k + 1] - velocity[k]) / period for k in range(len(velocity) - 1)] + [0.0]
+        window = max(1, int(math.ceil((maxAcceleration / maxJerk) / period - 1e-9)))
+        while any(abs(accel[k] - accel[k - window]) > maxJerk * window * period * (1 + 1e-9)
+                  for k in range(window, len(accel))):
+            window += 1
+
+        if window > 1:
+            padded = velocity + [0.0] * (window - 1)
+            smoothed = []
+            total = 0.0
+            for k, v in enumerate(padded):
+                total += v
+                if k >= window:
+                    total -= padded[k - window]
+                smoothed.append(total / window)
+            velocity = smoothed
+
+    position = [0.0]
+    for k in range(1, len(velocity)):
+        position.append(position[-1] + 0.5 * (velocity[k - 1] + velocity[k]) * period)
+
+    # remove the small error from sampling the corners of the velocity curve, so the move ends exactly on distance
+    correction = magnitude / position[-1]
+
+    acceleration = [(velocity[k + 1] - velocity[k]) / period for k in range(len(velocity) - 1)]
+    acceleration.append(0.0)
+
+    position = array('d', (p * correction * sign for p in position))
+    position[-1] = distance
+
+    return MotionProfile(distance, period, position,
+                         array('d', (v * correction * sign for v in velocity)),
+                         array('d', (a * correction * sign for a in acceleration)))
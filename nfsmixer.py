@@ -0,0 +1,155 @@
+"""
+The NFS track speed mixer used by TankDriveTeleopDefaultNFS, kept free of wpilib, oi and robotmap so it can be
+imported and swept offline without a robot
+"""
+
+import math
+
+
+def nfsMix(rawThrottleSpeed, rawTurnSpeed, turnScale):
+    """
+    Pure NFS mixer kernel - no hardware or config access, so it can be used outside of the command
+
+    Throttle will set the base forward or backward speed
+    turn will reduce the speed of the slower side
+
+    The amount reduced will be itself reduced based on the throttle
+    Example: for full throttle (1.0), and full turn (1.0)
+    a reasonably tight arc is found if the fast side is at +1 and the slow side is at +0.3
+    The ammount to reduce the turn by, is found by:
+        reduction range = 1 - (turnScale * throttle)
+
+    And the actual slow side speed found by
+        slowSide = throttle - (turn * range)
+
+    In the above example, if the scale is 0.3, the reduction range = 0.7  from    1 - (0.3 * 1.0)
+
+
+    Are there any situations in which the fast side would need to be increased?
+    Yes - if the throttle is lower than the turn, the turn reduction to the slow side will be out of kilter with the fast side
+    This will cause the robot to actually drive a bit in the opposite direction
+
+
+
+    :param rawThrottleSpeed: Throttle value after filtering joystick input -1.0 to +1.0
+    :param rawTurnSpeed: Turn value after filtering -1.0 to +1.0
+    :param turnScale: robotmap.nfs.highTurnScale while driving slow, robotmap.nfs.lowTurnScale otherwise
+    :return: (leftSpeed, rightSpeed)
+    """
+
+    leftSpeed = 0.0
+    rightSpeed = 0.0
+
+    throttle = math.fabs(rawThrottleSpeed)
+    throttleSign = 0.0
+    if rawThrottleSpeed > 0.0:
+        throttleSign = 1.0
+    if rawThrottleSpeed < 0.0:
+        throttleSign = -1.0
+    if rawThrottleSpeed == 0.0:
+        throttleSign = 1.0
+
+    turn = math.fabs(rawTurnSpeed)
+    turnSign = 0.0
+    if rawTurnSpeed > 0.0:
+        turnSign = 1.0
+    if rawTurnSpeed < 0.0:
+        turnSign = -1.0
+    if rawTurnSpeed == 0.0:
+        turnSign = 1.0
+
+    # forward + right = clockwise (+1.0)
+    # forward + left = counter clockwise (-1.0)
+    # back + right = counter clockwise (-1.0)
+    # back + left = clockwise (+1.0)
+    spinSign = throttleSign * turnSign
+
+    if turn != 0.0:
+        fastSide = rawThrottleSpeed
+
+        range = 1 - (turnScale * throttle)
+        slowSide = throttle - (turn * range)
+        slowSide *= throttleSign
+
+        if throttle == 0.0:
+            # if there's zero throttle, a turn should just spin
+            if math.fabs(fastSide) < math.fabs(slowSide):
+                fastSide = slowSide * -1.0
+        else:
+            # Stop driving the opposite direction if a tiny bit of throttle is given, and more turn is
+            # overpowering it
+            # TODO - This section is experimental
+            # It appears to do what we want, but needs more testing.  It makes the robot more inclined to spin
+            # at slow throttle speeds, but does seem to stop it driving in the reverse direction due to how turn
+            # is accomplished
+            if math.fabs(fastSide) < math.fabs(slowSide):
+                if fastSide > 0.0:
+                    fastSide = math.fabs(slowSide)
+                else:
+                    fastSide = math.fabs(slowSide) * -1.0
+
+        if spinSign == 1.0:
+            leftSpeed = fastSide
+            rightSpeed = slowSide
+
+        if spinSign == -1.0:
+            leftSpeed = slowSide
+            rightSpeed = fastSide
+    else:
+        #straight ahead
+        leftSpeed = rawThrottleSpeed
+        rightSpeed = rawThrottleSpeed
+
+    return leftSpeed, rightSpeed
+
+
+def nfsMixBatch(rawThrottleSpeed, rawTurnSpeed, slow, lowTurnScale, highTurnScale):
+    """
+    NumPy version of nfsMix for whole arrays of inputs, intended for offline sweeps of the response surface
+    Every step mirrors nfsMix operation for operation, so results are bit-identical to the scalar path
+
+    NumPy is only imported when this is called, the robot itself never needs it
+
+    :param rawThrottleSpeed: array of filtered throttle values -1.0 to +1.0
+    :param rawTurnSpeed: array of filtered turn values -1.0 to +1.0
+    :param slow: array of slow button states (bool), selects highTurnScale where True
+    :param lowTurnScale: turn scale used during normal driving
+    :param highTurnScale: turn scale used while driving slow
+    :return: (leftSpeed, rightSpeed) arrays, broadcast to a common shape
+    """
+    import numpy as np
+
+    rawThrottleSpeed, rawTurnSpeed, slow = np.broadcast_arrays(np.asarray(rawThrottleSpeed, dtype=np.float64),
+                                                               np.asarray(rawTurnSpeed, dtype=np.float64),
+                                                               np.asarray(slow, dtype=bool))
+
+    throttle = np.abs(rawThrottleSpeed)
+    throttleSign = np.where(rawThrottleSpeed < 0.0, -1.0, 1.0)
+    turn = np.abs(rawTurnSpeed)
+    turnSign = np.where(rawTurnSpeed < 0.0, -1.0, 1.0)
+    spinSign = throttleSign * turnSign
+
+    turnScale = np.where(slow, highTurnScale, lowTurnScale)
+    range = 1 - (turnScale * throttle)
+    slowSide = throttle - (turn * range)
+    slowSide *= throttleSign
+
+    fastSide = rawThrottleSpeed.copy()
+    overpowered = np.abs(fastSide) < np.abs(slowSide)
+
+    # zero throttle spins, otherwise the fast side is kept in the throttle direction
+    spin = overpowered & (throttle == 0.0)
+    fastSide[spin] = slowSide[spin] * -1.0
+    held = overpowered & (throttle != 0.0)
+    fastSide[held] = np.where(fastSide[held] > 0.0, np.abs(slowSide[held]), np.abs(slowSide[held]) * -1.0)
+
+    clockwise = spinSign == 1.0
+    leftSpeed = np.where(clockwise, fastSide, slowSide)
+    rightSpeed = np.where(clockwise, slowSide, fastSide)
+
+    # straight ahead
+    straight = turn == 0.0
+    leftSpeed[straight] = rawThrottleSpeed[straight]
+    rightSpeed[straight] = rawThrottleSpeed[straight]
+
+    return leftSpeed, rightSpeed
@@ -1,7 +1,12 @@
 import math
 from wpilib.joystick import Joystick
+from wpilib.timer import Timer
 from wpilib.buttons.joystickbutton import JoystickButton
 
+import robotmap
+import latencytrace
+from curvetable import CachedCurve
+
 
 class T16000M(Joystick):
 
@@ -21,16 +26,33 @@ rightDriverStick = None
 btnDriveSlow = None
 
 
-class ConfigHolder:
-    pass
+class InputFrame:
+    """
+    Snapshot of the driver inputs for one robot loop
+    MyRobot fills it once per tick before the scheduler runs, and commands read it instead of the joysticks, so
+    every command in a tick sees the same values and each input is only read from the driver station once
+    """
+    __slots__ = ('timestamp', 'throttle', 'turn', 'rightThrottle', 'driveSlow')
 
+    def __init__(self):
+        self.timestamp = 0.0
+        self.throttle = 0.0
+        self.turn = 0.0
+        self.rightThrottle = 0.0
+        self.driveSlow = False
 
-config = ConfigHolder()
-config.leftDriverStickNullZone = 0.05
-config.rightDriverStickNullZone = 0.05
+    def update(self):
+        self.timestamp = Timer.getFPGATimestamp()
+        self.throttle = getRawThrottle()
+        self.turn = getRawTurn()
+        self.rightThrottle = getRawRightThrottle()
+        self.driveSlow = btnDriveSlow.get()
+        tracer = latencytrace.tracer
+        if tracer is not None:
+            tracer.markRead()
 
-config.throttleFilterPower = 0.4
-config.turnFilterPower = 0.4
+
+frame = InputFrame()
 
 
 def init():
@@ -48,6 +70,8 @@ def init():
     global btnDriveSlow
     btnDriveSlow = JoystickButton(leftDriverStick, 1)
 
+    updateCurves()
+
 
 # https://www.desmos.com/calculator/yopfm4gkno
 # power should be > 0.1 and less than 4 or 5 ish on the outside
@@ -126,6 +150,22 @@ def applyDeadZone(val, deadZone):
     return val
 
 
+# Precomputed versions of the curves above, used by the drive commands every tick
+# The functions above remain the reference implementations the tables are sampled from
+throttleCurve = CachedCurve(filterInputToPower)
+turnCurve = CachedCurve(filterInputToPower)
+
+
+def updateCurves():
+    """
+    Rebuild the throttle and turn lookup tables if the config has changed since they were last built
+    Cheap to call when nothing changed, so commands call it from initialize()
+    """
+    config = robotmap.oi
+    throttleCurve.update(config.leftDriverStickNullZone, config.throttleFilterPower)
+    turnCurve.update(config.rightDriverStickNullZone, config.turnFilterPower)
+
+
 def getRawThrottle():
     """
     Use the Y Axis of the left stick for throttle.  Value is reversed so that 1.0 is forward (up on a joystick is usually negative input)
@@ -141,3 +181,13 @@ def getRawThrottle():
 def getRawTurn():
     return rightDriverStick.getX()
 
+
+def getRawRightThrottle():
+    """
+    Y Axis of the right stick, reversed like getRawThrottle. Only used by the tank drive mode
+    """
+    val = rightDriverStick.getY()
+    if val != 0.0:
+        val *= -1.0
+    return val
+
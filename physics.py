@@ -0,0 +1,48 @@
+'''
+pyfrc simulation hook - moves the robot on the simulated field and feeds the drive encoders using the
+tank model in tankphysics.py
+'''
+
+import math
+
+import robotmap
+import tankphysics
+
+
+class PhysicsEngine:
+
+    def __init__(self, physics_controller):
+        self.physics_controller = physics_controller
+        self.params = tankphysics.TankModelParams()
+        self.state = tankphysics.TankState()
+
+    def _findEncoder(self, hal_data, aPort):
+        for encoder in hal_data['encoder']:
+            if encoder['initialized'] and encoder['config'].get('ASource_Channel') == aPort:
+                return encoder
+        return None
+
+    def update_sim(self, hal_data, now, tm_diff):
+        driveLine = robotmap.driveLine
+
+        # the PWM value is after any inversion, undo it to get the direction the wheels turn
+        left = hal_data['pwm'][driveLine.leftMotorPort]['value']
+        right = hal_data['pwm'][driveLine.rightMotorPort]['value']
+        if driveLine.invertLeft:
+            left = -left
+        if driveLine.invertRight:
+            right = -right
+
+        distance, turn = tankphysics.step(self.state, left, right, tm_diff, self.params)
+
+        # the field is in feet, x forward and angle counter clockwise
+        self.physics_controller.distance_drive(distance / 12.0, 0.0, -math.radians(turn))
+
+        leftEncoder = self._findEncoder(hal_data, driveLine.leftEncAPort)
+        if leftEncoder is not None:
+            leftEncoder['count'] = -self.state.leftCount(self.params) if driveLine.leftEncReverse \
+                else self.state.leftCount(self.params)
+        rightEncoder = self._findEncoder(hal_data, driveLine.rightEncAPort)
+        if rightEncoder is not None:
+            rightEncoder['count'] = -self.state.rightCount(self.params) if driveLine.rightEncReverse \
+                else self.state.rightCount(self.params)
@@ -0,0 +1,122 @@
+'''
+Multi-rate scheduling for the robot loop
+
+The robot loop runs at the base rate, and work is split into rate groups that each run every Nth base tick
+(50Hz control, 10Hz telemetry and 1Hz diagnostics). Groups slower than the base rate are given different phase
+offsets, so their work is spread across ticks instead of all landing on the same one. Each group's run time is
+recorded so its share of the loop budget can be reported
+
+Members are plain callables added by the robot (robot level periodic functions). Commands and subsystems all run
+from the command scheduler, a single member of the control group, so they run at the control rate and can't be
+put in a group of their own. No group runs faster than the base rate, the drive PID's high rate loop has its own
+Notifier (see subsystems/drivepid.py)
+'''
+
+from time import perf_counter_ns
+
+import looptiming
+import telemetry
+
+
+class RateGroup:
+
+    def __init__(self, name, rate, divisor, phase, timer, deferrable=None):
+        self.name = name
+        self.rate = rate
+        self.divisor = divisor
+        self.phase = phase
+        self.timer = timer
+        self.deferrable = deferrable
+        self.members = []
+
+
+class RateScheduler:
+
+    def __init__(self, baseRate, budget=None, onError=None):
+        """
+        :param baseRate: ticks per second
+        :param budget: loopbudget.LoopBudget consulted for deferrable groups, or None to always run them
+        :param onError: called with (group, exception) when a member raises, or None to let it propagate.
+                        The rest of that group is skipped for the tick, the other groups still run
+        """
+        self.baseRate = baseRate
+        self.budget = budget
+        self.onError = onError
+        self.basePeriod = 1.0 / baseRate
+        self.groups = []
+        self.tick = 0
+
+    def addGroup(self, name, rate, deferrable=None):
+        """
+        Add a group that runs rate times a second. The rate must divide the base rate evenly
+        A deferrable group is skipped while the budget has its category shed
+        """
+        divisor = int(round(self.baseRate / rate))
+        if divisor < 1 or abs(divisor * rate - self.baseRate) > 1e-6:
+            raise ValueError("Rate group {} at {}Hz doesn't divide the {}Hz base rate".format(name, rate,
+                                                                                           self.baseRate))
+
+        # spread slower groups over the ticks: each one starts one tick after the previous slow group
+        slowGroups = len([group for group in self.groups if group.divisor > 1])
+        phase = slowGroups % divisor
+
+        timer = looptiming.getTimer('Rate/' + name)
+        group = RateGroup(name, rate, divisor, phase, timer, deferrable)
+        self.groups.append(group)
+        return group
+
+    def getGroup(self, name):
+        for group in self.groups:
+            if group.name == name:
+                return group
+        raise KeyError(name)
+
+    def add(self, groupName, func):
+        """
+        Run func in the named group
+        """
+        self.getGroup(groupName).members.append(func)
+
+    def run(self):
+        """
+        Called once per base tick
+        """
+        tick = self.tick
+        self.tick = tick + 1
+        for group in self.groups:
+            if (tick - group.phase) % group.divisor == 0:
+                if group.deferrable is not None and self.budget is not None and \
+                        not self.budget.allows(group.deferrable):
+                    continue
+                start = perf_counter_ns()
+                try:
+                    for func in group.members:
+                        func()
+                except Exception as error:
+                    if self.onError is None:
+                        raise
+                    self.onError(group, error)
+                group.timer.record(perf_counter_ns() - start)
+
+    def getLoad(self):
+        """
+        :return: dict of group name to its rate, phase, mean and p99 run time (ms), and load - the fraction of
+                 all loop time it uses (mean run time x rate)
+        """
+        load = {}
+        for group in self.groups:
+            samples = group.timer.getSamples()
+            meanMs = (sum(samples) / len(samples) / 1e6) if samples else 0.0
+            load[group.name] = {
+                'rate': group.rate,
+                'phase': group.phase,
+                'mean': meanMs,
+                'p99': group.timer.percentile(99) / 1e6,
+                'load': meanMs / 1000.0 * group.rate,
+            }
+        return load
+
+    def publishLoad(self):
+        for name, stats in self.getLoad().items():
+            telemetry.put("Rates/{}/load".format(name), stats['load'])
+            telemetry.put("Rates/{}/p99".format(name), stats['p99'])
@@ -1,13 +1,23 @@
 import wpilib
 from commandbased import CommandBasedRobot
-from wpilib.command import Scheduler
 from wpilib.driverstation import DriverStation
+from wpilib.robotbase import RobotBase
 
 
 # import items in the order they should be initialized to avoid any suprises
 import robotmap
 import subsystems
 import oi
+import looptiming
+import telemetry
+import matchrecorder
+import telemetrystream
+import ratescheduler
+import loopbudget
+import gcmanager
+import drivemodes
+import sampleprofiler
+import latencytrace
 
 
 class MyRobot(CommandBasedRobot):
@@ -20,9 +30,104 @@ class MyRobot(CommandBasedRobot):
         # subsystems must be initialized before things that use them
         subsystems.init()
         oi.init()
+        telemetry.init()
+        latencytrace.init()
+        if not RobotBase.isSimulation():
+            matchrecorder.init()
+        telemetrystream.init()
+
+        self.rates = ratescheduler.RateScheduler(robotmap.rates.baseRate, loopbudget.budget, self.rateGroupCrashed)
+        for name, rate, deferrable in robotmap.rates.groups:
+            self.rates.addGroup(name, rate, deferrable)
+        # drive mode picked on the dashboard, checked at the telemetry rate rather than every control tick
+        self.driveModeChooser = wpilib.SendableChooser()
+        for name in sorted(drivemodes.modes):
+            if name == drivemodes.mode:
+                self.driveModeChooser.addDefault(name, name)
+            else:
+                self.driveModeChooser.addObject(name, name)
+        wpilib.SmartDashboard.putData('Drive Mode', self.driveModeChooser)
+        self.driveModeSelected = drivemodes.mode
+
+        self.rates.add('control', self.controlPeriodic)
+        self.rates.add('telemetry', self.rates.publishLoad)
+        self.rates.add('telemetry', loopbudget.budget.publish)
+        self.rates.add('telemetry', self.pollDriveMode)
+        self.rates.add('telemetry', sampleprofiler.poll)
+        self.rates.add('diagnostics', looptiming.publish)
+        self.rates.add('diagnostics', subsystems.driveline.publishOutputStats)
+        self.setPeriod(self.rates.basePeriod)
+        self.periodNs = int(self.rates.basePeriod * 1e9)
+
+        # everything built so far lives for the whole run, freeze it so collections never scan it again
+        gcmanager.init()
+        self.rates.add('diagnostics', gcmanager.manager.publish)
+        gcmanager.manager.freeze()
+
+        sampleprofiler.init()
+
+    def controlPeriodic(self):
+        oi.frame.update()
+        self.commandPeriodic()
+
+    def rateGroupCrashed(self, group, error):
+        # same guard as commandPeriodic: a crash stops the robot code in testing, in a match it is reported
+        # and the group's remaining members wait for its next tick
+        if not self.ds.isFMSAttached():
+            raise error
+        self.handleCrash(error)
+
+    def pollDriveMode(self):
+        # only a new dashboard selection changes the mode, so drivemodes.setMode() from code isn't undone
+        selected = self.driveModeChooser.getSelected()
+        if selected is not None and selected != self.driveModeSelected:
+            self.driveModeSelected = selected
+            print('TankDriveNFSpy - drive mode changed to {}'.format(selected))
+            drivemodes.setMode(selected)
+
+    def timedPeriodic(self):
+        looptiming.loop.start()
+        self.rates.run()
+        duration = looptiming.loop.stop()
+        # shed deferrable work when the loop runs long, so the motor outputs keep their timing
+        loopbudget.budget.update(duration)
+        gcmanager.manager.collectSpare(duration, self.periodNs)
+
+    def autonomousInit(self):
+        latencytrace.init()
+        gcmanager.manager.enterMatch()
+        looptiming.loop.restart()
+
+    def autonomousPeriodic(self):
+        self.timedPeriodic()
+
+    def teleopInit(self):
+        latencytrace.init()
+        gcmanager.manager.enterMatch()
+        looptiming.loop.restart()
 
     def teleopPeriodic(self):
-        Scheduler.getInstance().run()
+        self.timedPeriodic()
+
+    def disabledPeriodic(self):
+        self.rates.run()
+        gcmanager.manager.disabledPeriodic()
+
+    def disabledInit(self):
+        loopbudget.budget.reset()
+        gcmanager.manager.exitMatch()
+        if matchrecorder.recorder is not None:
+            matchrecorder.recorder.flush()
+
+        # dump the timing from the match (or practice run) that just ended
+        if looptiming.loop.durations.count > 0 and not RobotBase.isSimulation():
+            try:
+                looptiming.dump(robotmap.timing.dumpPath)
+            except Exception as e:
+                print("TankDriveNFSpy - unable to write loop timing to {}. {}".format(robotmap.timing.dumpPath, e))
+
+    def testInit(self):
+        gcmanager.manager.exitMatch()
 
     def testPeriodic(self):
         wpilib.LiveWindow.run()
@@ -0,0 +1,225 @@
+'''
+Typed, read only configuration sections, loaded from a per robot profile
+
+A section is declared as a class of Fields, each with a type and a default, and Derived values that are worked
+out from the fields. Sections use __slots__, so a misspelled setting is an error rather than a new attribute,
+and they are read only once built: a change is made by building a new section with replace(), which validates
+the new values and recomputes every derived value, so derived values can never go stale
+
+    class DriveLineConfig(ConfigSection):
+        driveWheelRadiusInches = Field(float, 3.1875)
+        driveWheelEncTicks = Field(int, 360, minimum=1)
+        inchesPerTick = Derived(lambda c: 2 * math.pi * c.driveWheelRadiusInches / c.driveWheelEncTicks)
+
+A profile is a JSON file of per robot overrides, {"driveLine": {"leftMotorPort": 2}, ...}. Once a profile (or
+the defaults, when a robot has no profile file) has been validated, the resulting values are cached next to it
+with marshal, keyed on the profile and source file modification times. Later loads take the cache and skip
+parsing and validation, and don't import json at all. Each section is marshalled on its own, so a loader can
+build just the sections it uses with loadCache() and ConfigSection.fromCache() (see robotmap.py)
+'''
+
+import marshal
+import os
+
+
+class Field:
+
+    def __init__(self, kind, default, choices=None, minimum=None, optional=False):
+        """
+        :param kind: int, float, bool, str or tuple. An int is accepted for a float, and a JSON list for a tuple
+        :param choices: allowed values, or None for any
+        :param minimum: smallest allowed value for a number
+        :param optional: None is allowed
+        """
+        self.kind = kind
+        self.default = default
+        self.choices = choices
+        self.minimum = minimum
+        self.optional = optional
+
+    def validate(self, sectionName, name, value):
+        if value is None:
+            if self.optional:
+                return None
+            raise ValueError("{}.{} can't be None".format(sectionName, name))
+
+        kind = self.kind
+        if kind is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        elif kind is tuple and isinstance(value, list):
+            value = tuple(tuple(item) if isinstance(item, list) else item for item in value)
+
+        if not isinstance(value, kind) or (kind is not bool and isinstance(value, bool)):
+            raise ValueError("{}.{} must be a {}, not {!r}".format(sectionName, name, kind.__name__, value))
+        if self.choices is not None and value not in self.choices:
+            raise ValueError("{}.{} must be one of {}, not {!r}".format(sectionName, name, self.choices, value))
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError("{}.{} must be at least {}, not {!r}".format(sectionName, name, self.minimum, value))
+        return value
+
+
+class Derived:
+    """
+    A value worked out from the section's fields (and earlier derived values) whenever the section is built
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+
+class ConfigMeta(type):
+    """
+    Turns the Field and Derived declarations of a section class into __slots__
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = {}
+        derived = {}
+        for base in bases:
+            fields.update(getattr(base, '_fields', ()))
+            derived.update(getattr(base, '_derived', ()))
+        inherited = fields.keys() | derived.keys()
+
+        # robotmap declares every section on each import, so this runs on the startup path
+        declared = [key for key, value in namespace.items() if type(value) is Field or type(value) is Derived]
+        for key in declared:
+            value = namespace.pop(key)
+            if type(value) is Field:
+                fields[key] = value
+            else:
+                derived[key] = value
+
+        namespace['__slots__'] = tuple(key for key in declared if key not in inherited)
+        namespace['_fields'] = fields
+        namespace['_derived'] = derived
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class ConfigSection(metaclass=ConfigMeta):
+
+    def __init__(self, **values):
+        """
+        Build the section from its defaults and the given overrides, all of which are validated
+        """
+        sectionName = type(self).__name__
+        unknown = set(values) - set(self._fields)
+        if unknown:
+            raise ValueError("{} has no setting {}".format(sectionName, ', '.join(sorted(unknown))))
+
+        for name, field in self._fields.items():
+            value = values[name] if name in values else field.default
+            object.__setattr__(self, name, field.validate(sectionName, name, value))
+        self._derive()
+
+    @classmethod
+    def fromValidated(cls, values):
+        """
+        Build the section from values that have already been validated, as stored in the profile cache
+        """
+        section = cls.__new__(cls)
+        for name, field in cls._fields.items():
+            object.__setattr__(section, name, values.get(name, field.default))
+        section._derive()
+        return section
+
+    @classmethod
+    def fromCache(cls, data):
+        """
+        Build the section from its entry in the dict returned by loadCache()
+        """
+        return cls.fromValidated(marshal.loads(data)[1])
+
+    def _derive(self):
+        for name, derived in self._derived.items():
+            object.__setattr__(self, name, derived.func(self))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{}.{} is read only, build a new section with replace()".format(type(self).__name__,
+                                                                                              name))
+
+    def __delattr__(self, name):
+        raise AttributeError("{}.{} is read only".format(type(self).__name__, name))
+
+    def __reduce__(self):
+        return type(self).fromValidated, (self.asDict(),)
+
+    def replace(self, **changes):
+        """
+        :return: a copy of the section with the changes validated and the derived values recomputed
+        """
+        values = self.asDict()
+        values.update(changes)
+        return type(self)(**values)
+
+    def asDict(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ', '.join("{}={!r}".format(name, getattr(self, name)) for name in self._fields))
+
+
+def _cachePath(path, cacheDir=None):
+    return os.path.join(cacheDir or os.path.dirname(path), '.' + os.path.basename(path) + '.cache')
+
+
+def _cacheKey(path, sourceFiles):
+    key = []
+    for filename in (path, os.path.abspath(__file__)) + tuple(sourceFiles):
+        try:
+            info = os.stat(filename)
+            key.append((filename, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            key.append((filename, None, None))
+    return key
+
+
+def loadCache(path, sourceFiles=(), cacheDir=None):
+    """
+    Read the cache loadProfile() keeps next to a profile (or in cacheDir)
+
+    :return: dict of section name to its cached data for ConfigSection.fromCache(), or None when there is no cache
+             or it is out of date
+    """
+    try:
+        # one read, marshal.load() on the file reads it a few bytes at a time
+        with open(_cachePath(path, cacheDir), 'rb') as f:
+            cached = marshal.loads(f.read())
+        return cached['sections'] if cached['key'] == _cacheKey(path, sourceFiles) else None
+    except Exception:
+        return None
+
+
+def loadProfile(path, sections, sourceFiles=(), cacheDir=None):
+    """
+    Build every section with the overrides from a profile file
+
+    :param path: profile JSON file. If it doesn't exist every section is built from its defaults
+    :param sections: dict of section name to ConfigSection class
+    :param sourceFiles: files declaring the sections, a change to any of them invalidates the cache
+    :param cacheDir: directory the cache is kept in, or None for next to the profile
+    :return: dict of section name to built section
+    """
+    cached = loadCache(path, sourceFiles, cacheDir)
+    if cached is not None and set(cached) == set(sections):
+        return {name: cls.fromCache(cached[name]) for name, cls in sections.items()}
+
+    overrides = {}
+    if os.path.exists(path):
+        import json
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(sections)
+        if unknown:
+            raise ValueError("{} has settings for unknown sections {}".format(path, ', '.join(sorted(unknown))))
+
+    built = {name: cls(**overrides.get(name, {})) for name, cls in sections.items()}
+
+    cachePath = _cachePath(path, cacheDir)
+    try:
+        with open(cachePath, 'wb') as f:
+            marshal.dump({'key': _cacheKey(path, sourceFiles), 'sections': {
+                name: marshal.dumps((type(section).__name__, section.asDict())) for name, section in built.items()}}, f)
+    except (OSError, ValueError) as e:
+        print("robotconfig: unable to cache the validated profile to {}. {}".format(cachePath, e))
+    return built
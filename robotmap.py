@@ -1,75 +1,57 @@
-import math
+'''
+The robot's settings, one read only section per subsystem or feature: robotmap.driveLine, robotmap.nfs, ...
 
-import wpilib
+The sections and their defaults are declared in robotsections.py, and a robot can override any of them in its
+profile, profiles/<name>.json, where the name comes from the ROBOT_PROFILE environment variable ("competition" by
+default, which has no file and uses the defaults)
 
+To change a setting while the code is running (tuning, tests), build a new section:
+    robotmap.nfs = robotmap.nfs.replace(lowTurnScale=0.25)
 
-class ConfigHolder:
-    '''''Dummy class to add config parameters too'''
-    pass
+Once a profile has been validated robotconfig caches the values next to it, or in the ROBOT_CONFIG_CACHE
+directory when that is set. While that cache is current, the
+import only reads the cache, and each section is built from it the first time it is used. Either way every
+section is the ConfigSection class declared in robotsections.py
+'''
 
+import os
 
-# ----------------------------------------------------------
-# Driveline Subsystem Config
-# ----------------------------------------------------------
-driveLine = ConfigHolder()
-driveLine.leftMotorPort = 0
-driveLine.rightMotorPort = 1
-driveLine.invertLeft = False
-driveLine.invertRight = False
-driveLine.speedControllerType = "TALON"
+from robotconfig import loadCache, loadProfile
 
-driveLine.leftEncAPort = 0
-driveLine.leftEncBPort = 1
-driveLine.leftEncType = wpilib.Encoder.EncodingType.k4X
-driveLine.leftEncReverse = False
 
+projectDir = os.path.dirname(os.path.abspath(__file__))
+profileName = os.environ.get('ROBOT_PROFILE', 'competition')
+profilePath = os.path.join(projectDir, 'profiles', profileName + '.json')
+sourceFiles = (os.path.join(projectDir, 'robotsections.py'), os.path.join(projectDir, 'robotmap.py'))
+cacheDir = os.environ.get('ROBOT_CONFIG_CACHE')
 
-driveLine.rightEncAPort = 2
-driveLine.rightEncBPort = 3
-driveLine.rightEncType = wpilib.Encoder.EncodingType.k4X
-driveLine.rightEncReverse = False
 
-driveLine.driveWheelRadiusInches = 3.1875
-driveLine.driveWheelEncTicks = 360
-driveLine.inchesPerTick = 2 * math.pi * driveLine.driveWheelRadiusInches / driveLine.driveWheelEncTicks
+def getSections():
+    """
+    :return: dict of section name to ConfigSection class, from robotsections
+    """
+    import robotsections
+    return robotsections.sections
 
-driveLine.controlStyle = "nfs"
 
-
-# ----------------------------------------------------------
-# NFS Driving Config
-# ----------------------------------------------------------
-nfs = ConfigHolder()
-nfs.debugTurning = False
-
-"""
-Turn scaling is used to reduce the maximum ammount of turn as the throttle increases to improve stability and
-make the feel closer to that of driving a car
-
-Heavy scalling is used while driving "slow", and lighter scaling is used during normal driving
-Thus:
-lowTurnScale -> normal driving
-highTurnScale -> "slow" driving (while holding left trigger)
-
-"""
-nfs.lowTurnScale = 0.3                  # How much to reduce turn speed when driving at full throttle
-nfs.highTurnScale = 0.2                 #
-nfs.slowDriveSpeedFactor = 0.7          # Max speed when driving in slow mode
-
-"""
-minTimeFullThrottleChange
-The minimum amount of time that the tank drive will allow the motors to switch from -1.0 to +1.0
-Example: a value of 1 means that it will take 1 sec for the speed controllers to be updated from -1.0 to +1.0
-
-The maximum speed controller change per periodic call is thus 
-maxThrottleChange = totalThrottleRange (2) * callSpeed (0.02sec) / time (minTimeFullThrottleChange)
-
-0.02 = 50 times per second (the updated packets to the robot
-"""
-nfs.minTimeFullThrottleChange = 1.5
-nfs.maxSpeedChange = (2 * 0.02) / nfs.minTimeFullThrottleChange
+def __getattr__(name):
+    """
+    Sections from the cache are built the first time they are used (robotmap.driveLine, ...), then kept as
+    module attributes
+    """
+    data = _cached.get(name) if _cached is not None else None
+    if data is None:
+        raise AttributeError("module 'robotmap' has no attribute '{}'".format(name))
+    section = getSections()[name].fromCache(data)
+    globals()[name] = section
+    return section
 
 
+# the sections are driveLine, oi, sensors, drivePID, motionProfile, trajectories, nfs, telemetry, recorder, stream,
+# rates, budget, gc, timing, latency, profiler and physics, see robotsections.py
+_cached = loadCache(profilePath, sourceFiles, cacheDir)
+if _cached is None:
+    globals().update(loadProfile(profilePath, getSections(), sourceFiles, cacheDir))
 
 
 print("RobotMap module completed load")
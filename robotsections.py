@@ -0,0 +1,278 @@
+'''
+The robot's config sections, each a read only robotconfig.ConfigSection. The defaults are declared here, and a
+robot can override any of them in its profile (see robotmap.py). Everything else reads the settings through
+robotmap, and this module is only imported when they have to be validated
+'''
+
+import math
+import os
+
+import wpilib
+
+from robotconfig import ConfigSection, Field, Derived
+
+
+projectDir = os.path.dirname(os.path.abspath(__file__))
+
+
+# ----------------------------------------------------------
+# Driveline Subsystem Config
+# ----------------------------------------------------------
+class DriveLineConfig(ConfigSection):
+    leftMotorPort = Field(int, 0)
+    rightMotorPort = Field(int, 1)
+    invertLeft = Field(bool, False)
+    invertRight = Field(bool, False)
+    speedControllerType = Field(str, "TALON")      # Any type in subsystems/motoroutput.py CONTROLLER_TYPES
+    leftFollowerPorts = Field(tuple, ())    # Extra motors on each side, set to the same output as the side's leader
+    rightFollowerPorts = Field(tuple, ())
+    outputRefreshTicks = Field(int, 25, minimum=0)     # Unchanged outputs are skipped, but still written this often
+
+    leftEncAPort = Field(int, 0)
+    leftEncBPort = Field(int, 1)
+    leftEncType = Field(int, wpilib.Encoder.EncodingType.k4X)
+    leftEncReverse = Field(bool, False)
+
+    rightEncAPort = Field(int, 2)
+    rightEncBPort = Field(int, 3)
+    rightEncType = Field(int, wpilib.Encoder.EncodingType.k4X)
+    rightEncReverse = Field(bool, False)
+
+    driveWheelRadiusInches = Field(float, 3.1875, minimum=0.0)
+    driveWheelEncTicks = Field(int, 360, minimum=1)
+    inchesPerTick = Derived(lambda c: 2 * math.pi * c.driveWheelRadiusInches / c.driveWheelEncTicks)
+
+    controlStyle = Field(str, "nfs")            # Drive mode, one of drivemodes.modes
+    quickTurnThreshold = Field(float, 0.1)      # Curvature mode spins in place below this throttle
+
+
+# ----------------------------------------------------------
+# Driver Input Config
+# ----------------------------------------------------------
+class OIConfig(ConfigSection):
+    leftDriverStickNullZone = Field(float, 0.05)
+    rightDriverStickNullZone = Field(float, 0.05)
+
+    throttleFilterPower = Field(float, 0.4)
+    turnFilterPower = Field(float, 0.4)
+
+
+# ----------------------------------------------------------
+# Sensor Sampling Config
+# ----------------------------------------------------------
+class SensorsConfig(ConfigSection):
+    gyroType = Field(str, None, choices=("ADXRS450", "NAVX"), optional=True)   # None, or NAVX (needs robotpy-navx)
+    rate = Field(float, 200.0, minimum=1.0)         # Samples per second of the gyro and drive encoders
+    bufferSize = Field(int, 1024, minimum=2)        # Samples kept (about 5 seconds at 200Hz)
+    velocityWindow = Field(int, 15, minimum=3)      # Encoder samples in each velocity / acceleration fit (75ms)
+
+
+# ----------------------------------------------------------
+# Drive PID Config
+# ----------------------------------------------------------
+class DrivePIDConfig(ConfigSection):
+    rate = Field(float, 200.0, minimum=1.0)         # Control steps per second, run on a Notifier thread
+    distanceP = Field(float, 0.0)
+    distanceI = Field(float, 0.0)
+    distanceD = Field(float, 0.0)
+    distanceMinSpeed = Field(float, 0.0)            # Smallest speed applied while off target
+    distanceTolerance = Field(float, 18.0, minimum=0.0)     # Encoder ticks (about an inch)
+    turnP = Field(float, 0.0)
+    turnI = Field(float, 0.0)
+    turnD = Field(float, 0.0)
+    turnMinSpeed = Field(float, 0.0)
+    turnScaleSpeed = Field(float, 0.5)              # Turn output is scaled by this before being applied
+    turnTolerance = Field(float, 2.0, minimum=0.0)  # Degrees
+
+
+# ----------------------------------------------------------
+# Motion Profile Config
+# ----------------------------------------------------------
+class MotionProfileConfig(ConfigSection):
+    maxVelocity = Field(float, 96.0)                # Inches per second
+    maxAcceleration = Field(float, 120.0)           # Inches per second^2
+    maxJerk = Field(float, 600.0, optional=True)    # Inches per second^3, None for trapezoidal profiles
+    period = Field(float, 0.01)                     # Seconds between profile setpoints
+    settleTime = Field(float, 1.0)                  # Time allowed after the profile ends to get on target
+
+
+# ----------------------------------------------------------
+# Trajectory Store Config
+# ----------------------------------------------------------
+class TrajectoriesConfig(ConfigSection):
+    path = Field(str, os.path.join(projectDir, "paths.bin"))   # Deployed with the code
+
+
+# ----------------------------------------------------------
+# NFS Driving Config
+# ----------------------------------------------------------
+class NFSConfig(ConfigSection):
+    debugTurning = Field(bool, False)
+
+    """
+    Turn scaling is used to reduce the maximum ammount of turn as the throttle increases to improve stability and
+    make the feel closer to that of driving a car
+
+    Heavy scalling is used while driving "slow", and lighter scaling is used during normal driving
+    Thus:
+    lowTurnScale -> normal driving
+    highTurnScale -> "slow" driving (while holding left trigger)
+
+    """
+    lowTurnScale = Field(float, 0.3)                # How much to reduce turn speed when driving at full throttle
+    highTurnScale = Field(float, 0.2)               #
+    slowDriveSpeedFactor = Field(float, 0.7)        # Max speed when driving in slow mode
+
+    """
+    minTimeFullThrottleChange
+    The minimum amount of time that the tank drive will allow the motors to switch from -1.0 to +1.0
+    Example: a value of 1 means that it will take 1 sec for the speed controllers to be updated from -1.0 to +1.0
+
+    The maximum speed controller change per periodic call is thus
+    maxThrottleChange = totalThrottleRange (2) * callSpeed (0.02sec) / time (minTimeFullThrottleChange)
+
+    0.02 = 50 times per second (the updated packets to the robot
+
+    The command uses the measured time since the previous call rather than a fixed 0.02, so a late loop is allowed
+    a proportionally bigger change. The measured period is held between minLoopPeriod and maxLoopPeriod so a long
+    stall (GC, NetworkTables) can't cause a sudden jump. maxSpeedChange is the change allowed for a nominal
+    loopPeriod
+    """
+    minTimeFullThrottleChange = Field(float, 1.5, minimum=0.001)
+    loopPeriod = Field(float, 0.02)                 # Assumed period for the first call after the command starts
+    minLoopPeriod = Field(float, 0.001)
+    maxLoopPeriod = Field(float, 0.1)
+    speedChangePerSecond = Derived(lambda c: 2 / c.minTimeFullThrottleChange)
+    maxSpeedChange = Derived(lambda c: c.loopPeriod * c.speedChangePerSecond)
+
+
+# ----------------------------------------------------------
+# Telemetry Config
+# ----------------------------------------------------------
+class TelemetryConfig(ConfigSection):
+    enabled = Field(bool, True)
+    period = Field(float, 0.1)              # Seconds between SmartDashboard publishes from the background thread
+    epsilon = Field(float, 0.001)           # Numbers changed by less than this since last published are skipped
+
+
+# ----------------------------------------------------------
+# Match Recorder Config
+# ----------------------------------------------------------
+class RecorderConfig(ConfigSection):
+    enabled = Field(bool, True)             # Only opened on the robot, not in simulation
+    path = Field(str, "/home/lvuser/matchlog.bin")
+    capacity = Field(int, 16384, minimum=1)     # Records kept before the ring wraps (about 5.5 minutes at 50Hz)
+    keep = Field(int, 5, minimum=0)         # Earlier logs kept as <path>.1 to <path>.<keep> when a new one opens
+
+
+# ----------------------------------------------------------
+# UDP Telemetry Stream Config
+# ----------------------------------------------------------
+class StreamConfig(ConfigSection):
+    enabled = Field(bool, False)            # One packet per drive command tick, see telemetrystream.py
+    host = Field(str, "10.2.79.5")          # Driver station laptop running streamreceiver.py
+    port = Field(int, 5800)                 # FRC team use ports are 5800-5810
+
+
+# ----------------------------------------------------------
+# Loop Rate Config
+# ----------------------------------------------------------
+class RatesConfig(ConfigSection):
+    """
+    The robot loop runs at baseRate, and work is split into rate groups that each run at their own rate
+        control - reads the driver inputs and runs the command scheduler
+        telemetry - publishes the rate group load and the loop budget counters
+        diagnostics - publishes the loop timing stats
+
+    Group rates must divide baseRate evenly, and no group runs faster than baseRate. Commands and subsystems all
+    run in the control group, with the command scheduler
+    The last value is the loop budget category the group is shed with, or None if it always runs
+    """
+    baseRate = Field(float, 50.0, minimum=1.0)
+    groups = Field(tuple, (
+        ('control', 50.0, None),
+        ('telemetry', 10.0, None),
+        ('diagnostics', 1.0, 'diagnostics'),
+    ))
+    basePeriod = Derived(lambda c: 1.0 / c.baseRate)    # Expected time between robot loops
+
+
+# ----------------------------------------------------------
+# Loop Budget Config
+# ----------------------------------------------------------
+class BudgetConfig(ConfigSection):
+    enabled = Field(bool, True)
+    shedOrder = Field(tuple, ('debug', 'diagnostics', 'logging'))   # Deferrable work, shed first to last
+    shedThreshold = Field(float, 0.015)     # A loop longer than this sheds the next category
+    recoverThreshold = Field(float, 0.010)  # Loops shorter than this count towards bringing shed work back
+    recoverLoops = Field(int, 50, minimum=1)    # Good loops in a row needed to bring back one category
+
+
+# ----------------------------------------------------------
+# Garbage Collection Config
+# ----------------------------------------------------------
+class GCConfig(ConfigSection):
+    mode = Field(str, 'managed', choices=('managed', 'auto'))   # 'auto' leaves collection to Python
+    spareTime = Field(float, 0.005)         # Seconds left in a loop needed to collect during a match
+    youngThreshold = Field(int, 700)        # Objects waiting in the youngest generation before a match collection
+    matchGeneration = Field(int, 1, choices=(0, 1, 2))  # Oldest generation collected during a match
+
+
+# ----------------------------------------------------------
+# Loop Timing Config
+# ----------------------------------------------------------
+class TimingConfig(ConfigSection):
+    enabled = Field(bool, True)             # Time commands decorated with looptiming.timed (loops are always timed)
+    bufferSize = Field(int, 1024, minimum=1)    # Samples kept per timer (about 20 seconds of loops at 50Hz)
+    overrunThreshold = Field(float, 0.02)   # A loop or command taking longer than this counts as an overrun
+    jitterTolerance = Field(float, 0.002)   # Loop periods further than this from rates.basePeriod count as jitter
+    dumpPath = Field(str, "/home/lvuser/looptiming.csv")   # Written when the robot is disabled after running
+
+
+# ----------------------------------------------------------
+# Latency Tracing Config
+# ----------------------------------------------------------
+class LatencyConfig(ConfigSection):
+    enabled = Field(bool, False)            # Time driver station packets through the drive path (latencytrace.py)
+    bufferSize = Field(int, 1024, minimum=1)    # Ticks kept per stage
+
+
+# ----------------------------------------------------------
+# Sampling Profiler Config
+# ----------------------------------------------------------
+class ProfilerConfig(ConfigSection):
+    rate = Field(float, 200.0, minimum=1.0)         # Stack samples per second while armed
+    duration = Field(float, 10.0, minimum=0.0)      # Seconds sampled each time it's armed
+    path = Field(str, "/home/lvuser/profile-{}.collapsed")     # {} is replaced by the start time
+    dashboardKey = Field(str, "Profiler/Arm")       # Set true on the dashboard to arm
+
+
+# ----------------------------------------------------------
+# Simulation Config
+# ----------------------------------------------------------
+class PhysicsConfig(ConfigSection):
+    maxSpeed = Field(float, 120.0)          # Inches per second at full output
+    timeConstant = Field(float, 0.15)       # Seconds for a side to reach ~63% of a step in output
+    trackWidth = Field(float, 24.0)         # Inches between the left and right wheels
+    deadband = Field(float, 0.05)           # Output below this doesn't move the robot
+
+
+sections = {
+    'driveLine': DriveLineConfig,
+    'oi': OIConfig,
+    'sensors': SensorsConfig,
+    'drivePID': DrivePIDConfig,
+    'motionProfile': MotionProfileConfig,
+    'trajectories': TrajectoriesConfig,
+    'nfs': NFSConfig,
+    'telemetry': TelemetryConfig,
+    'recorder': RecorderConfig,
+    'stream': StreamConfig,
+    'rates': RatesConfig,
+    'budget': BudgetConfig,
+    'gc': GCConfig,
+    'timing': TimingConfig,
+    'latency': LatencyConfig,
+    'profiler': ProfilerConfig,
+    'physics': PhysicsConfig,
+}
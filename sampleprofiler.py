@@ -0,0 +1,182 @@
+'''
+On demand sampling profiler for the robot loop
+
+A side thread wakes up robotmap.profiler.rate times a second, grabs the main thread's current stack with
+sys._current_frames() and counts it. Nothing is hooked into the interpreter, so the loop being profiled runs
+unchanged, and when the profiler isn't armed there is no thread at all - just a dashboard key read at the
+telemetry rate
+
+Arming:
+    dashboard - set the boolean robotmap.profiler.dashboardKey ("Profiler/Arm") to true. It is set back to false
+                when the window ends, or clear it early to stop
+    environment - ROBOT_PROFILER=<seconds> profiles from robotInit for that many seconds
+
+After robotmap.profiler.duration seconds (or when stopped) the counts are written, from the side thread, as a
+collapsed stack file: one "outer;inner;innermost count" line per distinct stack, the input format of
+flamegraph.pl and speedscope. The file goes to robotmap.profiler.path, where {} is replaced by the start time
+'''
+
+import os
+import sys
+import threading
+import time
+
+from wpilib import SmartDashboard
+
+import robotmap
+import telemetry
+
+
+class SamplingProfiler:
+
+    def __init__(self, path, rate=200.0, duration=10.0, threadId=None, maxDepth=64):
+        """
+        :param path: collapsed stack file written when the profiler stops
+        :param rate: samples per second
+        :param duration: seconds to sample before stopping by itself
+        :param threadId: thread to sample, the main thread by default
+        :param maxDepth: innermost frames kept per stack
+        """
+        self.path = path
+        self.period = 1.0 / rate
+        self.duration = duration
+        self.threadId = threadId if threadId is not None else threading.main_thread().ident
+        self.maxDepth = maxDepth
+        self.counts = {}
+        self.labels = {}
+        self.samples = 0
+        self.written = False
+        self._stopEvent = threading.Event()
+        self._thread = None
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        End the window early. The file is still written
+        """
+        self._stopEvent.set()
+        if wait and self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _label(self, code):
+        label = self.labels.get(code)
+        if label is None:
+            label = "{} ({})".format(code.co_name, os.path.basename(code.co_filename))
+            self.labels[code] = label
+        return label
+
+    def sample(self):
+        """
+        Count the sampled thread's current stack. Called by the side thread, can be called directly for testing
+        """
+        frame = sys._current_frames().get(self.threadId)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None and len(stack) < self.maxDepth:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        key = tuple(stack)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration
+        try:
+            while not self._stopEvent.wait(self.period):
+                self.sample()
+                if time.monotonic() >= deadline:
+                    break
+        except Exception as e:
+            print("SamplingProfiler: exception caught sampling. {}".format(e))
+        try:
+            self.write()
+        except Exception as e:
+            print("SamplingProfiler: unable to write {}. {}".format(self.path, e))
+
+    def collapsed(self):
+        """
+        :return: list of (stack string outermost first, count), most sampled first
+        """
+        lines = []
+        for stack, count in self.counts.items():
+            lines.append((';'.join(self._label(code) for code in reversed(stack)), count))
+        lines.sort(key=lambda line: -line[1])
+        return lines
+
+    def write(self):
+        with open(self.path, 'w') as f:
+            for stack, count in self.collapsed():
+                f.write("{} {}\n".format(stack, count))
+        self.written = True
+        print("SamplingProfiler: wrote {} samples to {}".format(self.samples, self.path))
+
+
+profiler = None
+armed = False
+
+
+def start(duration=None):
+    """
+    Start a profiling window, unless one is already running
+    :return: the running profiler
+    """
+    global profiler
+    if profiler is not None and profiler.isRunning():
+        return profiler
+    path = robotmap.profiler.path.format(time.strftime('%Y%m%d-%H%M%S'))
+    profiler = SamplingProfiler(path, robotmap.profiler.rate,
+                                duration if duration is not None else robotmap.profiler.duration)
+    profiler.start()
+    return profiler
+
+
+def stop():
+    if profiler is not None:
+        profiler.stop()
+
+
+def poll():
+    """
+    Start or stop the profiler from the dashboard key, called at the telemetry rate
+    """
+    global armed
+    key = robotmap.profiler.dashboardKey
+    request = SmartDashboard.getBoolean(key, False)
+    running = profiler is not None and profiler.isRunning()
+
+    if request and not armed:
+        armed = True
+        start()
+    elif not request and armed:
+        armed = False
+        if running:
+            profiler.stop(wait=False)
+    elif armed and not running:
+        # the window ran out, disarm so the key can start another one
+        armed = False
+        SmartDashboard.putBoolean(key, False)
+
+    telemetry.put("Profiler/Running", running)
+
+
+def init():
+    """
+    Start a window now if ROBOT_PROFILER asks for one
+    """
+    global armed
+    armed = False
+    seconds = os.environ.get('ROBOT_PROFILER')
+    if seconds:
+        try:
+            start(float(seconds))
+        except ValueError:
+            print("SamplingProfiler: ROBOT_PROFILER should be a number of seconds, not {}".format(seconds))
@@ -0,0 +1,149 @@
+'''
+Receives the UDP telemetry stream from the robot (see telemetrystream.py) and writes it to disk
+
+Packets are appended to the file as they arrive, unchanged, so telemetrystream.loadArrays() reads it back.
+Sequence numbers are checked as they come in: a jump forward counts the skipped packets as dropped and remembers
+them (the newest LATE_WINDOW of them), and one of those arriving afterwards (reordered by the network) is counted
+as late and taken back off the dropped count. Any other packet at or behind the expected sequence is a duplicate,
+counted and not written. A new session id is the robot code restarting, the sequence starts again from there.
+A packet from an earlier session still in flight after a restart is counted as late. A packet with another
+telemetrystream.VERSION can't be read into this version's layout, so it is counted as mismatched and dropped
+
+Usage, from the driver station or a laptop on the robot network:
+    python streamreceiver.py stream.bin [port] [seconds]
+'''
+
+import asyncio
+import time
+
+import telemetrystream
+from telemetrystream import PACKET, HEADER, HEADER_OFFSET, MAGIC, VERSION
+
+
+LATE_WINDOW = 1000
+VERSION_BYTE = bytes((VERSION,))
+
+
+class StreamReceiver(asyncio.DatagramProtocol):
+
+    def __init__(self, file):
+        self.file = file
+        self.received = 0
+        self.dropped = 0
+        self.late = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.mismatched = 0
+        self.restarts = 0
+        self.session = None
+        self.oldSessions = set()
+        self.nextSequence = None
+        self.missing = set()
+
+    def datagram_received(self, data, addr):
+        if data[:2] != MAGIC:
+            self.invalid += 1
+            return
+        if data[2:3] != VERSION_BYTE:
+            # a robot running another version of telemetrystream, its packets are lost to this log
+            self.mismatched += 1
+            self.dropped += 1
+            return
+        if len(data) != PACKET.size:
+            self.invalid += 1
+            return
+
+        session, sequence = HEADER.unpack_from(data, HEADER_OFFSET)
+        if session in self.oldSessions:
+            # its session's losses were left behind at the restart, so it isn't taken off the dropped count
+            self.late += 1
+        elif session != self.session:
+            if self.session is not None:
+                self.restarts += 1
+                self.oldSessions.add(self.session)
+            self.session = session
+            self.missing.clear()
+            self.nextSequence = (sequence + 1) & 0xFFFFFFFF
+        else:
+            # the distance forward from the expected sequence, allowing for the sequence wrapping around
+            ahead = (sequence - self.nextSequence) & 0xFFFFFFFF
+            if ahead < 0x80000000:
+                self.dropped += ahead
+                missing = self.missing
+                for skipped in range(max(0, ahead - LATE_WINDOW), ahead):
+                    missing.add((self.nextSequence + skipped) & 0xFFFFFFFF)
+                if len(missing) > 2 * LATE_WINDOW:
+                    oldest = (sequence - LATE_WINDOW) & 0xFFFFFFFF
+                    self.missing = {s for s in missing if ((s - oldest) & 0xFFFFFFFF) < LATE_WINDOW}
+                self.nextSequence = (sequence + 1) & 0xFFFFFFFF
+            elif sequence in self.missing:
+                self.missing.remove(sequence)
+                self.late += 1
+                self.dropped -= 1
+            else:
+                self.duplicates += 1
+                return
+
+        self.file.write(data)
+        self.received += 1
+
+    def getStats(self):
+        """
+        :return: dict of packets received, dropped, late, duplicates, invalid, version mismatched and stream restarts
+        """
+        return {
+            'received': self.received,
+            'dropped': self.dropped,
+            'late': self.late,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'mismatched': self.mismatched,
+            'restarts': self.restarts,
+        }
+
+    def report(self):
+        total = self.received + self.dropped
+        return ("received {}  dropped {} ({:.2f}%)  late {}  duplicates {}  invalid {}  mismatched {}  "
+                "restarts {}").format(self.received, self.dropped, 100.0 * self.dropped / total if total else 0.0,
+                                      self.late, self.duplicates, self.invalid, self.mismatched, self.restarts)
+
+
+async def openReceiver(file, host='0.0.0.0', port=5800):
+    """
+    Start receiving into an open binary file
+    :return: (transport, StreamReceiver). Use transport.get_extra_info('sockname') for the bound port
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(lambda: StreamReceiver(file), local_addr=(host, port))
+
+
+async def receive(path, host='0.0.0.0', port=5800, duration=None, reportPeriod=5.0):
+    """
+    Write the stream to a file, printing the counts every reportPeriod seconds, for duration seconds or forever
+    :return: the final StreamReceiver.getStats()
+    """
+    with open(path, 'wb') as f:
+        transport, receiver = await openReceiver(f, host, port)
+        end = time.monotonic() + duration if duration is not None else None
+        try:
+            while end is None or time.monotonic() < end:
+                wait = reportPeriod if end is None else min(reportPeriod, max(0.0, end - time.monotonic()))
+                await asyncio.sleep(wait)
+                print(receiver.report())
+        finally:
+            transport.close()
+    return receiver.getStats()
+
+
+if __name__ == '__main__':
+    import sys
+
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5800
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else None
+    print("Receiving {} byte packets on port {} into {}".format(PACKET.size, port, sys.argv[1]))
+    try:
+        asyncio.run(receive(sys.argv[1], port=port, duration=duration))
+    except KeyboardInterrupt:
+        pass
+    log = telemetrystream.loadArrays(sys.argv[1])
+    print("{} packets written".format(len(log['sequence'])))
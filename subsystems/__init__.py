@@ -8,6 +8,7 @@ from wpilib.robotbase import RobotBase
 from .tankdrive import TankDrive
 
 driveline = None
+sensors = None
 
 def init():
     print('Subsystems: init called')
@@ -16,6 +17,7 @@ def init():
     instantiated. Do not run it more than once.
     '''
     global driveline
+    global sensors
 
     '''
     Some tests call startCompetition multiple times, so don't throw an error if
@@ -24,4 +26,9 @@ def init():
     if driveline is not None and not RobotBase.isSimulation():
         raise RuntimeError('Subsystems have already been initialized!')
 
+    if driveline is not None:
+        # the sampler and PID notifier threads would otherwise keep running against the old driveline
+        driveline.shutdown()
+
     driveline = TankDrive()
+    sensors = driveline.sensors
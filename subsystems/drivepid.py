@@ -0,0 +1,198 @@
+import threading
+from time import perf_counter_ns
+
+import wpilib
+
+import looptiming
+
+
+class DrivePIDEngine:
+    """
+    Closed loop control for the drivetrain, run at a fixed high rate (200Hz by default) by a wpilib Notifier
+
+    The engine holds direct references to the encoder, heading source and drive output it is given, so a step
+    doesn't go through any module lookups. Commands hand over setpoints with setSetpoint(), which is protected
+    by a lock - the notifier thread takes a copy at the start of each step. The drive output is called from the
+    notifier thread, so it has to be safe to call alongside the main loop (TankDrive.driveRaw locks its writes)
+
+    Two modes are supported:
+        DISTANCE - drive both sides together to an encoder count
+        TURN - spin in place to a heading, needs a heading source
+    """
+
+    DISTANCE = 'distance'
+    TURN = 'turn'
+
+    def __init__(self, encoder, drive, heading=None, rate=200.0, name=None):
+        """
+        :param encoder: object with a get() returning the encoder count used for DISTANCE
+        :param drive: function taking (left, right) speeds, normally the driveline's driveRaw
+        :param heading: function returning the current heading in degrees for TURN, or None
+        :param rate: steps per second
+        :param name: prefix the step timing is registered under in looptiming, or None to keep it out of
+                     looptiming (test and scratch engines)
+        """
+        self.encoderGet = encoder.get
+        self.drive = drive
+        self.headingGet = heading
+        self.period = 1.0 / rate
+
+        self.gains = {
+            self.DISTANCE: [0.0, 0.0, 0.0],
+            self.TURN: [0.0, 0.0, 0.0],
+        }
+        self.maxOutput = 1.0
+        self.minSpeed = {self.DISTANCE: 0.0, self.TURN: 0.0}
+        self.turnScaleSpeed = 0.5
+        self.tolerance = {self.DISTANCE: 0.0, self.TURN: 0.0}
+
+        self.lock = threading.Lock()
+        self.mode = None
+        self.setpoint = 0.0
+        self.setpointChanged = False
+
+        self.integral = 0.0
+        self.lastError = 0.0
+        self.lastStepNs = 0
+        self.error = 0.0
+        self.output = 0.0
+
+        # the robot's engine has its step timing in the looptiming stats, dump and dashboard next to the robot loop
+        self.timer = looptiming.LoopTimer(1024, self.period, self.period, self.period * 0.2)
+        prefix = name if name is not None else 'DrivePID'
+        self.timer.durations.name = prefix + '.step'
+        self.timer.periods.name = prefix + '.period'
+        if name is not None:
+            looptiming.timers[self.timer.durations.name] = self.timer.durations
+            looptiming.timers[self.timer.periods.name] = self.timer.periods
+        self.notifier = None
+        self.running = False
+
+    def setGains(self, mode, p, i, d, minSpeed=0.0, tolerance=0.0):
+        with self.lock:
+            self.gains[mode] = [p, i, d]
+            self.minSpeed[mode] = minSpeed
+            self.tolerance[mode] = tolerance
+
+    def setSetpoint(self, mode, setpoint):
+        """
+        Hand a new target to the engine, safe to call from any thread
+        Changing mode resets the integrator and derivative history
+        """
+        if mode == self.TURN and self.headingGet is None:
+            raise RuntimeError('DrivePIDEngine has no heading source for TURN')
+
+        with self.lock:
+            if mode != self.mode:
+                self.setpointChanged = True
+            self.mode = mode
+            self.setpoint = setpoint
+
+    def isEnabled(self):
+        return self.running
+
+    def enable(self):
+        if self.running:
+            return
+        self.timer.restart()
+        self.lastStepNs = 0
+        if self.notifier is None:
+            self.notifier = wpilib.Notifier(self.step)
+        self.running = True
+        self.notifier.startPeriodic(self.period)
+
+    def disable(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.notifier.stop()
+        except AttributeError:
+            # the simulator frees every notifier itself at the end of a test, leaving nothing to stop
+            pass
+        with self.lock:
+            self.mode = None
+        self.drive(0.0, 0.0)
+
+    def onTarget(self):
+        """
+        :return: True if a fresh reading is within tolerance of the current setpoint. The error kept by step()
+                 may be from before the last setSetpoint(), so it isn't used
+        """
+        with self.lock:
+            mode = self.mode
+            setpoint = self.setpoint
+            tolerance = self.tolerance[mode] if mode is not None else 0.0
+        if mode is None:
+            return False
+        measured = self.encoderGet() if mode == self.DISTANCE else self.headingGet()
+        return abs(setpoint - measured) <= tolerance
+
+    def step(self):
+        """
+        One control step, called by the notifier. Can be called directly for testing
+        """
+        self.timer.start()
+
+        with self.lock:
+            mode = self.mode
+            setpoint = self.setpoint
+            kP, kI, kD = self.gains[mode] if mode is not None else (0.0, 0.0, 0.0)
+            if self.setpointChanged:
+                self.setpointChanged = False
+                self.integral = 0.0
+                self.lastStepNs = 0
+
+        if mode is None:
+            self.timer.stop()
+            return
+
+        if mode == self.DISTANCE:
+            measured = self.encoderGet()
+        else:
+            measured = self.headingGet()
+
+        now = perf_counter_ns()
+        if self.lastStepNs and now > self.lastStepNs:
+            dt = (now - self.lastStepNs) / 1e9
+        else:
+            dt = self.period
+            self.lastError = setpoint - measured
+        self.lastStepNs = now
+
+        error = setpoint - measured
+        self.integral += error * dt
+        output = (kP * error) + (kI * self.integral) + (kD * (error - self.lastError) / dt)
+        self.lastError = error
+        self.error = error
+
+        if output > self.maxOutput:
+            output = self.maxOutput
+        elif output < -self.maxOutput:
+            output = -self.maxOutput
+        self.output = output
+
+        if abs(error) <= self.tolerance[mode]:
+            self.drive(0.0, 0.0)
+        elif mode == self.DISTANCE:
+            minSpeed = self.minSpeed[mode]
+            if abs(output) < minSpeed:
+                output = -minSpeed if output < 0.0 else minSpeed
+            self.drive(output, output)
+        else:
+            raw = abs(output) * self.turnScaleSpeed
+            if raw < self.minSpeed[mode]:
+                raw = self.minSpeed[mode]
+            if output > 0.0:
+                self.drive(raw, -raw)
+            else:
+                self.drive(-raw, raw)
+
+        self.timer.stop()
+
+    def getStats(self):
+        """
+        :return: dict with the step duration and step period stats, see looptiming.TimingBuffer.getStats
+        """
+        return {'step': self.timer.durations.getStats(), 'period': self.timer.periods.getStats(),
+                'jitter': self.timer.jitter}
@@ -0,0 +1,83 @@
+import wpilib
+
+
+# Speed controller types that can be named in robotmap.driveLine.speedControllerType
+CONTROLLER_TYPES = {
+    'TALON': wpilib.Talon,
+    'VICTORSP': wpilib.VictorSP,
+    'VICTOR': wpilib.Victor,
+    'SPARK': wpilib.Spark,
+}
+
+
+def makeSpeedController(controllerType, port, inverted, description, logPrefix):
+    """
+    Build one PWM speed controller from the CONTROLLER_TYPES table
+
+    A controller that fails to build is reported, and None is returned when the FMS is attached so the rest of the
+    robot can still run a match. Otherwise the error is raised
+    """
+    controllerClass = CONTROLLER_TYPES.get(controllerType)
+    if controllerClass is None:
+        print("{}Configured speed controller type in robotmap not recognized - {}".format(logPrefix, controllerType))
+        if not wpilib.DriverStation.getInstance().isFmsAttached():
+            raise RuntimeError('Driveline speed controller specified in robotmap not valid: ' + controllerType)
+        return None
+
+    try:
+        controller = controllerClass(port)
+        if inverted:
+            controller.setInverted(True)
+        return controller
+    except Exception as e:
+        print("{}Exception caught instantiating {} speed controller. {}".format(logPrefix, description, e))
+        if not wpilib.DriverStation.getInstance().isFmsAttached():
+            raise
+    return None
+
+
+class MotorOutput:
+    """
+    One side of a drivetrain: a leader and any number of followers that are always set to the same value
+
+    The last value written is kept, and a set() that wouldn't change it is skipped. So the output isn't left to
+    the hardware forever, an unchanged value is still written again every refreshTicks calls
+    Write and skip counts show how much PWM / CAN traffic the coalescing saves
+    """
+
+    def __init__(self, name, controllers, refreshTicks=25):
+        """
+        :param controllers: leader first, then followers. None entries (controllers that failed to build) are dropped
+        """
+        self.name = name
+        self.controllers = [controller for controller in controllers if controller is not None]
+        self.leader = self.controllers[0] if self.controllers else None
+        self.refreshTicks = refreshTicks
+        self.last = None
+        self.unchangedTicks = 0
+        self.writes = 0
+        self.skipped = 0
+
+    def set(self, value):
+        if value == self.last and self.unchangedTicks < self.refreshTicks:
+            self.unchangedTicks += 1
+            self.skipped += 1
+            return
+
+        for controller in self.controllers:
+            controller.set(value)
+        self.writes += len(self.controllers)
+        self.last = value
+        self.unchangedTicks = 0
+
+    def invalidate(self):
+        """
+        Forget the last value, so the next set() is always written
+        """
+        self.last = None
+
+    def getStats(self):
+        """
+        :return: dict of controller writes made and set() calls skipped
+        """
+        return {'writes': self.writes, 'skipped': self.skipped}
@@ -0,0 +1,258 @@
+from array import array
+import threading
+
+import wpilib
+from wpilib import Timer
+
+import looptiming
+from derivativeestimator import DerivativeEstimator
+
+
+HEADING = 0
+LEFT = 1
+RIGHT = 2
+LEFT_VELOCITY = 3
+RIGHT_VELOCITY = 4
+LEFT_ACCELERATION = 5
+RIGHT_ACCELERATION = 6
+
+
+class SampleRing:
+    """
+    Fixed size ring of timestamped samples, each with the same number of channels, in preallocated arrays
+
+    Writers must not overlap, SensorSampler appends under its lock. A sample's values are written before the count
+    is bumped, so readers never see a half written sample and don't take the lock
+    """
+    __slots__ = ('size', 'times', 'channels', 'count')
+
+    def __init__(self, channels, size):
+        self.size = size
+        self.times = array('d', bytes(8 * size))
+        self.channels = [array('d', bytes(8 * size)) for _ in range(channels)]
+        self.count = 0
+
+    def append(self, timestamp, values):
+        i = self.count % self.size
+        self.times[i] = timestamp
+        for channel, value in zip(self.channels, values):
+            channel[i] = value
+        self.count += 1
+
+    def latest(self):
+        """
+        :return: (timestamp, channel values...) of the newest sample, or None before the first sample
+        """
+        count = self.count
+        if not count:
+            return None
+        i = (count - 1) % self.size
+        return (self.times[i],) + tuple(channel[i] for channel in self.channels)
+
+    def window(self, samples):
+        """
+        :return: list of the newest samples (up to the number asked for), oldest first, as (timestamp, values...)
+        """
+        count = self.count
+        samples = min(samples, count, self.size)
+        result = []
+        for n in range(count - samples, count):
+            i = n % self.size
+            result.append((self.times[i],) + tuple(channel[i] for channel in self.channels))
+        return result
+
+    def at(self, timestamp):
+        """
+        :return: (timestamp, channel values...) linearly interpolated to the given time, or None before the first
+                 sample. Times outside the buffered samples return the oldest or newest sample
+        """
+        count = self.count
+        if not count:
+            return None
+        size = self.size
+        times = self.times
+        oldest = max(0, count - size)
+        newest = count - 1
+
+        if timestamp >= times[newest % size]:
+            return self.latest()
+        if timestamp <= times[oldest % size]:
+            i = oldest % size
+            return (times[i],) + tuple(channel[i] for channel in self.channels)
+
+        # binary search for the last sample at or before the time
+        low = oldest
+        high = newest
+        while high - low > 1:
+            mid = (low + high) // 2
+            if times[mid % size] <= timestamp:
+                low = mid
+            else:
+                high = mid
+
+        i = low % size
+        j = high % size
+        frac = (timestamp - times[i]) / (times[j] - times[i])
+        return (timestamp,) + tuple(channel[i] + (channel[j] - channel[i]) * frac for channel in self.channels)
+
+
+def makeGyro(gyroType, logPrefix):
+    """
+    Build the gyro named in robotmap.sensors.gyroType, or return None when there isn't one
+    """
+    if gyroType is None:
+        return None
+
+    try:
+        if gyroType == 'ADXRS450':
+            return wpilib.ADXRS450_Gyro()
+        elif gyroType == 'NAVX':
+            # robotpy-navx is only needed on robots that have one
+            import navx
+            return navx.AHRS.create_spi()
+        raise ValueError('Gyro type specified in robotmap not valid: ' + gyroType)
+    except Exception as e:
+        print("{}Exception caught instantiating gyro. {}".format(logPrefix, e))
+        if not wpilib.DriverStation.getInstance().isFmsAttached():
+            raise
+    return None
+
+
+class SensorSampler:
+    """
+    Samples the gyro heading and both drive encoders on a wpilib Notifier at a fixed rate, into a SampleRing with
+    FPGA timestamps (the same clock as the oi input frame)
+
+    Consumers read the latest snapshot or a value interpolated to a time, and never touch the hardware. Channels
+    are HEADING (degrees, 0.0 without a gyro), LEFT and RIGHT (encoder counts), and the velocity and acceleration
+    of each side from a DerivativeEstimator (encoder counts scaled by distancePerTick)
+    """
+
+    def __init__(self, leftEncoder, rightEncoder, gyro=None, rate=200.0, size=1024, name=None,
+                 velocityWindow=15, distancePerTick=1.0):
+        """
+        :param name: prefix the sample timing is registered under in looptiming, or None to keep it out of
+                     looptiming (test and scratch samplers)
+        """
+        self.leftGet = leftEncoder.get
+        self.rightGet = rightEncoder.get
+        self.gyro = gyro
+        self.headingGet = gyro.getAngle if gyro is not None else None
+        self.period = 1.0 / rate
+        self.ring = SampleRing(7, size)
+        self.leftEstimator = DerivativeEstimator(velocityWindow, distancePerTick)
+        self.rightEstimator = DerivativeEstimator(velocityWindow, distancePerTick)
+        self.errors = 0
+        # sample() runs on the notifier, and from reset() on the thread that reset the encoders
+        self.lock = threading.Lock()
+
+        self.timer = looptiming.LoopTimer(size, self.period, self.period, self.period * 0.2)
+        prefix = name if name is not None else 'Sensors'
+        self.timer.durations.name = prefix + '.sample'
+        self.timer.periods.name = prefix + '.period'
+        if name is not None:
+            looptiming.timers[self.timer.durations.name] = self.timer.durations
+            looptiming.timers[self.timer.periods.name] = self.timer.periods
+        self.notifier = None
+        self.running = False
+
+    def hasHeading(self):
+        return self.headingGet is not None
+
+    def sample(self):
+        """
+        Take one sample, called by the notifier. Can be called directly for testing
+        """
+        self.timer.start()
+        with self.lock:
+            try:
+                heading = self.headingGet() if self.headingGet is not None else 0.0
+                left = self.leftGet()
+                right = self.rightGet()
+                timestamp = Timer.getFPGATimestamp()
+                leftEstimator = self.leftEstimator
+                rightEstimator = self.rightEstimator
+                leftEstimator.add(timestamp, left)
+                rightEstimator.add(timestamp, right)
+                self.ring.append(timestamp, (heading, left, right, leftEstimator.velocity,
+                                             rightEstimator.velocity, leftEstimator.acceleration,
+                                             rightEstimator.acceleration))
+            except Exception as e:
+                # keep the notifier alive, consumers keep the last good sample
+                if not self.errors:
+                    print("SensorSampler: Exception caught reading sensors. {}".format(e))
+                self.errors += 1
+        self.timer.stop()
+
+    def reset(self):
+        """
+        Start over after the encoders have been reset: the velocity fits forget the old counts and a fresh sample
+        is taken, so the newest sample is never from before the reset
+        """
+        with self.lock:
+            self.leftEstimator.reset()
+            self.rightEstimator.reset()
+        self.sample()
+
+    def isRunning(self):
+        return self.running
+
+    def start(self):
+        if self.running:
+            return
+        self.timer.restart()
+        self.sample()
+        if self.notifier is None:
+            self.notifier = wpilib.Notifier(self.sample)
+        self.running = True
+        self.notifier.startPeriodic(self.period)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.notifier.stop()
+        except AttributeError:
+            # the simulator frees every notifier itself at the end of a test, leaving nothing to stop
+            pass
+
+    def latest(self):
+        """
+        :return: (timestamp, channel values...) of the newest sample, or None before the first
+        """
+        return self.ring.latest()
+
+    def at(self, timestamp):
+        """
+        :return: (timestamp, channel values...) interpolated to the given FPGA time
+        """
+        return self.ring.at(timestamp)
+
+    def getChannel(self, channel):
+        """
+        :return: the newest value of one channel, 0.0 before the first sample
+        """
+        sample = self.ring.latest()
+        return sample[1 + channel] if sample is not None else 0.0
+
+    def getHeading(self):
+        return self.getChannel(HEADING)
+
+    def getLeftCount(self):
+        return self.getChannel(LEFT)
+
+    def getRightCount(self):
+        return self.getChannel(RIGHT)
+
+    def getLeftVelocity(self):
+        return self.getChannel(LEFT_VELOCITY)
+
+    def getRightVelocity(self):
+        return self.getChannel(RIGHT_VELOCITY)
+
+    def getLeftAcceleration(self):
+        return self.getChannel(LEFT_ACCELERATION)
+
+    def getRightAcceleration(self):
+        return self.getChannel(RIGHT_ACCELERATION)
@@ -1,64 +1,14 @@
-import math
+import threading
+
 import wpilib
 from wpilib.command.subsystem import Subsystem
-from wpilib import PIDController
-from wpilib.interfaces import PIDSource, PIDOutput
 
-import subsystems
 import robotmap
+import telemetry
 from commands.tankdriveteleopdefaultnfs import TankDriveTeleopDefaultNFS as TankDriveTeleopDefaultNFS
-
-
-class TankPID(PIDSource, PIDOutput):
-
-    def __init__(self, minSpeed=0.0):
-        self.minSpeed = minSpeed
-        pass
-
-    def getPIDSourceType(self):
-        return wpilib.pidcontroller.PIDController.PIDSourceType.kDisplacement
-
-    def setPIDSourceType(self, pidSource):
-        pass
-
-    def pidGet(self):
-        return subsystems.driveline.getPIDEncoderCount()
-
-    def pidWrite(self, output):
-        if math.fabs(output) < self.minSpeed:
-            if output < 0.0:
-                subsystems.driveline.driveRaw(-1.0 * self.minSpeed, -1.0 * self.minSpeed)
-            else:
-                subsystems.driveline.driveRaw(self.minSpeed, self.minSpeed)
-        else:
-            subsystems.driveline.driveRaw(output, output)
-
-
-class TankPIDTurn(PIDSource, PIDOutput):
-
-    def __init__(self, minSpeed, scaleSpeed):
-        self.scaleSpeed = scaleSpeed
-        self.minSpeed = minSpeed
-
-    def getPIDSourceType(self):
-        return wpilib.pidcontroller.PIDController.PIDSourceType.kDisplacement
-
-    def setPIDSourceType(self, pidSource):
-        pass
-
-    def pidGet(self):
-        return robotmap.sensors.ahrs.getYaw()
-
-    def pidWrite(self, output):
-        raw = math.fabs(output)
-        raw *= self.scaleSpeed
-        if raw < self.minSpeed:
-            raw = self.minSpeed
-
-        if output > 0.0:
-            subsystems.driveline.driveRaw(raw, -raw)
-        else:
-            subsystems.driveline.driveRaw(-raw, raw)
+from .drivepid import DrivePIDEngine
+from .motoroutput import MotorOutput, makeSpeedController
+from .sensorsampler import SensorSampler, makeGyro
 
 
 class TankDrive(Subsystem):
@@ -69,47 +19,18 @@ class TankDrive(Subsystem):
         self.debug = False
         self.logPrefix = "TankDrive: "
 
-        # Speed controllers
-        if robotmap.driveLine.speedControllerType == "VICTORSP":
-            try:
-                self.leftSpdCtrl = wpilib.VictorSP(robotmap.driveLine.leftMotorPort)
-                if robotmap.driveLine.invertLeft:
-                    self.leftSpdCtrl.setInverted(True)
-            except Exception as e:
-                print("{}Exception caught instantiating left speed controller. {}".format(self.logPrefix, e))
-                if not wpilib.DriverStation.getInstance().isFmsAttached():
-                    raise
-
-            try:
-                self.rightSpdCtrl = wpilib.VictorSP(robotmap.driveLine.rightMotorPort)
-                if robotmap.driveLine.invertRight:
-                    self.rightSpdCtrl.setInverted(True)
-            except Exception as e:
-                print("{}Exception caught instantiating right speed controller. {}".format(self.logPrefix, e))
-                if not wpilib.DriverStation.getInstance().isFmsAttached():
-                    raise
-        elif robotmap.driveLine.speedControllerType == "TALON":
-            try:
-                self.leftSpdCtrl = wpilib.Talon(robotmap.driveLine.leftMotorPort)
-                if robotmap.driveLine.invertLeft:
-                    self.leftSpdCtrl.setInverted(True)
-            except Exception as e:
-                print("{}Exception caught instantiating left speed controller. {}".format(self.logPrefix, e))
-                if not wpilib.DriverStation.getInstance().isFmsAttached():
-                    raise
-
-            try:
-                self.rightSpdCtrl = wpilib.Talon(robotmap.driveLine.rightMotorPort)
-                if robotmap.driveLine.invertRight:
-                    self.rightSpdCtrl.setInverted(True)
-            except Exception as e:
-                print("{}Exception caught instantiating right speed controller. {}".format(self.logPrefix, e))
-                if not wpilib.DriverStation.getInstance().isFmsAttached():
-                    raise
-        else:
-            print("{}Configured speed controller type in robotmap not recognized - {}".format(self.logPrefix, robotmap.driveLine.speedControllerType))
-            if not wpilib.DriverStation.getInstance().isFmsAttached():
-                raise RuntimeError('Driveline speed controller specified in robotmap not valid: ' + robotmap.driveLine.speedControllerType)
+        # Speed controllers, each side is a leader plus any followers
+        cfg = robotmap.driveLine
+        self.leftOutput = MotorOutput('left', [
+            makeSpeedController(cfg.speedControllerType, port, cfg.invertLeft, 'left', self.logPrefix)
+            for port in (cfg.leftMotorPort,) + tuple(cfg.leftFollowerPorts)], cfg.outputRefreshTicks)
+        self.rightOutput = MotorOutput('right', [
+            makeSpeedController(cfg.speedControllerType, port, cfg.invertRight, 'right', self.logPrefix)
+            for port in (cfg.rightMotorPort,) + tuple(cfg.rightFollowerPorts)], cfg.outputRefreshTicks)
+        self.leftSpdCtrl = self.leftOutput.leader
+        self.rightSpdCtrl = self.rightOutput.leader
+        # the drive PID engine drives from its notifier thread, so each pair of writes is made under this lock
+        self.outputLock = threading.Lock()
 
         # Encoders
         try:
@@ -130,12 +51,24 @@ class TankDrive(Subsystem):
             if not  wpilib.DriverStation.getInstance().isFmsAttached():
                 raise
 
-        # PID Setup
-        self.tankPID = TankPID()
-        self.pidController = PIDController(0.0, 0.0, 0.0, self.tankPID, self.tankPID)
+        # Sensors are sampled in the background, so commands never wait on the hardware
+        self.gyro = makeGyro(robotmap.sensors.gyroType, self.logPrefix)
+        self.sensors = SensorSampler(self.leftEncoder, self.rightEncoder, self.gyro, robotmap.sensors.rate,
+                                     robotmap.sensors.bufferSize, velocityWindow=robotmap.sensors.velocityWindow,
+                                     distancePerTick=robotmap.driveLine.inchesPerTick, name='Sensors')
+        self.sensors.start()
 
-        self.turnPID = TankPIDTurn(0.0, 0.5)
-        self.pidTurnController = PIDController(0.0, 0.0, 0.0, self.turnPID, self.turnPID)
+        # PID Setup
+        # TURN mode is only available with a gyro
+        cfg = robotmap.drivePID
+        heading = self.sensors.getHeading if self.sensors.hasHeading() else None
+        self.drivePID = DrivePIDEngine(self.leftEncoder, self.driveRaw, heading=heading, rate=cfg.rate,
+                                       name='DrivePID')
+        self.drivePID.setGains(DrivePIDEngine.DISTANCE, cfg.distanceP, cfg.distanceI, cfg.distanceD,
+                               cfg.distanceMinSpeed, cfg.distanceTolerance)
+        self.drivePID.setGains(DrivePIDEngine.TURN, cfg.turnP, cfg.turnI, cfg.turnD,
+                               cfg.turnMinSpeed, cfg.turnTolerance)
+        self.drivePID.turnScaleSpeed = cfg.turnScaleSpeed
 
     # ------------------------------------------------------------------------------------------------------------------
     def initDefaultCommand(self):
@@ -144,28 +77,54 @@ class TankDrive(Subsystem):
 
     def driveRaw(self, left, right):
         if self.debug:
-            if self.leftSpdCtrl:
-                self.leftSpdCtrl.set(0.0)
-            if self.rightSpdCtrl:
-                self.rightSpdCtrl.set(0.0)
-        else:
-            if self.leftSpdCtrl:
-                self.leftSpdCtrl.set(left)
-            if self.rightSpdCtrl:
-                self.rightSpdCtrl.set(right)
+            left = 0.0
+            right = 0.0
+        with self.outputLock:
+            self.leftOutput.set(left)
+            self.rightOutput.set(right)
 
     def stop(self):
-        if self.leftSpdCtrl:
-            self.leftSpdCtrl.set(0.0)
-        if self.rightSpdCtrl:
-            self.rightSpdCtrl.set(0.0)
+        with self.outputLock:
+            self.leftOutput.set(0.0)
+            self.rightOutput.set(0.0)
+
+    def getOutputStats(self):
+        return {'left': self.leftOutput.getStats(), 'right': self.rightOutput.getStats()}
+
+    def publishOutputStats(self):
+        for side, stats in self.getOutputStats().items():
+            telemetry.put("Drive/{}Writes".format(side), stats['writes'])
+            telemetry.put("Drive/{}Skipped".format(side), stats['skipped'])
+
+    def shutdown(self):
+        """
+        Stop the background sampling and control threads
+        """
+        self.drivePID.disable()
+        self.sensors.stop()
 
     def resetEncoders(self):
         self.leftEncoder.reset()
         self.rightEncoder.reset()
+        self.sensors.reset()
 
     def getAvgEncoder(self):
-        return int(round((self.leftEncoder.get() + self.rightEncoder.get()) / 2, 0))
+        return int(round((self.sensors.getLeftCount() + self.sensors.getRightCount()) / 2, 0))
 
     def getPIDEncoderCount(self):
-        return self.leftEncoder.get()
+        return int(self.sensors.getLeftCount())
+
+    def getHeading(self):
+        return self.sensors.getHeading()
+
+    def getLeftVelocity(self):
+        """
+        :return: inches / sec, estimated from the sampled encoder counts
+        """
+        return self.sensors.getLeftVelocity()
+
+    def getRightVelocity(self):
+        return self.sensors.getRightVelocity()
+
+    def getAvgVelocity(self):
+        return (self.sensors.getLeftVelocity() + self.sensors.getRightVelocity()) / 2
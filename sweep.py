@@ -0,0 +1,140 @@
+'''
+Parameter sweep harness for the NFS drive tuning
+
+Every combination in the grid is sent to a worker process, which applies it to robotmap.nfs / robotmap.oi, replays
+a set of scripted driver maneuvers through TankDriveTeleopDefaultNFS (see replay.py) and runs the resulting motor
+outputs through the tank model in tankphysics.py. Each maneuver is scored on how closely the robot's speed and
+turn rate follow what the driver asked for, plus a penalty for jerky output. Lower scores are better
+
+Run from the project root:
+    python sweep.py [workers]
+'''
+
+import itertools
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import robotmap
+import replay
+import tankphysics
+
+
+GRID = {
+    'lowTurnScale': (0.2, 0.3, 0.4),
+    'highTurnScale': (0.1, 0.2, 0.3),
+    'minTimeFullThrottleChange': (0.75, 1.5, 2.25),
+    'throttleFilterPower': (0.4, 1.0, 2.0),
+    'turnFilterPower': (0.4, 1.0, 2.0),
+}
+
+NFS_KEYS = ('lowTurnScale', 'highTurnScale', 'minTimeFullThrottleChange')
+OI_KEYS = ('throttleFilterPower', 'turnFilterPower')
+
+PERIOD = 0.02
+MAX_TURN_RATE = 360.0           # degrees / sec the driver expects from full turn at zero throttle
+JERK_WEIGHT = 0.5
+
+
+def _maneuver(seconds, func):
+    ticks = int(seconds / PERIOD)
+    throttle = []
+    turn = []
+    slow = []
+    for i in range(ticks):
+        t, r, s = func(i * PERIOD)
+        throttle.append(t)
+        turn.append(r)
+        slow.append(s)
+    return {'timestamp': [i * PERIOD for i in range(ticks)], 'rawThrottle': throttle, 'rawTurn': turn,
+            'driveSlow': slow}
+
+
+MANEUVERS = {
+    'launch': _maneuver(3.0, lambda t: (1.0 if t > 0.2 else 0.0, 0.0, False)),
+    'arc': _maneuver(4.0, lambda t: (0.8, 0.6 if t > 1.0 else 0.0, False)),
+    'slalom': _maneuver(6.0, lambda t: (0.7, math.sin(t * 2.0), False)),
+    'spin': _maneuver(3.0, lambda t: (0.0, 1.0 if t < 1.5 else -1.0, False)),
+    'reverseArc': _maneuver(4.0, lambda t: (-0.6, 0.8 if t > 0.5 else 0.0, True)),
+}
+
+
+def intent(throttle, turn, params):
+    """
+    What the driver is asking for: (speed, turn rate). Turning eases off as throttle goes up, like a car
+    """
+    return throttle * params.maxSpeed, turn * MAX_TURN_RATE * (1.0 - 0.5 * abs(throttle))
+
+
+def scoreManeuver(log, trace, params):
+    state = tankphysics.TankState()
+    speedError = 0.0
+    turnError = 0.0
+    jerk = 0.0
+    lastLeft = 0.0
+    lastRight = 0.0
+
+    for i in range(len(log['rawThrottle'])):
+        left = trace['adjustedLeft'][i]
+        right = trace['adjustedRight'][i]
+        tankphysics.step(state, left, right, PERIOD, params)
+
+        wantSpeed, wantTurn = intent(log['rawThrottle'][i], log['rawTurn'][i], params)
+        speedError += ((state.speed() - wantSpeed) / params.maxSpeed) ** 2
+        turnError += ((state.turnRate(params) - wantTurn) / MAX_TURN_RATE) ** 2
+        jerk += abs(left - lastLeft) + abs(right - lastRight)
+        lastLeft = left
+        lastRight = right
+
+    ticks = len(log['rawThrottle'])
+    return math.sqrt(speedError / ticks) + math.sqrt(turnError / ticks) + JERK_WEIGHT * jerk / ticks
+
+
+def applyConfig(config):
+    robotmap.nfs = robotmap.nfs.replace(**{key: config[key] for key in NFS_KEYS if key in config})
+    robotmap.oi = robotmap.oi.replace(**{key: config[key] for key in OI_KEYS if key in config})
+
+
+def evaluate(config):
+    """
+    Score one configuration on every maneuver. Runs in a worker process, so changing the config is safe
+    :return: (total score, config, dict of maneuver name to score)
+    """
+    applyConfig(config)
+    params = tankphysics.TankModelParams()
+    scores = {}
+    for name, log in MANEUVERS.items():
+        scores[name] = scoreManeuver(log, replay.replayLog(log), params)
+    return sum(scores.values()), config, scores
+
+
+def configurations(grid=GRID):
+    keys = list(grid.keys())
+    for values in itertools.product(*(grid[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+def runSweep(grid=GRID, workers=None):
+    """
+    :return: list of (total score, config, maneuver scores), best first
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(evaluate, configurations(grid), chunksize=8))
+    results.sort(key=lambda result: result[0])
+    return results
+
+
+def printTable(results, count=20):
+    keys = list(results[0][1].keys())
+    maneuvers = list(results[0][2].keys())
+    print(" rank   score  " + "".join("{:>10}".format(key[:9]) for key in keys) +
+          "".join("{:>11}".format(name[:10]) for name in maneuvers))
+    for rank, (score, config, scores) in enumerate(results[:count], 1):
+        print("{:>5}{:>8.3f}  ".format(rank, score) +
+              "".join("{:>10.2f}".format(config[key]) for key in keys) +
+              "".join("{:>11.3f}".format(scores[name]) for name in maneuvers))
+
+
+if __name__ == '__main__':
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    printTable(runSweep(workers=workers))
@@ -0,0 +1,82 @@
+'''
+Simple physics model of a two motor tank (skid steer) drivetrain
+
+Each side's speed follows its motor output with a first order lag, and the difference between the two sides
+turns the robot. The model has no wpilib dependency: step() can be called directly for headless runs, and
+physics.py uses it to drive the pyfrc simulator
+'''
+
+import math
+
+import robotmap
+
+
+class TankModelParams:
+
+    def __init__(self, maxSpeed=None, timeConstant=None, trackWidth=None, deadband=None, inchesPerTick=None):
+        cfg = robotmap.physics
+        self.maxSpeed = cfg.maxSpeed if maxSpeed is None else maxSpeed
+        self.timeConstant = cfg.timeConstant if timeConstant is None else timeConstant
+        self.trackWidth = cfg.trackWidth if trackWidth is None else trackWidth
+        self.deadband = cfg.deadband if deadband is None else deadband
+        self.inchesPerTick = robotmap.driveLine.inchesPerTick if inchesPerTick is None else inchesPerTick
+
+
+class TankState:
+    """
+    Distances and speeds are in inches and inches/sec, heading in degrees with clockwise positive
+    """
+    __slots__ = ('leftSpeed', 'rightSpeed', 'leftDistance', 'rightDistance', 'heading', 'x', 'y')
+
+    def __init__(self):
+        self.leftSpeed = 0.0
+        self.rightSpeed = 0.0
+        self.leftDistance = 0.0
+        self.rightDistance = 0.0
+        self.heading = 0.0
+        self.x = 0.0
+        self.y = 0.0
+
+    def speed(self):
+        return (self.leftSpeed + self.rightSpeed) / 2
+
+    def turnRate(self, params):
+        """
+        :return: degrees per second, clockwise positive
+        """
+        return math.degrees((self.leftSpeed - self.rightSpeed) / params.trackWidth)
+
+    def leftCount(self, params):
+        return int(self.leftDistance / params.inchesPerTick)
+
+    def rightCount(self, params):
+        return int(self.rightDistance / params.inchesPerTick)
+
+
+def _applyDeadband(output, deadband):
+    if abs(output) <= deadband:
+        return 0.0
+    return math.copysign((abs(output) - deadband) / (1 - deadband), output)
+
+
+def step(state, left, right, dt, params):
+    """
+    Advance the model by dt seconds with the given motor outputs (-1.0 to 1.0)
+    :return: (distance moved, heading change in degrees) for the step
+    """
+    blend = 1.0 - math.exp(-dt / params.timeConstant)
+    state.leftSpeed += (_applyDeadband(left, params.deadband) * params.maxSpeed - state.leftSpeed) * blend
+    state.rightSpeed += (_applyDeadband(right, params.deadband) * params.maxSpeed - state.rightSpeed) * blend
+
+    leftMove = state.leftSpeed * dt
+    rightMove = state.rightSpeed * dt
+    state.leftDistance += leftMove
+    state.rightDistance += rightMove
+
+    distance = (leftMove + rightMove) / 2
+    turn = math.degrees((leftMove - rightMove) / params.trackWidth)
+    heading = math.radians(state.heading + turn / 2)
+    state.x += distance * math.cos(heading)
+    state.y += distance * math.sin(heading)
+    state.heading += turn
+    return distance, turn
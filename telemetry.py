@@ -0,0 +1,103 @@
+'''
+Decimated, change detecting SmartDashboard publisher
+
+Commands call telemetry.put() as often as they like - it only stores the latest value in a dict. A background
+thread wakes up every robotmap.telemetry.period seconds, publishes only the values that changed by more than
+robotmap.telemetry.epsilon since they were last sent, and flushes NetworkTables once for the whole batch.
+The cost on the control loop stays flat no matter how many signals are added
+
+Keys can be grouped with a slash, for example "NFS/Throttle"
+'''
+
+import threading
+
+from networktables import NetworkTables
+from wpilib import SmartDashboard
+
+import robotmap
+
+
+values = {}
+published = {}
+publishCount = 0
+skipCount = 0
+
+_thread = None
+_stopEvent = threading.Event()
+
+
+def put(key, value):
+    """
+    Store the latest value for a key, to be published by the background thread
+    Numbers, booleans and strings are supported
+    """
+    values[key] = value
+
+
+def flush():
+    """
+    Publish every value that changed since the last flush as a single NetworkTables batch
+    Normally called by the background thread, but can be called directly (tests, or when the thread isn't running)
+    :return: the number of values published
+    """
+    global publishCount
+    global skipCount
+
+    epsilon = robotmap.telemetry.epsilon
+    count = 0
+
+    # dict.copy is atomic under the GIL, so this is safe while the control loop keeps calling put()
+    for key, value in values.copy().items():
+        last = published.get(key)
+        if isinstance(value, bool) or isinstance(value, str):
+            if last == value:
+                skipCount += 1
+                continue
+            if isinstance(value, bool):
+                SmartDashboard.putBoolean(key, value)
+            else:
+                SmartDashboard.putString(key, value)
+        else:
+            if last is not None and abs(value - last) <= epsilon:
+                skipCount += 1
+                continue
+            SmartDashboard.putNumber(key, value)
+
+        published[key] = value
+        count += 1
+
+    if count:
+        NetworkTables.flush()
+    publishCount += count
+    return count
+
+
+def _run():
+    while not _stopEvent.wait(robotmap.telemetry.period):
+        try:
+            flush()
+        except Exception as e:
+            print("Telemetry: exception caught publishing values. {}".format(e))
+
+
+def init():
+    """
+    Start the background publisher. Safe to call more than once
+    """
+    global _thread
+
+    if not robotmap.telemetry.enabled or (_thread is not None and _thread.is_alive()):
+        return
+
+    _stopEvent.clear()
+    _thread = threading.Thread(target=_run, name='Telemetry', daemon=True)
+    _thread.start()
+
+
+def stop():
+    global _thread
+
+    _stopEvent.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
@@ -0,0 +1,131 @@
+'''
+Per tick drive state streamed over UDP
+
+NetworkTables is decimated and change detected (see telemetry.py), which is right for the dashboard but loses the
+tick by tick detail needed to chase a control problem. When robotmap.stream.enabled is set, the drive command
+sends one fixed size packet per tick to robotmap.stream.host:port: the driver inputs, the mixer and rate limiter
+outputs, and the newest sensor sample. The socket is non-blocking and the packet is packed into a preallocated
+buffer, so a send costs one syscall and never waits - if the network stack can't take a packet it is counted as
+dropped on the robot and the loop moves on
+
+Every packet carries a sequence number, so the receiver (streamreceiver.py) can count what was lost on the way,
+and a random session id picked when the streamer opens, so the receiver can tell the robot code restarting (the
+sequence starting again from 0) from packets arriving late
+
+Packet layout (little endian), see FIELDS:
+    magic, version, flags (bit 0 - driveSlow), session, sequence, timestamp, sensor sample timestamp,
+    rawThrottle, rawTurn, throttle, turn, targetLeft, targetRight, adjustedLeft, adjustedRight,
+    heading, leftCount, rightCount, leftVelocity, rightVelocity
+'''
+
+import random
+import socket
+import struct
+
+import robotmap
+
+
+MAGIC = b'NS'
+VERSION = 2
+PACKET = struct.Struct('<2sBBIIdd13f')
+HEADER = struct.Struct('<II')
+HEADER_OFFSET = 4
+FLAG_DRIVE_SLOW = 0x01
+
+FIELDS = (
+    ('magic', 'S2'),
+    ('version', 'u1'),
+    ('flags', 'u1'),
+    ('session', '<u4'),
+    ('sequence', '<u4'),
+    ('timestamp', '<f8'),
+    ('sensorTimestamp', '<f8'),
+    ('rawThrottle', '<f4'),
+    ('rawTurn', '<f4'),
+    ('throttle', '<f4'),
+    ('turn', '<f4'),
+    ('targetLeft', '<f4'),
+    ('targetRight', '<f4'),
+    ('adjustedLeft', '<f4'),
+    ('adjustedRight', '<f4'),
+    ('heading', '<f4'),
+    ('leftCount', '<f4'),
+    ('rightCount', '<f4'),
+    ('leftVelocity', '<f4'),
+    ('rightVelocity', '<f4'),
+)
+
+
+class TelemetryStreamer:
+
+    def __init__(self, host, port):
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.buffer = bytearray(PACKET.size)
+        self.session = random.getrandbits(32)
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, timestamp, driveSlow, rawThrottle, rawTurn, throttle, turn, targetLeft, targetRight,
+             adjustedLeft, adjustedRight, sample=None):
+        """
+        Send one tick
+
+        :param sample: newest sensor sample, (timestamp, heading, left, right, leftVelocity, rightVelocity, ...)
+                       as returned by SensorSampler.latest(), or None
+        """
+        if sample is not None:
+            PACKET.pack_into(self.buffer, 0, MAGIC, VERSION, FLAG_DRIVE_SLOW if driveSlow else 0, self.session,
+                             self.sequence, timestamp, sample[0], rawThrottle, rawTurn, throttle, turn, targetLeft,
+                             targetRight, adjustedLeft, adjustedRight, sample[1], sample[2], sample[3], sample[4],
+                             sample[5])
+        else:
+            PACKET.pack_into(self.buffer, 0, MAGIC, VERSION, FLAG_DRIVE_SLOW if driveSlow else 0, self.session,
+                             self.sequence, timestamp, 0.0, rawThrottle, rawTurn, throttle, turn, targetLeft,
+                             targetRight, adjustedLeft, adjustedRight, 0.0, 0.0, 0.0, 0.0, 0.0)
+        # the sequence moves on even if the send fails, so the receiver sees the gap
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        try:
+            self.socket.sendto(self.buffer, self.address)
+            self.sent += 1
+        except OSError:
+            # BlockingIOError when the send buffer is full, or no route while the network comes up
+            self.dropped += 1
+
+    def close(self):
+        self.socket.close()
+
+
+streamer = None
+
+
+def init():
+    """
+    Open the stream from robotmap.stream if it's enabled. A failure is reported, it never stops the robot
+    """
+    global streamer
+
+    if not robotmap.stream.enabled or streamer is not None:
+        return
+
+    try:
+        streamer = TelemetryStreamer(robotmap.stream.host, robotmap.stream.port)
+    except Exception as e:
+        print("TelemetryStreamer: unable to open the stream to {}:{}. {}".format(robotmap.stream.host,
+                                                                                robotmap.stream.port, e))
+
+
+def loadArrays(path):
+    """
+    Read a file written by streamreceiver.py into NumPy arrays, in the order the packets arrived
+
+    :return: dict of field name to array, see FIELDS
+    """
+    import numpy as np
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = np.frombuffer(data, dtype=np.dtype(list(FIELDS)), count=len(data) // PACKET.size)
+    return {name: records[name].copy() for name, _ in FIELDS if name != 'magic'}
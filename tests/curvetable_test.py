@@ -0,0 +1,32 @@
+'''
+    Checks the precomputed curve tables stay close to the reference shaping functions in oi.py
+'''
+
+import oi
+from curvetable import CurveTable, CachedCurve
+
+
+def test_table_matches_reference():
+    table = CurveTable(oi.filterInputToPower, 0.05, (0.4,))
+    for i in range(-1000, 1001):
+        val = i / 1000.0
+        # the first interval past the dead zone is where a fractional power is steepest
+        tolerance = 1e-2 if abs(val) < 0.06 else 1e-3
+        assert abs(table.lookup(val) - oi.filterInputToPower(val, 0.05, 0.4)) < tolerance
+
+    assert table.lookup(0.04) == 0.0
+    assert table.lookup(-0.04) == 0.0
+    assert table.lookup(1.0) == 1.0
+    assert table.lookup(-1.0) == -1.0
+    assert table.lookup(1.2) == 1.0
+
+
+def test_cached_curve_rebuilds_only_on_change():
+    curve = CachedCurve(oi.filterInputToPower)
+    assert curve.update(0.05, 0.4)
+    assert not curve.update(0.05, 0.4)
+    assert curve.builds == 1
+
+    assert curve.update(0.1, 0.4)
+    assert curve.builds == 2
+    assert curve.lookup(0.09) == 0.0
@@ -0,0 +1,59 @@
+'''
+    Sliding window velocity and acceleration estimates
+'''
+
+import random
+
+import pytest
+
+from derivativeestimator import DerivativeEstimator, estimateBatch
+
+
+def jitteredTimes(count, period=0.005, start=120.0):
+    rng = random.Random(279)
+    times = []
+    t = start
+    for _ in range(count):
+        t += period + rng.uniform(-0.2, 0.2) * period
+        times.append(t)
+    return times
+
+
+def test_quadratic_motion_is_exact():
+    times = jitteredTimes(500)
+    estimator = DerivativeEstimator(window=15, scale=2.0)
+    for t in times:
+        estimator.add(t, 3.0 * t * t - 40.0 * t + 10000.0)
+
+    # the sums are rebuilt every window samples, so there is no drift even late in a long run
+    assert estimator.velocity == pytest.approx(2.0 * (6.0 * times[-1] - 40.0), abs=1e-6)
+    assert estimator.acceleration == pytest.approx(2.0 * 6.0, abs=1e-5)
+
+
+def test_short_history_and_bad_window():
+    estimator = DerivativeEstimator(window=5)
+    estimator.add(1.0, 10.0)
+    assert estimator.velocity == 0.0
+    estimator.add(1.5, 12.0)
+    assert estimator.velocity == pytest.approx(4.0)
+    assert estimator.acceleration == 0.0
+
+    with pytest.raises(ValueError):
+        DerivativeEstimator(window=2)
+
+
+def test_batch_matches_incremental():
+    np = pytest.importorskip('numpy')
+    times = jitteredTimes(300)
+    rng = np.random.default_rng(279)
+    values = [50.0 * t + 0.5 * v for t, v in zip(times, rng.normal(size=len(times)))]
+
+    estimator = DerivativeEstimator(window=9)
+    expected = []
+    for t, y in zip(times, values):
+        estimator.add(t, y)
+        expected.append((estimator.velocity, estimator.acceleration))
+
+    velocity, acceleration = estimateBatch(times, values, window=9)
+    assert velocity == pytest.approx([v for v, _ in expected], abs=1e-6)
+    assert acceleration == pytest.approx([a for _, a in expected], abs=1e-4)
@@ -0,0 +1,96 @@
+'''
+    Checks each drive mode's mixing and switching modes while the drive command runs
+'''
+
+import pytest
+
+import drivemodes
+import oi
+import robotmap
+import replay
+import subsystems
+from nfsmixer import nfsMix
+
+
+@pytest.fixture
+def restoreMode():
+    saved = drivemodes.mode
+    yield
+    drivemodes.setMode(saved)
+
+
+def test_nfs_uses_turn_scale_for_slow(restoreMode):
+    drivemodes.setMode('nfs')
+    assert drivemodes.mixer(0.5, 0.5, 0.0, False) == nfsMix(0.5, 0.5, robotmap.nfs.lowTurnScale)
+    assert drivemodes.mixer(0.5, 0.5, 0.0, True) == nfsMix(0.5, 0.5, robotmap.nfs.highTurnScale)
+
+
+def test_arcade_normalizes(restoreMode):
+    drivemodes.setMode('arcade')
+    assert drivemodes.mixer(0.5, 0.25, 0.0, False) == (0.75, 0.25)
+    assert drivemodes.mixer(1.0, 1.0, 0.0, False) == (1.0, 0.0)
+    assert drivemodes.mixer(0.0, -1.0, 0.0, False) == (-1.0, 1.0)
+
+
+def test_curvature_scales_turn_by_throttle(restoreMode):
+    drivemodes.setMode('curvature')
+    assert drivemodes.mixer(0.5, 0.5, 0.0, False) == (0.75, 0.25)
+    # quick turn spins in place below the threshold
+    assert drivemodes.mixer(0.0, 0.5, 0.0, False) == (0.5, -0.5)
+
+
+def test_tank_uses_each_stick(restoreMode):
+    drivemodes.setMode('tank')
+    # the right stick comes in raw and gets the throttle shaping and slow scaling here
+    right = oi.throttleCurve.lookup(-0.25)
+    assert drivemodes.mixer(0.5, 1.0, -0.25, False) == (0.5, right)
+    assert drivemodes.mixer(0.5, 1.0, -0.25, True) == (0.5, right * robotmap.nfs.slowDriveSpeedFactor)
+
+
+def test_unknown_mode(restoreMode):
+    with pytest.raises(ValueError):
+        drivemodes.setMode('hovercraft')
+    assert drivemodes.mixer is not None
+
+
+def test_refresh_binds_config(restoreMode, monkeypatch):
+    drivemodes.setMode('curvature')
+    monkeypatch.setattr(robotmap, 'driveLine', robotmap.driveLine.replace(quickTurnThreshold=0.6))
+    assert drivemodes.mixer(0.5, 0.5, 0.0, False) == (0.75, 0.25)
+    drivemodes.refresh()
+    assert drivemodes.mixer(0.5, 0.5, 0.0, False) == (1.0, 0.0)
+
+
+def test_switch_while_running(restoreMode, monkeypatch):
+    from commands.tankdriveteleopdefaultnfs import TankDriveTeleopDefaultNFS
+
+    monkeypatch.setattr(subsystems, 'driveline', replay.ReplayDriveline())
+    drivemodes.setMode('nfs')
+    command = TankDriveTeleopDefaultNFS()
+    log = {'rawThrottle': [0.5] * 100, 'rawTurn': [0.5] * 100}
+    nfsTrace = replay.replayLog(log, command)
+
+    # the same command instance picks up the new mixer
+    drivemodes.setMode('arcade')
+    arcadeTrace = replay.replayLog(log, command)
+    throttle = oi.throttleCurve.lookup(0.5)
+    turn = oi.turnCurve.lookup(0.5)
+    assert (nfsTrace['targetLeft'][-1], nfsTrace['targetRight'][-1]) == \
+        nfsMix(throttle, turn, robotmap.nfs.lowTurnScale)
+    assert (arcadeTrace['targetLeft'][-1], arcadeTrace['targetRight'][-1]) == \
+        drivemodes.arcadeMode()(throttle, turn, 0.0, False)
+    assert nfsTrace['targetLeft'][-1] != arcadeTrace['targetLeft'][-1]
+
+
+def test_tank_mode_drives_each_side(control, fake_time, robot, hal_data, restoreMode):
+    sticks = hal_data['joysticks']
+    sticks[0]['axes'][1] = -1.0     # left stick forward
+    sticks[1]['axes'][1] = 1.0      # right stick back
+
+    drivemodes.setMode('tank')
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 3)
+
+    assert oi.frame.rightThrottle == -1.0
+    assert hal_data['pwm'][0]['value'] == 1.0
+    assert hal_data['pwm'][1]['value'] == -1.0
@@ -0,0 +1,128 @@
+'''
+    Steps the drive PID engine against a fake encoder, and runs it on its notifier in simulation
+'''
+
+import pytest
+
+from subsystems.drivepid import DrivePIDEngine
+
+
+class FakeEncoder:
+
+    def __init__(self):
+        self.count = 0
+
+    def get(self):
+        return self.count
+
+
+class FakeDrive:
+
+    def __init__(self):
+        self.left = None
+        self.right = None
+        self.calls = 0
+
+    def __call__(self, left, right):
+        self.left = left
+        self.right = right
+        self.calls += 1
+
+
+def test_distance_step():
+    encoder = FakeEncoder()
+    drive = FakeDrive()
+    engine = DrivePIDEngine(encoder, drive)
+    engine.setGains(DrivePIDEngine.DISTANCE, 0.01, 0.0, 0.0, minSpeed=0.2, tolerance=5)
+
+    engine.step()
+    assert drive.calls == 0             # no setpoint yet
+
+    engine.setSetpoint(DrivePIDEngine.DISTANCE, 500)
+    engine.step()
+    assert drive.left == drive.right == 1.0
+
+    encoder.count = 490
+    engine.step()
+    assert drive.left == drive.right == 0.2     # held at the minimum speed
+
+    encoder.count = 498
+    engine.step()
+    assert drive.left == drive.right == 0.0
+    assert engine.onTarget()
+
+    encoder.count = 600
+    engine.step()
+    assert drive.left == drive.right == -1.0
+
+
+def test_on_target_uses_the_current_setpoint():
+    encoder = FakeEncoder()
+    engine = DrivePIDEngine(encoder, FakeDrive())
+    engine.setGains(DrivePIDEngine.DISTANCE, 0.01, 0.0, 0.0, tolerance=5)
+    assert not engine.onTarget()
+
+    engine.setSetpoint(DrivePIDEngine.DISTANCE, 0)
+    engine.step()
+    assert engine.onTarget()
+
+    # a new target isn't reached just because the last step was on the old one
+    engine.setSetpoint(DrivePIDEngine.DISTANCE, 500)
+    assert not engine.onTarget()
+    encoder.count = 498
+    assert engine.onTarget()
+
+
+def test_default_tolerance_settles():
+    import robotmap
+
+    # DriveProfiled finishes on onTarget, a zero tolerance would leave it waiting for its timeout
+    cfg = robotmap.drivePID
+    assert cfg.distanceTolerance > 0.0 and cfg.turnTolerance > 0.0
+
+    encoder = FakeEncoder()
+    engine = DrivePIDEngine(encoder, FakeDrive())
+    engine.setGains(DrivePIDEngine.DISTANCE, 0.01, 0.0, 0.0, tolerance=cfg.distanceTolerance)
+    engine.setSetpoint(DrivePIDEngine.DISTANCE, 500)
+    encoder.count = 500 - int(0.5 / robotmap.driveLine.inchesPerTick)
+    engine.step()
+    assert engine.onTarget()
+
+
+def test_turn_needs_heading():
+    engine = DrivePIDEngine(FakeEncoder(), FakeDrive())
+    with pytest.raises(RuntimeError):
+        engine.setSetpoint(DrivePIDEngine.TURN, 90.0)
+
+
+def test_engine_runs_on_notifier(control, fake_time, robot):
+    encoder = FakeEncoder()
+    drive = FakeDrive()
+    engine = DrivePIDEngine(encoder, drive, rate=200.0)
+    engine.setGains(DrivePIDEngine.DISTANCE, 0.001, 0.0, 0.0)
+    engine.setSetpoint(DrivePIDEngine.DISTANCE, 100)
+
+    control.set_autonomous(enabled=False)
+
+    engine.enable()
+    assert engine.isEnabled()
+    try:
+        control.run_test(lambda tm: tm < 1)
+    finally:
+        engine.disable()
+    assert not engine.isEnabled()
+
+    stats = engine.getStats()
+    assert stats['step']['count'] > 150
+    assert drive.left == drive.right == 0.0
+
+
+def test_only_named_engines_are_timed():
+    import looptiming
+
+    engine = DrivePIDEngine(FakeEncoder(), FakeDrive())
+    assert engine.timer.durations not in looptiming.timers.values()
+
+    named = DrivePIDEngine(FakeEncoder(), FakeDrive(), name='TestPID')
+    assert looptiming.timers.pop('TestPID.step') is named.timer.durations
+    assert looptiming.timers.pop('TestPID.period') is named.timer.periods
@@ -0,0 +1,70 @@
+'''
+    Collection is held off during a match and only run in spare loop time
+'''
+
+import gc
+
+import gcmanager
+from gcmanager import GCManager
+
+
+def unfreeze():
+    # objects frozen by a test would otherwise never be collected for the rest of the session
+    if hasattr(gc, 'unfreeze'):
+        gc.unfreeze()
+
+
+def makeGarbage(count):
+    for _ in range(count):
+        a = []
+        a.append(a)
+
+
+def test_collects_only_in_spare_time():
+    manager = GCManager('managed', spareTime=0.005, youngThreshold=100, matchGeneration=0)
+    manager.install()
+    try:
+        manager.freeze()
+        manager.enterMatch()
+        assert not gc.isenabled()
+
+        makeGarbage(500)
+        # a loop that used most of its period leaves no room for a collection
+        assert not manager.collectSpare(18000000, 20000000)
+        assert manager.collectSpare(2000000, 20000000)
+        assert manager.collections[0] == 1
+        assert manager.pauses.count == 2     # the freeze and the spare time collection
+
+        manager.exitMatch()
+        assert gc.isenabled()
+        manager.disabledPeriodic()
+        assert manager.collections[2] >= 1
+        assert not manager.fullCollectPending
+    finally:
+        manager.exitMatch()
+        manager.uninstall()
+        unfreeze()
+
+
+def test_auto_mode_leaves_collector_alone():
+    manager = GCManager('auto')
+    manager.enterMatch()
+    assert gc.isenabled()
+    makeGarbage(1000)
+    assert not manager.collectSpare(0, 20000000)
+
+
+def test_teleop_runs_without_automatic_collection(control, fake_time, robot):
+    try:
+        control.set_operator_control(enabled=True)
+        control.run_test(lambda tm: tm < 2)
+
+        assert not gc.isenabled()
+        # the only full collection is the one that froze the robot after robotInit
+        stats = gcmanager.manager.getStats()
+        assert stats['collections'][2] == 1
+    finally:
+        if gcmanager.manager is not None:
+            gcmanager.manager.exitMatch()
+        gc.enable()
+        unfreeze()
@@ -0,0 +1,80 @@
+'''
+    Traces driver station packets through the drive path in simulated teleop
+'''
+
+import wpilib
+
+import latencytrace
+import looptiming
+import robotmap
+from latencytrace import LatencyTracer, PACKET, READ, FILTER, MIX, SLEW
+
+
+def test_stage_times():
+    tracer = LatencyTracer(16)
+    tracer.markRead()
+    for stage in (FILTER, MIX, SLEW):
+        tracer.mark(stage)
+    tracer.markOutput()
+
+    # no packet has been timestamped yet, so only the stages after the read are recorded
+    assert [buffer.count for buffer in tracer.buffers] == [0, 1, 1, 1, 1]
+    assert tracer.total.count == 0
+
+    tracer.packetNs = tracer.marks[READ] - 5000000
+    tracer.markRead()
+    for stage in (FILTER, MIX, SLEW):
+        tracer.mark(stage)
+    tracer.markOutput()
+    assert tracer.marks[PACKET] == tracer.packetNs
+    assert [buffer.count for buffer in tracer.buffers] == [1, 2, 2, 2, 2]
+    assert tracer.buffers[0].samples[0] >= 5000000
+    assert tracer.total.samples[0] >= tracer.buffers[0].samples[0]
+    for buffer in tracer.buffers:
+        assert all(ns >= 0 for ns in buffer.samples[:buffer.count])
+
+
+def test_teleop_traced(control, fake_time, robot, hal_data, monkeypatch):
+    monkeypatch.setattr(robotmap, 'latency', robotmap.latency.replace(enabled=True))
+    hal_data['joysticks'][0]['axes'][1] = -1.0
+
+    try:
+        control.set_operator_control(enabled=True)
+        control.run_test(lambda tm: tm < 2)
+
+        tracer = latencytrace.tracer
+        assert tracer is not None
+        assert tracer.ticks > 50
+        stats = tracer.getStats()
+        assert set(stats) == {'read', 'filter', 'mix', 'slew', 'output', 'total'}
+        assert stats['output']['count'] == tracer.ticks
+        assert stats['total']['count'] > 0
+        for buffer in tracer.buffers + [tracer.total]:
+            assert all(ns >= 0 for ns in buffer.samples[:min(buffer.count, buffer.size)])
+    finally:
+        monkeypatch.undo()
+        latencytrace.init()
+    assert latencytrace.tracer is None
+
+
+def test_switching_off_restores_the_driver_station(control, fake_time, robot, monkeypatch):
+    driverStation = wpilib.DriverStation.getInstance()
+    monkeypatch.setattr(robotmap, 'latency', robotmap.latency.replace(enabled=True))
+    try:
+        latencytrace.init()
+        tracer = latencytrace.tracer
+        assert '_getData' in vars(driverStation)
+        assert 'Latency.total' in looptiming.timers
+
+        # a second enable keeps the running tracer
+        latencytrace.init()
+        assert latencytrace.tracer is tracer
+    finally:
+        monkeypatch.undo()
+
+    # the next enable with tracing switched off puts the DriverStation back
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 0.5)
+    assert latencytrace.tracer is None
+    assert '_getData' not in vars(driverStation)
+    assert 'Latency.total' not in looptiming.timers
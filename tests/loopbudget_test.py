@@ -0,0 +1,86 @@
+'''
+    Deferrable work is shed when loops run long and comes back once they recover
+'''
+
+import loopbudget
+import robotmap
+import telemetry
+from loopbudget import LoopBudget
+
+
+def test_sheds_in_order_and_recovers():
+    budget = LoopBudget(('debug', 'diagnostics', 'logging'), 0.015, 0.010, 3)
+
+    budget.update(5000000)
+    assert budget.allows('debug')
+
+    budget.update(20000000)
+    assert not budget.allows('debug')
+    assert budget.allows('diagnostics')
+
+    budget.update(20000000)
+    assert not budget.allows('diagnostics')
+    assert budget.allows('logging')
+
+    # in between the thresholds doesn't count towards recovering
+    for _ in range(2):
+        budget.update(5000000)
+    budget.update(12000000)
+    budget.update(5000000)
+    assert not budget.allows('diagnostics')
+
+    # recovery brings categories back one at a time, most recently shed first
+    for _ in range(2):
+        budget.update(5000000)
+    assert budget.allows('diagnostics')
+    assert not budget.allows('debug')
+    for _ in range(3):
+        budget.update(5000000)
+    assert budget.allows('debug')
+
+    stats = budget.getStats()
+    assert stats['debug'] == {'shed': 1, 'skipped': 2, 'shedNow': False}
+    assert stats['logging']['shed'] == 0
+    assert [event[1:3] for event in budget.events] == [('debug', 'shed'), ('diagnostics', 'shed'),
+                                                       ('diagnostics', 'restored'), ('debug', 'restored')]
+
+
+def test_teleop_skips_debug_writes_while_shed(control, fake_time, robot, monkeypatch):
+    monkeypatch.setattr(robotmap, 'nfs', robotmap.nfs.replace(debugTurning=True))
+    telemetry.values.pop("NFS/Throttle", None)
+    budget = loopbudget.budget
+    budget.enabled = False
+    budget.allowed['debug'] = False
+    skipped = budget.skipped['debug']
+
+    try:
+        control.set_operator_control(enabled=True)
+        control.run_test(lambda tm: tm < 1)
+    finally:
+        budget.enabled = True
+        budget.reset()
+
+    assert "NFS/Throttle" not in telemetry.values
+    assert budget.skipped['debug'] > skipped
+
+
+def test_unlisted_categories_are_never_shed():
+    budget = LoopBudget(('debug',), 0.015, 0.010, 3)
+    for _ in range(3):
+        budget.update(20000000)
+    assert not budget.allows('debug')
+    assert budget.allows('logging')
+    assert budget.allows('diagnostics')
+    assert set(budget.getStats()) == {'debug'}
+
+
+def test_teleop_runs_with_a_shortened_shed_order(control, fake_time, robot, monkeypatch):
+    monkeypatch.setattr(robotmap, 'nfs', robotmap.nfs.replace(debugTurning=True))
+    monkeypatch.setattr(robotmap, 'budget', robotmap.budget.replace(shedOrder=('diagnostics',)))
+    monkeypatch.setattr(loopbudget, 'budget', LoopBudget(robotmap.budget.shedOrder, 0.015, 0.010, 3))
+    telemetry.values.pop("NFS/Throttle", None)
+
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 1)
+
+    assert "NFS/Throttle" in telemetry.values
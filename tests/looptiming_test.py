@@ -0,0 +1,51 @@
+'''
+    Loop timing ring buffers and the timing collected during a simulated teleop run
+'''
+
+import looptiming
+import robotmap
+from looptiming import TimingBuffer
+
+
+def test_ring_buffer_wraps_and_keeps_stats():
+    buffer = TimingBuffer('test', 4, overrunNs=25)
+    for ns in (10, 20, 30, 40, 50, 5):
+        buffer.record(ns)
+
+    assert buffer.getSamples() == [30, 40, 50, 5]
+    assert buffer.count == 6
+    assert buffer.maxNs == 50
+    assert buffer.overruns == 3
+    assert buffer.percentile(0) == 5
+    assert buffer.percentile(100) == 50
+
+
+def test_timed_keeps_the_function_details(monkeypatch):
+    monkeypatch.setattr(robotmap, 'timing', robotmap.timing.replace(enabled=True))
+    monkeypatch.setattr(looptiming, 'timers', {})
+
+    def step(value):
+        """Doubles the value"""
+        return 2 * value
+
+    timedStep = looptiming.timed('Test.step')(step)
+    assert timedStep(3) == 6
+    assert looptiming.timers['Test.step'].count == 1
+    assert timedStep.__wrapped__ is step
+    assert timedStep.__name__ == 'step'
+    assert timedStep.__qualname__ == step.__qualname__
+    assert timedStep.__doc__ == 'Doubles the value'
+
+
+def test_teleop_is_timed(control, fake_time, robot, tmpdir):
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 2)
+
+    stats = looptiming.getAllStats()
+    assert stats['loop']['count'] > 0
+    assert stats['TankDriveTeleopDefaultNFS.execute']['count'] > 0
+    assert stats['loop']['p50'] <= stats['loop']['p99'] <= stats['loop']['max']
+
+    path = tmpdir.join('timing.csv')
+    looptiming.dump(str(path))
+    assert path.read().startswith("timer,count,p50,p99,max,overruns")
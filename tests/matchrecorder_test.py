@@ -0,0 +1,59 @@
+'''
+    Records a simulated teleop run and reads the log back as NumPy arrays
+'''
+
+import pytest
+
+import matchrecorder
+from matchrecorder import MatchRecorder
+
+
+def test_ring_file_round_trip(tmpdir):
+    np = pytest.importorskip('numpy')
+
+    path = str(tmpdir.join('match.bin'))
+    recorder = MatchRecorder(path, 8)
+    for i in range(12):
+        recorder.record(i * 0.02, 0.5, -0.25, i % 2 == 0, 0.4, -0.2, 0.4, 0.1, 0.3, 0.1, i, -i, 0.75)
+    recorder.close()
+
+    log = matchrecorder.loadArrays(path)
+    assert len(log['timestamp']) == 8
+    assert np.all(log['rawRightThrottle'] == 0.75)
+    assert np.array_equal(log['leftEncoder'], np.arange(4, 12))
+    assert np.array_equal(log['rightEncoder'], -np.arange(4, 12))
+    assert np.all(log['rawThrottle'] == 0.5)
+    assert log['driveSlow'].tolist() == [True, False] * 4
+
+
+def test_earlier_logs_are_kept(tmpdir):
+    pytest.importorskip('numpy')
+
+    path = str(tmpdir.join('match.bin'))
+    for run in range(4):
+        recorder = MatchRecorder(path, 8, keep=2)
+        recorder.record(0.0, 0.5, -0.25, False, 0.4, -0.2, 0.4, 0.1, 0.3, 0.1, run, 0)
+        recorder.close()
+
+    # newest in path, the two before it rotated, the oldest dropped
+    assert [matchrecorder.loadArrays(p)['leftEncoder'][0] for p in (path, path + '.1', path + '.2')] == [3, 2, 1]
+    assert not tmpdir.join('match.bin.3').exists()
+
+
+def test_teleop_is_recorded(control, fake_time, robot, hal_data, tmpdir):
+    pytest.importorskip('numpy')
+
+    path = str(tmpdir.join('teleop.bin'))
+    matchrecorder.recorder = MatchRecorder(path, 1024)
+    try:
+        hal_data['joysticks'][0]['axes'][1] = -0.5
+        control.set_operator_control(enabled=True)
+        control.run_test(lambda tm: tm < 1)
+    finally:
+        matchrecorder.recorder.close()
+        matchrecorder.recorder = None
+
+    log = matchrecorder.loadArrays(path)
+    assert len(log['timestamp']) > 0
+    assert log['rawThrottle'][-1] == 0.5
+    assert log['adjustedLeft'][-1] > 0.0
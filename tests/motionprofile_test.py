@@ -0,0 +1,36 @@
+'''
+    Motion profiles should respect their limits, end on the requested distance and come from the cache
+'''
+
+import motionprofile
+
+
+def test_trapezoid_limits():
+    profile = motionprofile.generateProfile(120.0, 96.0, 120.0, None, 0.01)
+
+    assert abs(profile.position[-1] - 120.0) < 1e-9
+    assert profile.velocity[0] == 0.0
+    assert profile.velocity[-1] == 0.0
+    assert max(profile.velocity) <= 96.0 + 1e-6
+    assert max(abs(a) for a in profile.acceleration) <= 120.0 + 1e-6
+
+
+def test_scurve_limits_jerk():
+    profile = motionprofile.generateProfile(-60.0, 96.0, 120.0, 600.0, 0.01)
+
+    assert abs(profile.position[-1] + 60.0) < 1e-9
+    assert min(profile.velocity) >= -96.0 - 1e-6
+    jerk = [(profile.acceleration[k + 1] - profile.acceleration[k]) / 0.01
+            for k in range(len(profile) - 2)]
+    assert max(abs(j) for j in jerk) <= 600.0 * 1.01
+
+
+def test_sample_and_cache():
+    profile = motionprofile.generateProfile(24.0, 48.0, 60.0)
+    assert motionprofile.generateProfile(24.0, 48.0, 60.0) is profile
+
+    assert profile.sample(-1.0)[0] == 0.0
+    assert profile.sample(profile.duration + 1.0) == (24.0, 0.0, 0.0)
+
+    position, velocity, acceleration = profile.sample(profile.duration / 2)
+    assert abs(position - 12.0) < 0.1
@@ -0,0 +1,52 @@
+'''
+    Motor outputs skip unchanged writes and drive followers with their leader
+'''
+
+import robotmap
+import subsystems
+from subsystems.motoroutput import MotorOutput
+
+
+class FakeController:
+
+    def __init__(self):
+        self.values = []
+
+    def set(self, value):
+        self.values.append(value)
+
+
+def test_unchanged_values_are_skipped_and_refreshed():
+    leader = FakeController()
+    follower = FakeController()
+    output = MotorOutput('left', [leader, None, follower], refreshTicks=3)
+
+    for value in (0.5, 0.5, 0.5, 0.5, 0.5, 0.25):
+        output.set(value)
+
+    # the fifth 0.5 is the refresh after three skips
+    assert leader.values == [0.5, 0.5, 0.25]
+    assert follower.values == leader.values
+    assert output.getStats() == {'writes': 6, 'skipped': 3}
+
+    output.invalidate()
+    output.set(0.25)
+    assert leader.values[-1] == 0.25
+    assert len(leader.values) == 4
+
+
+def test_followers_drive_with_leader(control, fake_time, robot, hal_data, monkeypatch):
+    monkeypatch.setattr(robotmap, 'driveLine', robotmap.driveLine.replace(leftFollowerPorts=(2,),
+                                                                          rightFollowerPorts=(3,)))
+    hal_data['joysticks'][0]['axes'][1] = -1.0
+
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 3)
+
+    assert hal_data['pwm'][0]['value'] == 1.0
+    assert hal_data['pwm'][2]['value'] == hal_data['pwm'][0]['value']
+    assert hal_data['pwm'][3]['value'] == hal_data['pwm'][1]['value']
+
+    # holding full throttle leaves most of the ticks with nothing new to write
+    stats = subsystems.driveline.getOutputStats()
+    assert stats['left']['skipped'] > stats['left']['writes'] / 2
@@ -0,0 +1,31 @@
+'''
+    The NumPy batch mixer must give bit-identical results to the scalar kernel
+'''
+
+import pytest
+
+from nfsmixer import nfsMix, nfsMixBatch
+
+
+def test_batch_matches_scalar():
+    np = pytest.importorskip('numpy')
+
+    axis = np.concatenate([np.linspace(-1.0, 1.0, 81), [0.0, -0.0, 1e-9, -1e-9]])
+    throttle, turn = np.meshgrid(axis, axis, indexing='ij')
+    throttle = throttle.ravel()
+    turn = turn.ravel()
+    slow = np.arange(throttle.size) % 2 == 0
+
+    left, right = nfsMixBatch(throttle, turn, slow, 0.3, 0.2)
+
+    for i in range(throttle.size):
+        expectLeft, expectRight = nfsMix(float(throttle[i]), float(turn[i]), 0.2 if slow[i] else 0.3)
+        assert np.float64(expectLeft).tobytes() == left[i].tobytes()
+        assert np.float64(expectRight).tobytes() == right[i].tobytes()
+
+
+def test_mix_straight_and_spin():
+    assert nfsMix(0.5, 0.0, 0.3) == (0.5, 0.5)
+
+    left, right = nfsMix(0.0, 1.0, 0.3)
+    assert left == -right
@@ -0,0 +1,63 @@
+'''
+    The tank model, its use by the pyfrc simulator, and the NFS parameter sweep
+'''
+
+import sweep
+import tankphysics
+
+
+def test_model_straight_and_spin():
+    params = tankphysics.TankModelParams(maxSpeed=100.0, timeConstant=0.1, trackWidth=20.0, deadband=0.0,
+                                         inchesPerTick=0.1)
+    state = tankphysics.TankState()
+    for _ in range(100):
+        tankphysics.step(state, 1.0, 1.0, 0.02, params)
+    assert abs(state.speed() - 100.0) < 0.1
+    assert state.heading == 0.0
+    assert state.leftCount(params) == state.rightCount(params) > 0
+
+    state = tankphysics.TankState()
+    for _ in range(100):
+        tankphysics.step(state, 0.5, -0.5, 0.02, params)
+    assert abs(state.speed()) < 1e-9
+    assert state.turnRate(params) > 0.0
+    assert state.heading > 0.0
+
+
+class FakePhysicsController:
+
+    def __init__(self):
+        self.x = 0.0
+        self.angle = 0.0
+
+    def distance_drive(self, x, y, angle):
+        self.x += x
+        self.angle += angle
+
+
+def test_physics_engine_feeds_encoders(control, fake_time, robot, hal_data):
+    import physics
+    import subsystems
+
+    hal_data['joysticks'][0]['axes'][1] = -1.0
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 2)
+
+    # pyfrc only loads physics.py for the simulator, so step it by hand with the outputs teleop left behind
+    controller = FakePhysicsController()
+    engine = physics.PhysicsEngine(controller)
+    for i in range(50):
+        engine.update_sim(hal_data, i * 0.02, 0.02)
+
+    assert controller.x > 0.0
+    assert subsystems.driveline.leftEncoder.get() > 0
+    assert subsystems.driveline.leftEncoder.get() == subsystems.driveline.rightEncoder.get()
+
+
+def test_sweep_ranks_configurations():
+    grid = {'lowTurnScale': (0.2, 0.4), 'minTimeFullThrottleChange': (0.75, 1.5)}
+    results = sweep.runSweep(grid, workers=2)
+
+    assert len(results) == 4
+    assert [r[0] for r in results] == sorted(r[0] for r in results)
+    assert set(results[0][2].keys()) == set(sweep.MANEUVERS.keys())
@@ -0,0 +1,95 @@
+'''
+    Rate groups run at their own rates with their phases spread over the base ticks
+'''
+
+import pytest
+
+from ratescheduler import RateScheduler
+
+
+def test_groups_run_at_their_rates():
+    rates = RateScheduler(50.0)
+    ticks = {'control': [], 'telemetry': [], 'diagnostics': []}
+    for name, rate in (('control', 50.0), ('telemetry', 10.0), ('diagnostics', 1.0)):
+        rates.addGroup(name, rate)
+        rates.add(name, lambda name=name: ticks[name].append(rates.tick - 1))
+
+    for _ in range(100):
+        rates.run()
+
+    assert len(ticks['control']) == 100
+    assert len(ticks['telemetry']) == 20
+    assert len(ticks['diagnostics']) == 2
+
+    # the slow groups start on different ticks so they don't pile up on one loop
+    assert ticks['control'][0] == 0
+    assert ticks['telemetry'][0] == 0
+    assert ticks['diagnostics'][0] == 1
+
+
+def test_rate_must_divide_base_rate():
+    rates = RateScheduler(50.0)
+    with pytest.raises(ValueError):
+        rates.addGroup('odd', 30.0)
+    with pytest.raises(ValueError):
+        rates.addGroup('tooFast', 100.0)
+
+
+def test_load_is_reported():
+    rates = RateScheduler(50.0)
+    rates.addGroup('control', 50.0)
+    rates.add('control', lambda: sum(range(100)))
+    for _ in range(10):
+        rates.run()
+
+    load = rates.getLoad()['control']
+    assert load['rate'] == 50.0
+    assert load['mean'] > 0.0
+    assert load['load'] == pytest.approx(load['mean'] / 1000.0 * 50.0)
+
+
+def test_member_errors_are_handed_to_on_error():
+    errors = []
+    ran = []
+    rates = RateScheduler(50.0, onError=lambda group, error: errors.append((group.name, str(error))))
+    rates.addGroup('control', 50.0)
+    rates.addGroup('telemetry', 10.0)
+
+    def broken():
+        raise RuntimeError('telemetry broke')
+
+    rates.add('control', lambda: ran.append('control'))
+    rates.add('telemetry', broken)
+    rates.add('telemetry', lambda: ran.append('telemetry'))
+    for _ in range(5):
+        rates.run()
+
+    # the rest of the broken group is skipped for that tick, the other groups carry on
+    assert errors == [('telemetry', 'telemetry broke')]
+    assert ran == ['control'] * 5
+
+
+def test_member_errors_raise_without_on_error():
+    rates = RateScheduler(50.0)
+    rates.addGroup('control', 50.0)
+    rates.add('control', lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        rates.run()
+
+
+def test_robot_reports_group_errors_only_with_fms():
+    import types
+    from robot import MyRobot
+
+    crashes = []
+    fms = types.SimpleNamespace(attached=False)
+    robot = types.SimpleNamespace(ds=types.SimpleNamespace(isFMSAttached=lambda: fms.attached),
+                                  handleCrash=crashes.append)
+    error = RuntimeError('diagnostics broke')
+
+    with pytest.raises(RuntimeError):
+        MyRobot.rateGroupCrashed(robot, None, error)
+
+    fms.attached = True
+    MyRobot.rateGroupCrashed(robot, None, error)
+    assert crashes == [error]
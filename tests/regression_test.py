@@ -0,0 +1,39 @@
+'''
+    Checks the benchmark regression gate's comparison and that the stored baselines cover every case
+'''
+
+from benchmarks import regression
+
+
+def test_baselines_cover_every_case():
+    stored = regression.loadBaselines()['cases']
+    for name, func in regression.CASES:
+        if name == 'startup':
+            assert 'startup.import' in stored and 'startup.robotInit' in stored
+        else:
+            assert name in stored
+    for name, baseline in stored.items():
+        assert baseline['tolerance'] == regression.TOLERANCES.get(name, regression.DEFAULT_TOLERANCE)
+
+
+def test_compare_uses_relative_cost(tmpdir):
+    path = str(tmpdir.join('baselines.json'))
+    regression.saveBaselines({'TankDrive.driveRaw': (100.0, 0.001), 'startup.import': (1e8, 1.0)}, path)
+    baselines = regression.loadBaselines(path)
+    assert baselines['cases']['startup.import']['tolerance'] == 0.5
+
+    # twice the ns on a machine half as fast is no change
+    rows = regression.compare({'TankDrive.driveRaw': (200.0, 0.001)}, baselines)
+    assert rows == [('TankDrive.driveRaw', 200.0, 200.0, 0.0, True)]
+
+    rows = regression.compare({'TankDrive.driveRaw': (130.0, 0.0013), 'startup.import': (1.3e8, 1.3)},
+                              baselines)
+    assert [row[4] for row in rows] == [False, True]
+    assert not regression.compare({'startup.import': (1.3e8, 1.3)}, baselines, tolerance=0.1)[0][4]
+
+    rows = regression.compare({'drivemodes.mixer': (5000.0, 0.05)}, baselines)
+    assert rows == [('drivemodes.mixer', 5000.0, None, None, True)]
+
+    # updating one case keeps the others
+    regression.saveBaselines({'startup.import': (2e8, 2.0)}, path)
+    assert set(regression.loadBaselines(path)['cases']) == {'TankDrive.driveRaw', 'startup.import'}
@@ -0,0 +1,127 @@
+'''
+    Replays recorded teleop input through the drive command and checks the outputs match the recording, and a
+    checked in golden log from an earlier version of the drive code
+'''
+
+import math
+import os
+import random
+
+import pytest
+
+import matchrecorder
+import oi
+import replay
+from matchrecorder import MatchRecorder
+
+
+def test_replay_matches_recording(control, fake_time, robot, hal_data, tmpdir):
+    pytest.importorskip('numpy')
+
+    path = str(tmpdir.join('teleop.bin'))
+    matchrecorder.recorder = MatchRecorder(path, 4096)
+    sticks = hal_data['joysticks']
+
+    def drive(tm):
+        # sweep throttle and turn, with the slow button held part of the time
+        sticks[0]['axes'][1] = -math.sin(tm)
+        sticks[1]['axes'][0] = math.cos(tm * 1.7)
+        sticks[0]['buttons'][1] = 3.0 < tm < 5.0
+        return tm < 8
+
+    try:
+        control.set_operator_control(enabled=True)
+        control.run_test(drive)
+    finally:
+        matchrecorder.recorder.close()
+        matchrecorder.recorder = None
+
+    log = matchrecorder.loadArrays(path)
+    assert len(log['timestamp']) > 300
+
+    trace = replay.replayLog(log)
+    for name, (worst, first) in replay.diffTraces(log, trace).items():
+        # the log stores float32, so allow for its rounding
+        assert worst < 1e-6, "{} differs from index {}".format(name, first)
+
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'teleop.bin')
+
+
+def makeGoldenLog(path=GOLDEN_PATH):
+    """
+    Write the golden log: 6 seconds of sweeping sticks with loop jitter, a stall and the slow button, run through
+    the NFS drive mode with the robotmap defaults. Only rerun this (REGENERATE_GOLDEN=1) for an intended change to
+    the drive output, and say so in the commit
+    """
+    rng = random.Random(279)
+    ticks = 300
+    timestamps = [0.0]
+    for i in range(1, ticks):
+        timestamps.append(timestamps[-1] + (0.09 if i == 150 else rng.uniform(0.015, 0.025)))
+    log = {
+        'timestamp': timestamps,
+        'rawThrottle': [math.sin(i / 20.0) for i in range(ticks)],
+        'rawTurn': [math.cos(i / 13.0) for i in range(ticks)],
+        'driveSlow': [100 <= i < 180 for i in range(ticks)],
+        'leftEncoder': list(range(ticks)),
+        'rightEncoder': [-i for i in range(ticks)],
+    }
+    trace = replay.replayLog(log, mode='nfs')
+
+    recorder = MatchRecorder(path, ticks, keep=0)
+    for i in range(ticks):
+        recorder.record(timestamps[i], log['rawThrottle'][i], log['rawTurn'][i], log['driveSlow'][i], 0.0, 0.0,
+                        trace['targetLeft'][i], trace['targetRight'][i], trace['adjustedLeft'][i],
+                        trace['adjustedRight'][i], log['leftEncoder'][i], log['rightEncoder'][i])
+    recorder.close()
+
+
+def test_replay_matches_golden_log(robot):
+    pytest.importorskip('numpy')
+    if os.environ.get('REGENERATE_GOLDEN'):
+        makeGoldenLog()
+
+    log = matchrecorder.loadArrays(GOLDEN_PATH)
+    assert len(log['timestamp']) == 300
+
+    trace = replay.replayLog(log, mode='nfs')
+    for name, (worst, first) in replay.diffTraces(log, trace).items():
+        # the log stores float32, so allow for its rounding
+        assert worst < 1e-6, "{} differs from the golden log from index {}".format(name, first)
+
+
+def test_tank_replay_needs_the_right_stick(robot):
+    pytest.importorskip('numpy')
+
+    # the golden log is version 1, from before the right stick was recorded
+    log = matchrecorder.loadArrays(GOLDEN_PATH)
+    assert 'rawRightThrottle' not in log
+    with pytest.raises(ValueError):
+        replay.replayLog(log, mode='tank')
+
+    ticks = 50
+    log = {'rawThrottle': [0.5] * ticks, 'rawTurn': [0.0] * ticks, 'rawRightThrottle': [-0.5] * ticks}
+    trace = replay.replayLog(log, mode='tank')
+    assert trace['targetLeft'][-1] == oi.throttleCurve.lookup(0.5)
+    assert trace['targetRight'][-1] == oi.throttleCurve.lookup(-0.5)
+
+
+def test_diff_needs_every_field():
+    with pytest.raises(ValueError):
+        replay.diffTraces({'targetLeft': [0.0]}, {'targetLeft': [0.0]}, ('targetLeft', 'targetRight'))
+    with pytest.raises(ValueError):
+        replay.diffTraces({'targetLeft': [0.0, 1.0]}, {'targetLeft': [0.0]}, ('targetLeft',))
+
+
+def test_full_match_replays_quickly(robot):
+    ticks = 150 * 50
+    log = {
+        'rawThrottle': [math.sin(i / 40.0) for i in range(ticks)],
+        'rawTurn': [math.cos(i / 65.0) for i in range(ticks)],
+        'driveSlow': [(i // 500) % 2 == 1 for i in range(ticks)],
+    }
+
+    trace = replay.replayLog(log)
+    assert len(trace['adjustedLeft']) == ticks
+    assert trace['elapsed'] < 1.0
@@ -0,0 +1,109 @@
+'''
+    Typed, read only config sections and cached per robot profiles
+'''
+
+import json
+import os
+import pickle
+
+import pytest
+
+import robotconfig
+import robotmap
+from robotconfig import ConfigSection, Field, Derived, loadCache, loadProfile
+
+
+class WheelConfig(ConfigSection):
+    radius = Field(float, 3.0, minimum=0.0)
+    ticks = Field(int, 360, minimum=1)
+    controller = Field(str, "TALON", choices=("TALON", "VICTORSP"))
+    inchesPerTick = Derived(lambda c: c.radius / c.ticks)
+
+
+def test_sections_are_read_only_and_derive_values():
+    wheel = WheelConfig(radius=6)
+    assert wheel.radius == 6.0
+    assert wheel.inchesPerTick == pytest.approx(6.0 / 360)
+
+    with pytest.raises(AttributeError):
+        wheel.ticks = 100
+
+    changed = wheel.replace(ticks=100)
+    assert changed.inchesPerTick == pytest.approx(0.06)
+    assert wheel.ticks == 360
+
+
+def test_bad_values_are_refused():
+    with pytest.raises(ValueError):
+        WheelConfig(ticks=0)
+    with pytest.raises(ValueError):
+        WheelConfig(ticks=1.5)
+    with pytest.raises(ValueError):
+        WheelConfig(controller="SPARKMAX")
+    with pytest.raises(ValueError):
+        WheelConfig(spokes=4)
+    with pytest.raises(ValueError):
+        WheelConfig(inchesPerTick=1.0)
+
+
+def test_profile_is_validated_once_then_cached(tmpdir, monkeypatch):
+    profile = tmpdir.join('practice.json')
+    profile.write(json.dumps({'wheel': {'radius': 2, 'controller': 'VICTORSP'}}))
+
+    loads = []
+    realLoad = json.load
+    monkeypatch.setattr(json, 'load', lambda f: loads.append(1) or realLoad(f))
+
+    first = loadProfile(str(profile), {'wheel': WheelConfig})['wheel']
+    second = loadProfile(str(profile), {'wheel': WheelConfig})['wheel']
+    assert len(loads) == 1
+    assert second.asDict() == first.asDict()
+    assert second.inchesPerTick == pytest.approx(2.0 / 360)
+
+    profile.write(json.dumps({'wheels': {}}))
+    with pytest.raises(ValueError):
+        loadProfile(str(profile), {'wheel': WheelConfig})
+
+
+def test_shipped_profiles_are_valid():
+    for name in ('practice',):
+        sections = loadProfile(os.path.join(robotmap.projectDir, 'profiles', name + '.json'),
+                               robotmap.getSections(), robotmap.sourceFiles)
+        assert set(sections) == set(robotmap.getSections())
+
+
+def test_robotmap_starts_from_the_cache():
+    # importing robotmap validated the profile or found it cached, either way the cache is current now
+    cached = loadCache(robotmap.profilePath, robotmap.sourceFiles)
+    assert cached is not None
+    assert set(cached) == set(robotmap.getSections())
+
+
+def test_cached_sections_are_the_declared_classes():
+    sections = robotmap.getSections()
+    cached = loadCache(robotmap.profilePath, robotmap.sourceFiles)
+    for name, cls in sections.items():
+        section = cls.fromCache(cached[name])
+        assert type(section) is cls
+        assert type(getattr(robotmap, name)) is cls
+        assert not hasattr(section, '__dict__')
+        assert section.asDict() == getattr(robotmap, name).asDict()
+
+    nfs = sections['nfs'].fromCache(cached['nfs'])
+    assert nfs.maxSpeedChange == sections['nfs']().maxSpeedChange
+    assert pickle.loads(pickle.dumps(nfs)).asDict() == nfs.asDict()
+    with pytest.raises(AttributeError):
+        nfs.lowTurnScale = 0.25
+
+
+def test_cache_dir(tmpdir):
+    profile = tmpdir.join('robot.json')
+    profile.write(json.dumps({'wheel': {'ticks': 720}}))
+    cacheDir = tmpdir.mkdir('cache')
+
+    first = loadProfile(str(profile), {'wheel': WheelConfig}, cacheDir=str(cacheDir))
+    assert cacheDir.join('.robot.json.cache').check()
+    assert not tmpdir.join('.robot.json.cache').check()
+    assert loadCache(str(profile)) is None
+    cached = loadCache(str(profile), cacheDir=str(cacheDir))
+    assert WheelConfig.fromCache(cached['wheel']).asDict() == first['wheel'].asDict()
@@ -0,0 +1,64 @@
+'''
+    Samples a busy main thread and checks the collapsed stacks, and arming from the dashboard
+'''
+
+import time
+
+from wpilib import SmartDashboard
+
+import robotmap
+import sampleprofiler
+from sampleprofiler import SamplingProfiler
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_collapsed_stacks(tmpdir):
+    path = str(tmpdir.join('profile.collapsed'))
+    profiler = SamplingProfiler(path, rate=500.0, duration=5.0)
+    profiler.start()
+    spin(0.3)
+    profiler.stop()
+
+    assert profiler.written
+    assert profiler.samples > 10
+    with open(path) as f:
+        lines = f.read().splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    # the busiest stack ends in spin, called from this test
+    assert stack.endswith('test_collapsed_stacks (sampleprofiler_test.py);spin (sampleprofiler_test.py)')
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == profiler.samples
+
+
+def test_window_ends_by_itself(tmpdir):
+    profiler = SamplingProfiler(str(tmpdir.join('short.collapsed')), rate=500.0, duration=0.05)
+    profiler.start()
+    spin(0.3)
+    assert not profiler.isRunning()
+    assert profiler.written
+
+
+def test_dashboard_arms(robot, tmpdir, monkeypatch):
+    monkeypatch.setattr(robotmap, 'profiler', robotmap.profiler.replace(
+        path=str(tmpdir.join('armed-{}.collapsed')), duration=0.1))
+    key = robotmap.profiler.dashboardKey
+    sampleprofiler.init()
+
+    SmartDashboard.putBoolean(key, False)
+    sampleprofiler.poll()
+    assert sampleprofiler.profiler is None or not sampleprofiler.profiler.isRunning()
+
+    SmartDashboard.putBoolean(key, True)
+    sampleprofiler.poll()
+    profiler = sampleprofiler.profiler
+    assert profiler.isRunning()
+
+    spin(0.3)
+    sampleprofiler.poll()
+    assert profiler.written
+    assert not SmartDashboard.getBoolean(key, True)
+    assert len(tmpdir.listdir(lambda p: p.basename.startswith('armed-'))) == 1
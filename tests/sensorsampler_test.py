@@ -0,0 +1,112 @@
+'''
+    Timestamped sensor ring buffers and the background sampler
+'''
+
+import pytest
+
+import robotmap
+import subsystems
+from subsystems.sensorsampler import SampleRing, SensorSampler
+
+
+def test_ring_wraps_and_interpolates():
+    ring = SampleRing(2, 4)
+    assert ring.latest() is None
+    assert ring.at(1.0) is None
+
+    for n in range(6):
+        ring.append(n * 0.1, (n * 10.0, -n))
+
+    assert ring.latest() == pytest.approx((0.5, 50.0, -5.0))
+    assert [sample[0] for sample in ring.window(10)] == pytest.approx([0.2, 0.3, 0.4, 0.5])
+    assert ring.at(0.35) == pytest.approx((0.35, 35.0, -3.5))
+
+    # outside the buffered samples the oldest or newest sample is returned
+    assert ring.at(0.0) == pytest.approx((0.2, 20.0, -2.0))
+    assert ring.at(9.0) == pytest.approx((0.5, 50.0, -5.0))
+
+
+class FakeEncoder:
+
+    def __init__(self):
+        self.count = 0
+
+    def get(self):
+        return self.count
+
+
+def test_sampler_snapshots_sensors(fake_time):
+    left = FakeEncoder()
+    right = FakeEncoder()
+    sampler = SensorSampler(left, right, rate=100.0, size=16)
+    assert not sampler.hasHeading()
+
+    for n in range(5):
+        left.count = n * 4
+        right.count = n * 2
+        sampler.sample()
+        fake_time.increment_time_by(0.01)
+
+    assert sampler.getLeftCount() == 16
+    assert sampler.getRightCount() == 8
+    assert sampler.getHeading() == 0.0
+    assert sampler.getLeftVelocity() == pytest.approx(400.0)
+    assert sampler.getRightAcceleration() == pytest.approx(0.0, abs=1e-6)
+
+    start = sampler.ring.window(5)[0][0]
+    assert sampler.at(start + 0.015)[2] == pytest.approx(6.0)
+
+
+def test_reset_drops_old_counts(fake_time):
+    left = FakeEncoder()
+    right = FakeEncoder()
+    sampler = SensorSampler(left, right, rate=100.0, size=16)
+
+    for n in range(5):
+        left.count = right.count = n * 4
+        sampler.sample()
+        fake_time.increment_time_by(0.01)
+    assert sampler.getLeftCount() == 16
+
+    left.count = right.count = 0
+    sampler.reset()
+    assert sampler.getLeftCount() == 0
+    assert sampler.getRightCount() == 0
+    # the fit starts over rather than seeing the counts jump back to zero
+    assert sampler.getLeftVelocity() == 0.0
+
+
+def test_shutdown_stops_sampler(control, fake_time, robot):
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 0.5)
+
+    # subsystems.init() shuts down the driveline it replaces
+    sensors = subsystems.sensors
+    assert sensors.isRunning()
+    subsystems.driveline.shutdown()
+    assert not sensors.isRunning()
+    assert not subsystems.driveline.drivePID.isEnabled()
+    subsystems.driveline.shutdown()
+
+
+def test_driveline_reads_from_sampler(control, fake_time, robot, hal_data, monkeypatch):
+    monkeypatch.setattr(robotmap, 'sensors', robotmap.sensors.replace(gyroType='ADXRS450'))
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 1)
+
+    sensors = subsystems.sensors
+    assert sensors.ring.count > 100
+    assert sensors.errors == 0
+    assert sensors.hasHeading()
+    assert subsystems.driveline.drivePID.headingGet is not None
+
+
+def test_only_named_samplers_are_timed():
+    import looptiming
+
+    sampler = SensorSampler(FakeEncoder(), FakeEncoder())
+    assert sampler.timer.durations not in looptiming.timers.values()
+
+    named = SensorSampler(FakeEncoder(), FakeEncoder(), name='TestSensors')
+    assert looptiming.timers.pop('TestSensors.sample') is named.timer.durations
+    assert looptiming.timers.pop('TestSensors.period') is named.timer.periods
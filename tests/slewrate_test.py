@@ -0,0 +1,41 @@
+'''
+    The drive command's rate limiter should limit the output using the measured loop period
+'''
+
+import robotmap
+import replay
+
+
+def rampTime(timestamps):
+    ticks = len(timestamps)
+    log = {'timestamp': timestamps, 'rawThrottle': [1.0] * ticks, 'rawTurn': [0.0] * ticks}
+    trace = replay.replayLog(log)
+    for timestamp, speed in zip(timestamps, trace['adjustedLeft']):
+        if speed >= 1.0:
+            return timestamp
+    return None
+
+
+def test_ramp_is_rate_limited(robot):
+    timestamps = [i * 0.02 for i in range(100)]
+    ticks = len(timestamps)
+    trace = replay.replayLog({'timestamp': timestamps, 'rawThrottle': [1.0] * ticks, 'rawTurn': [0.0] * ticks})
+
+    # every tick is limited, not just the first one after the stick moves
+    for i in range(1, 20):
+        step = trace['adjustedLeft'][i] - trace['adjustedLeft'][i - 1]
+        assert abs(step - robotmap.nfs.maxSpeedChange) < 1e-9
+
+
+def test_ramp_time_ignores_jitter(robot):
+    expected = robotmap.nfs.minTimeFullThrottleChange / 2
+
+    steady = [i * 0.02 for i in range(100)]
+    late = [i * 0.03 for i in range(100)]
+    stalled = [i * 0.02 + (0.2 if i >= 10 else 0.0) for i in range(100)]
+
+    assert abs(rampTime(steady) - expected) < 0.03
+    assert abs(rampTime(late) - expected) < 0.04
+
+    # the 0.22 sec stall is only allowed maxLoopPeriod worth of change
+    assert abs(rampTime(stalled) - (expected + 0.2 - (robotmap.nfs.maxLoopPeriod - 0.02))) < 0.03
@@ -0,0 +1,35 @@
+'''
+    The telemetry publisher only sends values that changed beyond the epsilon
+'''
+
+from wpilib import SmartDashboard
+
+import robotmap
+import telemetry
+
+
+def test_flush_skips_unchanged_values(robot):
+    # flush by hand so the background thread from earlier tests can't race the counts
+    wasRunning = telemetry._thread is not None
+    telemetry.stop()
+
+    try:
+        telemetry.put("Test/Speed", 0.5)
+        telemetry.put("Test/Slow", False)
+        assert telemetry.flush() >= 2
+        assert SmartDashboard.getNumber("Test/Speed", 0.0) == 0.5
+
+        telemetry.put("Test/Speed", 0.5 + robotmap.telemetry.epsilon / 2)
+        telemetry.put("Test/Slow", False)
+        assert telemetry.flush() == 0
+        assert SmartDashboard.getNumber("Test/Speed", 0.0) == 0.5
+
+        telemetry.put("Test/Speed", 0.75)
+        telemetry.put("Test/Slow", True)
+        assert telemetry.flush() == 2
+        assert SmartDashboard.getNumber("Test/Speed", 0.0) == 0.75
+        assert SmartDashboard.getBoolean("Test/Slow", False)
+    finally:
+        # later tests expect the publisher as they found it
+        if wasRunning:
+            telemetry.init()
@@ -0,0 +1,166 @@
+'''
+    Streams packets over loopback to the asyncio receiver and checks the file and the drop counts
+'''
+
+import asyncio
+import io
+import socket
+
+import pytest
+
+import telemetrystream
+from streamreceiver import StreamReceiver, openReceiver, LATE_WINDOW
+from telemetrystream import TelemetryStreamer, PACKET
+
+
+def test_loopback(tmpdir):
+    np = pytest.importorskip('numpy')
+    path = str(tmpdir.join('stream.bin'))
+
+    async def run():
+        with open(path, 'wb') as f:
+            transport, receiver = await openReceiver(f, '127.0.0.1', 0)
+            streamer = TelemetryStreamer('127.0.0.1', transport.get_extra_info('sockname')[1])
+            try:
+                for i in range(100):
+                    if i == 60:
+                        # lose three packets on the way
+                        streamer.sequence += 3
+                    sample = (i * 0.005, 90.0, i, -i, 1.5, -1.5)
+                    streamer.send(i * 0.02, i % 2 == 0, 0.5, -0.25, 0.4, -0.2, 0.6, 0.2, 0.3, 0.1, sample)
+                    if i % 10 == 0:
+                        await asyncio.sleep(0.001)
+                for _ in range(100):
+                    if receiver.received >= 100:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                streamer.close()
+                transport.close()
+        return streamer, receiver
+
+    streamer, receiver = asyncio.run(run())
+
+    assert streamer.sent == 100
+    assert streamer.dropped == 0
+    assert receiver.getStats() == {'received': 100, 'dropped': 3, 'late': 0, 'duplicates': 0, 'invalid': 0,
+                                   'mismatched': 0, 'restarts': 0}
+
+    log = telemetrystream.loadArrays(path)
+    assert len(log['sequence']) == 100
+    assert log['sequence'][59] == 59 and log['sequence'][60] == 63
+    assert (log['session'] == streamer.session).all()
+    assert np.allclose(log['timestamp'], np.arange(100) * 0.02)
+    assert list(log['flags'][:4]) == [1, 0, 1, 0]
+    assert np.allclose(log['adjustedLeft'], 0.3)
+    assert log['leftCount'][10] == 10.0 and log['rightCount'][10] == -10.0
+    assert np.allclose(log['heading'], 90.0)
+
+
+def sendPackets(streamer, count):
+    packets = []
+    for _ in range(count):
+        streamer.send(0.0, False, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        packets.append(bytes(streamer.buffer))
+    return packets
+
+
+def test_late_and_restarted_packets():
+    receiver = StreamReceiver(io.BytesIO())
+    streamer = TelemetryStreamer('127.0.0.1', 9)
+    packets = sendPackets(streamer, 5)
+    streamer.close()
+
+    for i in (0, 1, 3, 2, 4):
+        receiver.datagram_received(packets[i], None)
+    assert receiver.dropped == 0
+    assert receiver.late == 1
+
+    # a repeat is neither late nor written, and can't push the dropped count below zero
+    receiver.datagram_received(packets[2], None)
+    receiver.datagram_received(packets[0], None)
+    assert receiver.duplicates == 2
+    assert receiver.dropped == 0
+    assert receiver.late == 1
+
+    receiver.datagram_received(b'junk', None)
+    assert receiver.invalid == 1
+    assert receiver.received == 5
+
+    # the robot code restarting starts a new session from sequence 0, which isn't late
+    restarted = TelemetryStreamer('127.0.0.1', 9)
+    newPackets = sendPackets(restarted, 3)
+    restarted.close()
+    assert restarted.session != streamer.session
+    for packet in newPackets[:1] + newPackets[2:]:
+        receiver.datagram_received(packet, None)
+    assert receiver.restarts == 1
+    assert receiver.dropped == 1
+    receiver.datagram_received(newPackets[1], None)
+    # and a straggler from before the restart doesn't count as another one
+    receiver.datagram_received(packets[4], None)
+    assert receiver.getStats() == {'received': 9, 'dropped': 0, 'late': 3, 'duplicates': 2, 'invalid': 1,
+                                   'mismatched': 0, 'restarts': 1}
+
+
+def test_other_versions_are_dropped():
+    receiver = StreamReceiver(io.BytesIO())
+    older = TelemetryStreamer('127.0.0.1', 9)
+    olderPackets = [bytearray(packet) for packet in sendPackets(older, 2)]
+    older.close()
+    streamer = TelemetryStreamer('127.0.0.1', 9)
+    packets = sendPackets(streamer, 3)
+    streamer.close()
+
+    # a robot running an older version of the stream, its packets the same size but laid out differently
+    for packet in olderPackets:
+        packet[2] = telemetrystream.VERSION - 1
+        receiver.datagram_received(bytes(packet), None)
+    for packet in packets:
+        receiver.datagram_received(packet, None)
+    assert receiver.getStats() == {'received': 3, 'dropped': 2, 'late': 0, 'duplicates': 0, 'invalid': 0,
+                                   'mismatched': 2, 'restarts': 0}
+    assert receiver.file.getvalue() == b''.join(packets)
+
+
+def test_long_gap_across_wraparound():
+    receiver = StreamReceiver(io.BytesIO())
+    streamer = TelemetryStreamer('127.0.0.1', 9)
+    streamer.sequence = 0xFFFFFFFE
+    packets = sendPackets(streamer, 1)
+    streamer.sequence = (streamer.sequence + 5000) & 0xFFFFFFFF
+    packets += sendPackets(streamer, 1)
+    streamer.close()
+
+    for packet in packets:
+        receiver.datagram_received(packet, None)
+    assert receiver.dropped == 5000
+    # only the newest LATE_WINDOW of the skipped sequence numbers are remembered
+    assert len(receiver.missing) == LATE_WINDOW
+    receiver.datagram_received(packets[0], None)
+    assert receiver.duplicates == 1
+
+def test_drive_command_streams(control, fake_time, robot, hal_data, monkeypatch):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.setblocking(False)
+    streamer = TelemetryStreamer('127.0.0.1', sock.getsockname()[1])
+    monkeypatch.setattr(telemetrystream, 'streamer', streamer)
+
+    hal_data['joysticks'][0]['axes'][1] = -1.0
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 1)
+
+    receiver = StreamReceiver(io.BytesIO())
+    try:
+        while True:
+            receiver.datagram_received(sock.recv(PACKET.size), None)
+    except BlockingIOError:
+        pass
+    finally:
+        sock.close()
+        streamer.close()
+
+    assert streamer.sent > 40
+    assert receiver.received == streamer.sent
+    assert receiver.dropped == 0
@@ -0,0 +1,60 @@
+'''
+    Drives the robot in simulated teleop and checks the drive command follows the input frame, and that its
+    steady state ticks keep no new memory alive
+'''
+
+import math
+import tracemalloc
+
+import oi
+import replay
+from commands import tankdriveteleopdefaultnfs
+
+
+def test_teleop_drives_forward(control, fake_time, robot, hal_data):
+    stick = hal_data['joysticks'][0]
+    stick['axes'][1] = -1.0     # full forward on the left stick Y axis
+
+    control.set_operator_control(enabled=True)
+    control.run_test(lambda tm: tm < 3)
+
+    assert oi.frame.throttle == 1.0
+    assert oi.frame.timestamp > 0.0
+    assert not oi.frame.driveSlow
+
+    # the rate limiter should have reached full speed on both sides well within 3 seconds
+    assert hal_data['pwm'][0]['value'] == 1.0
+    assert hal_data['pwm'][1]['value'] == 1.0
+
+
+def test_execute_does_not_grow_memory():
+    with replay.standIn('nfs') as (driveline, frame):
+        command = tankdriveteleopdefaultnfs.TankDriveTeleopDefaultNFS()
+        command.initialize()
+
+        def drive(ticks, start):
+            for i in range(start, start + ticks):
+                frame.timestamp += 0.02
+                frame.throttle = math.sin(i * 0.01)
+                frame.turn = math.cos(i * 0.013)
+                frame.driveSlow = i % 300 < 100
+                command.execute()
+
+        # warm up, so curve tables, timers and caches are all built before measuring
+        drive(2000, 0)
+
+        # only count allocations made inside the command, other threads (telemetry, sensor notifiers) keep running
+        tracemalloc.start(32)
+        try:
+            drive(500, 2000)
+            before = tracemalloc.take_snapshot()
+            drive(5000, 2500)
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+    inCommand = [tracemalloc.Filter(True, tankdriveteleopdefaultnfs.__file__, all_frames=True)]
+    growth = after.filter_traces(inCommand).compare_to(before.filter_traces(inCommand), 'traceback')
+    # a leak of one float per tick would be 160KB. What's left is the interpreter's free lists (tuples and frames
+    # kept for reuse) holding a few objects more or less at either snapshot
+    assert sum(stat.size_diff for stat in growth) < 256, [str(stat) for stat in growth if stat.size_diff]
@@ -0,0 +1,41 @@
+'''
+    Round trip paths through the memory mapped trajectory store and check the geometry version check
+'''
+
+import pytest
+
+import motionprofile
+import robotmap
+import trajectorystore
+
+
+def test_store_round_trip(tmpdir):
+    filename = str(tmpdir.join('paths.bin'))
+    forward = motionprofile.generateProfile(48.0, 96.0, 120.0, None, 0.01)
+    back = motionprofile.generateProfile(-24.0, 96.0, 120.0, 600.0, 0.01)
+    trajectorystore.writeStore(filename, {
+        'forward': trajectorystore.straightPath(forward),
+        'back': trajectorystore.straightPath(back),
+    })
+
+    store = trajectorystore.TrajectoryStore(filename)
+    assert sorted(store.names()) == ['back', 'forward']
+    assert store.paths == {}
+
+    path = store.getPath('back')
+    assert store.getPath('back') is path
+    assert path.samples == len(back)
+    assert list(path.rightPosition) == list(back.position)
+    assert list(path.leftVelocity) == list(back.velocity)
+    assert path.leftPosition[-1] == -24.0
+    assert 'forward' not in store.paths
+
+
+def test_store_refuses_other_geometry(tmpdir):
+    filename = str(tmpdir.join('paths.bin'))
+    profile = motionprofile.generateProfile(12.0, 96.0, 120.0)
+    trajectorystore.writeStore(filename, {'short': trajectorystore.straightPath(profile)},
+                               wheelRadius=robotmap.driveLine.driveWheelRadiusInches + 1.0)
+
+    with pytest.raises(ValueError):
+        trajectorystore.TrajectoryStore(filename)
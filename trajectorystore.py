@@ -0,0 +1,147 @@
+'''
+Memory mapped store of precomputed tank drive paths
+
+Paths are generated offline (see writeStore) into one compact binary file that is deployed with the robot code.
+At runtime the file is memory mapped on first use and only the small path index is parsed - the sample arrays
+of a path are handed out as zero copy views into the map, so robotInit pays nothing and paths that are never
+driven are never read from disk
+
+File layout (little endian):
+    header  - magic, version, channel count, wheel radius (inches), encoder ticks per revolution, path count
+    index   - one entry per path: name, byte offset of its data, sample count, sample period
+    data    - per path, CHANNELS contiguous float64 arrays of sample count values each
+
+The wheel radius and encoder ticks are checked against robotmap.driveLine when the store is opened, so a store
+generated for a different drivetrain is refused rather than driven
+'''
+
+import mmap
+import struct
+
+import robotmap
+
+
+MAGIC = b'NFST'
+VERSION = 1
+CHANNELS = ('leftPosition', 'leftVelocity', 'rightPosition', 'rightVelocity', 'heading')
+HEADER = struct.Struct('<4sHHdII')
+INDEX = struct.Struct('<32sQId4x')
+NAME_SIZE = 32
+
+
+class TankPath:
+    """
+    One path from the store. Each channel in CHANNELS is a read only memoryview of float64 samples
+    """
+
+    def __init__(self, name, period, channels):
+        self.name = name
+        self.period = period
+        self.samples = len(channels[0])
+        self.duration = (self.samples - 1) * period
+        for channelName, values in zip(CHANNELS, channels):
+            setattr(self, channelName, values)
+
+
+class TrajectoryStore:
+
+    def __init__(self, path, wheelRadius=None, encoderTicks=None):
+        """
+        :param path: store file
+        :param wheelRadius: expected wheel radius, robotmap.driveLine.driveWheelRadiusInches by default
+        :param encoderTicks: expected encoder ticks, robotmap.driveLine.driveWheelEncTicks by default
+        """
+        if wheelRadius is None:
+            wheelRadius = robotmap.driveLine.driveWheelRadiusInches
+        if encoderTicks is None:
+            encoderTicks = robotmap.driveLine.driveWheelEncTicks
+
+        self.path = path
+        self.paths = {}
+
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, channels, storeRadius, storeTicks, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or channels != len(CHANNELS):
+            raise ValueError("{} is not a version {} trajectory store".format(path, VERSION))
+        if storeRadius != wheelRadius or storeTicks != encoderTicks:
+            raise ValueError("{} was generated for a {} in wheel with {} ticks, the robot has {} in with {} ticks"
+                             .format(path, storeRadius, storeTicks, wheelRadius, encoderTicks))
+
+        self.index = {}
+        for i in range(count):
+            name, offset, samples, period = INDEX.unpack_from(self.map, HEADER.size + i * INDEX.size)
+            self.index[name.rstrip(b'\0').decode('utf-8')] = (offset, samples, period)
+
+    def names(self):
+        return list(self.index.keys())
+
+    def getPath(self, name):
+        """
+        :return: TankPath with views into the map, built on first request and reused after that
+        """
+        path = self.paths.get(name)
+        if path is None:
+            offset, samples, period = self.index[name]
+            data = memoryview(self.map)[offset:offset + len(CHANNELS) * samples * 8].cast('d')
+            path = TankPath(name, period, [data[c * samples:(c + 1) * samples] for c in range(len(CHANNELS))])
+            self.paths[name] = path
+        return path
+
+
+def writeStore(filename, paths, wheelRadius=None, encoderTicks=None):
+    """
+    Write paths to a store file, run offline
+
+    :param paths: dict of name to (period, channels), where channels is a sequence of CHANNELS sequences
+    """
+    if wheelRadius is None:
+        wheelRadius = robotmap.driveLine.driveWheelRadiusInches
+    if encoderTicks is None:
+        encoderTicks = robotmap.driveLine.driveWheelEncTicks
+
+    offset = HEADER.size + len(paths) * INDEX.size
+    offset += (-offset) % 8
+    entries = []
+    for name, (period, channels) in paths.items():
+        if len(channels) != len(CHANNELS):
+            raise ValueError("Path {} needs {} channels".format(name, len(CHANNELS)))
+        samples = len(channels[0])
+        entries.append((name, offset, samples, period, channels))
+        offset += len(CHANNELS) * samples * 8
+
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(CHANNELS), wheelRadius, encoderTicks, len(paths)))
+        for name, dataOffset, samples, period, _ in entries:
+            encoded = name.encode('utf-8')
+            if len(encoded) > NAME_SIZE:
+                raise ValueError("Path name {} is longer than {} bytes".format(name, NAME_SIZE))
+            f.write(INDEX.pack(encoded, dataOffset, samples, period))
+        f.write(bytes((-f.tell()) % 8))
+        for _, _, samples, _, channels in entries:
+            for values in channels:
+                if len(values) != samples:
+                    raise ValueError('All channels of a path need the same number of samples')
+                f.write(struct.pack('<{}d'.format(samples), *values))
+
+
+def straightPath(profile):
+    """
+    Convert a motionprofile.MotionProfile into the (period, channels) form writeStore takes
+    """
+    heading = [0.0] * len(profile)
+    return profile.period, (profile.position, profile.velocity, profile.position, profile.velocity, heading)
+
+
+store = None
+
+
+def getStore():
+    """
+    Open robotmap.trajectories.path the first time it's needed
+    """
+    global store
+    if store is None:
+        store = TrajectoryStore(robotmap.trajectories.path)
+    return store